@@ -0,0 +1,131 @@
+"""
+    Benchmark: bulk export throughput & memory, fetchall path vs COPY CSV stream vs Parquet stream.
+
+    fetchall: SELECT + fetchall + rows_to_dicts + JSON (what main_execute_sql would do for the whole lot)
+    copy_csv: COPY (SELECT ...) TO STDOUT streamed chunk by chunk (main_export_data format=csv)
+    parquet:  server-side cursor, EXPORT_CHUNK_ROWS rows per pandas / Arrow row group (main_export_data format=parquet)
+
+    Create synthetic table BENCH_EXPORT in the database of PG_CONNECTION_STRING (use a local / scratch database),
+    drop it at the end.
+
+    Usage: python -m benchmarks.bench_export --rows 100000 1000000 --columns 20 --repeat 3
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import tracemalloc
+
+from sqlalchemy import text
+
+from models.database import get_pg_engine, get_pg_async_session, dispose_pg_engine, dispose_pg_async_engine
+from models.export import copy_csv_stream, parquet_stream
+from models.serialization import dumps
+from controllers.dwh_queries import export_data_qry, rows_to_dicts
+
+BENCH_TABLE = "BENCH_EXPORT"
+BENCH_LOTNO = "BENCHLOT01"
+
+
+def create_table(rows: int, columns: int):
+    """Wide process-like table, all rows in one lot"""
+    measure_columns = ", ".join(f"M{index} NUMERIC" for index in range(columns))
+    measure_values = ", ".join(f"ROUND((RANDOM() * 100)::NUMERIC, 4)" for _ in range(columns))
+    with get_pg_engine().begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {BENCH_TABLE}"))
+        conn.execute(text(f"CREATE TABLE {BENCH_TABLE} (LOTNO TEXT, PRODUCT TEXT, SEQ INT, UPDATE_DATE TIMESTAMP, {measure_columns})"))
+        conn.execute(text(f"""
+            INSERT INTO {BENCH_TABLE}
+            SELECT :lotno, 'BENCH', i, TIMESTAMP '2026-01-01' + i * INTERVAL '1 second', {measure_values}
+            FROM GENERATE_SERIES(1, :rows) AS i
+        """), {"lotno": BENCH_LOTNO, "rows": rows})
+        conn.execute(text(f"ANALYZE {BENCH_TABLE}"))
+
+
+def drop_table():
+    with get_pg_engine().begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {BENCH_TABLE}"))
+
+
+async def fetchall_export() -> int:
+    async with get_pg_async_session() as pg_session:
+        rows = (await pg_session.execute(export_data_qry(BENCH_TABLE, BENCH_LOTNO))).fetchall()
+    return len(dumps({"success": True, "content": rows_to_dicts(rows)}))
+
+
+async def stream_export(stream) -> int:
+    size = 0
+    async for chunk in stream:
+        size += len(chunk)
+    return size
+
+
+EXPORT_PATHS = {
+    "fetchall": fetchall_export,
+    "copy_csv": lambda: stream_export(copy_csv_stream(export_data_qry(BENCH_TABLE, BENCH_LOTNO))),
+    "parquet": lambda: stream_export(parquet_stream(export_data_qry(BENCH_TABLE, BENCH_LOTNO))),
+}
+
+
+async def measure(path: str, rows: int, repeat: int) -> dict:
+    """Wall time, throughput & peak Python memory of one export path"""
+    export = EXPORT_PATHS[path]
+    await export()  # warm up
+
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        size = await export()
+        durations.append(time.perf_counter() - started)
+
+    # Separate run for memory, tracemalloc slows allocation down
+    tracemalloc.start()
+    await export()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    seconds = statistics.median(durations)
+    return {
+        "seconds": round(seconds, 3),
+        "output_mb": round(size / (1024 * 1024), 2),
+        "rows_per_s": round(rows / seconds),
+        "mb_per_s": round(size / (1024 * 1024) / seconds, 2),
+        "peak_mb": round(peak / (1024 * 1024), 2),
+    }
+
+
+async def run(args) -> list:
+    results = []
+    for rows in args.rows:
+        print(f"🔧 Creating {BENCH_TABLE}: {rows} rows x {args.columns} measure columns...")
+        create_table(rows, args.columns)
+        for path in EXPORT_PATHS:
+            result = await measure(path, rows, args.repeat)
+            results.append({"rows": rows, "columns": args.columns, "path": path, **result})
+            print(f"  rows={rows:<8} path={path:<9} {result['seconds']:>8.3f} s  {result['rows_per_s']:>9} rows/s  "
+                  f"{result['mb_per_s']:>7.2f} MB/s  output={result['output_mb']:>8.2f} MB  peak={result['peak_mb']:>8.2f} MB")
+
+    await dispose_pg_async_engine()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark bulk export paths")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--columns", type=int, default=20, help="NUMERIC measure columns")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="Write results to JSON file")
+    parser.add_argument("--keep", action="store_true", help="Keep synthetic table")
+    args = parser.parse_args()
+
+    try:
+        results = asyncio.run(run(args))
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(results, f, indent=2)
+            print(f"📄 Results written to {args.json}")
+    finally:
+        if not args.keep:
+            drop_table()
+        dispose_pg_engine()
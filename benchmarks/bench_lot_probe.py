@@ -0,0 +1,115 @@
+"""
+    Benchmark: lot_prober probe modes as the number of LOT_INFO tables grows.
+
+    Compare today's sequential loop (one query per table) with one UNION ALL statement
+    and concurrent probes over separate pooled connections (first hit wins).
+
+    Create synthetic tables BENCH_PROBE_<n>_LOT_INFO in the database of PG_CONNECTION_STRING
+    (use a local / scratch database), drop them at the end.
+
+    Usage: python -m benchmarks.bench_lot_probe --tables 1 5 10 20 50 --rows 20000 --repeat 30
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from sqlalchemy import text
+
+from models.database import get_pg_engine, dispose_pg_engine, dispose_pg_async_engine
+from controllers.dwh_async_controller import lot_prober
+
+PROBE_MODES = ("sequential", "union", "concurrent")
+
+
+def bench_table_name(index: int) -> str:
+    return f"BENCH_PROBE_{index:03d}_LOT_INFO"
+
+
+def create_tables(table_count: int, rows: int, with_index: bool):
+    """Create <table_count> LOT_INFO-like tables with <rows> lots each"""
+    with get_pg_engine().begin() as conn:
+        for index in range(table_count):
+            table_name = bench_table_name(index)
+            conn.execute(text(f"DROP TABLE IF EXISTS {table_name}"))
+            conn.execute(text(f"CREATE TABLE {table_name} (LOTNO TEXT, PRODUCT TEXT, UPDATE_DATE TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"))
+            conn.execute(text(f"""
+                INSERT INTO {table_name} (LOTNO, PRODUCT)
+                SELECT 'B{index:03d}' || LPAD(i::TEXT, 7, '0'), 'BENCH{index:03d}'
+                FROM GENERATE_SERIES(1, :rows) AS i
+            """), {"rows": rows})
+            if with_index:
+                conn.execute(text(f"CREATE INDEX ON {table_name} (LOTNO)"))
+            conn.execute(text(f"ANALYZE {table_name}"))
+
+
+def drop_tables(table_count: int):
+    with get_pg_engine().begin() as conn:
+        for index in range(table_count):
+            conn.execute(text(f"DROP TABLE IF EXISTS {bench_table_name(index)}"))
+
+
+async def measure(table_list: list, lotno: str, probe_mode: str, repeat: int) -> dict:
+    """Latency (ms) of lot_prober over <repeat> runs"""
+    # Warm up (pool & plan)
+    await lot_prober(table_list, lotno, probe_mode=probe_mode)
+
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await lot_prober(table_list, lotno, probe_mode=probe_mode)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    latencies.sort()
+    return {
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3),
+    }
+
+
+async def run(args) -> list:
+    results = []
+    for table_count in args.tables:
+        table_list = [bench_table_name(index) for index in range(table_count)]
+        cases = {
+            "unknown_lot": "NOTEXIST01",
+            "last_table": f"B{table_count - 1:03d}{args.rows:07d}",
+        }
+
+        for case, lotno in cases.items():
+            for probe_mode in PROBE_MODES:
+                result = await measure(table_list, lotno, probe_mode, args.repeat)
+                results.append({"tables": table_count, "case": case, "mode": probe_mode, **result})
+                print(f"  tables={table_count:<4} case={case:<12} mode={probe_mode:<11} "
+                      f"p50={result['p50_ms']:>9.3f} ms  p95={result['p95_ms']:>9.3f} ms")
+
+    await dispose_pg_async_engine()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark lot_prober probe modes")
+    parser.add_argument("--tables", type=int, nargs="+", default=[1, 5, 10, 20, 50])
+    parser.add_argument("--rows", type=int, default=20000, help="Lots per table")
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--no-index", action="store_true", help="Do not index LOTNO (full scan probes)")
+    parser.add_argument("--json", help="Write results to JSON file")
+    parser.add_argument("--keep", action="store_true", help="Keep synthetic tables")
+    args = parser.parse_args()
+
+    max_tables = max(args.tables)
+    print(f"🔧 Creating {max_tables} tables x {args.rows} rows...")
+    create_tables(max_tables, args.rows, with_index=not args.no_index)
+
+    try:
+        print("⏱️  Probing...")
+        results = asyncio.run(run(args))
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(results, f, indent=2)
+            print(f"📄 Results written to {args.json}")
+    finally:
+        if not args.keep:
+            drop_tables(max_tables)
+        dispose_pg_engine()
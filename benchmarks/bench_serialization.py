@@ -0,0 +1,93 @@
+"""
+    Benchmark: CPU cost of turning lot rows into the JSON response body.
+
+    legacy: Row -> dict in the controller, Row walk again in the route, FastAPI jsonable_encoder, json.dumps
+    orjson: rows_to_dicts once in the controller, DWHJSONResponse (orjson, Decimal / datetime / UUID handled natively)
+
+    Rows are built in memory (SQLAlchemy Row objects, no database) with the column types of a process table:
+    text, NUMERIC (Decimal), float, int, timestamp and UUID.
+
+    Usage: python -m benchmarks.bench_serialization --rows 1000 10000 100000 --repeat 5
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.engine.result import IteratorResult, SimpleResultMetaData
+
+from controllers.dwh_queries import rows_to_dicts
+from models.serialization import DWHJSONResponse
+
+COLUMNS = ("lotno", "product", "Measure 1", "Measure 2", "Measure 3", "Scratch", "Crack", "ts", "record_id")
+
+
+def make_rows(row_count: int, tables: int) -> list:
+    """Result rows of <tables> tables (one list of Row per table, like summary content)"""
+    started = datetime(2026, 1, 1)
+    per_table = max(1, row_count // tables)
+    return [
+        IteratorResult(SimpleResultMetaData(COLUMNS), iter(
+            (f"25XPB{i:04d}", "PAC", Decimal(f"{random.uniform(0, 100):.4f}"), random.random(), random.random() * 1000,
+             random.randint(0, 5), random.randint(0, 5), started + timedelta(seconds=i), uuid.uuid4())
+            for i in range(per_table)
+        )).all()
+        for _ in range(tables)
+    ]
+
+
+def legacy_body(tables: list) -> bytes:
+    """Previous path: dict(row._mapping) twice, jsonable_encoder, json.dumps (Starlette JSONResponse)"""
+    controller = [[dict(row._mapping) for row in rows] for rows in tables]
+    content = [[dict(row._mapping) if hasattr(row, "_mapping") else row for row in item] for item in controller]
+    return json.dumps(jsonable_encoder({"success": True, "content": content}),
+                      ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def orjson_body(tables: list) -> bytes:
+    """Current path: rows_to_dicts in the controller, DWHJSONResponse in the route"""
+    content = [rows_to_dicts(rows) for rows in tables]
+    return DWHJSONResponse({"success": True, "content": content}).body
+
+
+def measure(func, tables: list, repeat: int) -> dict:
+    """CPU time (ms) of <func> over <repeat> runs and output size"""
+    body = func(tables)  # warm up
+    cpu_times = []
+    for _ in range(repeat):
+        started = time.process_time()
+        func(tables)
+        cpu_times.append((time.process_time() - started) * 1000)
+
+    cpu_ms = statistics.median(cpu_times)
+    mb = len(body) / (1024 * 1024)
+    return {"cpu_ms": round(cpu_ms, 3), "output_mb": round(mb, 3), "cpu_ms_per_mb": round(cpu_ms / mb, 3) if mb else None}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark JSON serialization of lot rows")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--tables", type=int, default=10, help="Tables the rows are spread over")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="Write results to JSON file")
+    args = parser.parse_args()
+
+    results = []
+    for row_count in args.rows:
+        tables = make_rows(row_count, args.tables)
+        legacy = measure(legacy_body, tables, args.repeat)
+        fast = measure(orjson_body, tables, args.repeat)
+        saved = round(legacy["cpu_ms_per_mb"] - fast["cpu_ms_per_mb"], 3) if legacy["cpu_ms_per_mb"] and fast["cpu_ms_per_mb"] else None
+        results.append({"rows": row_count, "legacy": legacy, "orjson": fast, "cpu_ms_saved_per_mb": saved})
+        print(f"  rows={row_count:<7} legacy={legacy['cpu_ms']:>9.3f} ms ({legacy['cpu_ms_per_mb']:>8.3f} ms/MB)  "
+              f"orjson={fast['cpu_ms']:>9.3f} ms ({fast['cpu_ms_per_mb']:>8.3f} ms/MB)  saved={saved} ms/MB")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"📄 Results written to {args.json}")
@@ -0,0 +1,318 @@
+"""
+    Benchmark suite: every async controller function and MCP / HTTP route against the synthetic warehouse,
+    at several data scales (benchmarks/warehouse.py).
+
+    Each case is run <repeat> times after one warm-up call, with the result cache cleared before each call
+    (cold warehouse path). Reported per case: p50 / p95 / p99 / mean latency (ms), warehouse queries per call,
+    bytes out per call (JSON body / file size) and failed calls.
+
+    Results are written as JSON ({"meta", "results"}) and can be compared with a previous run:
+
+    Usage: python -m benchmarks.bench_suite --scales small medium --repeat 30 --json run.json [--compare base.json]
+           python -m benchmarks.bench_suite --local /tmp/bench-pg      # throwaway local PostgreSQL (pgserver)
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import math
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from benchmarks.warehouse import SCALES, BENCH_SCHEMA, BENCH_DEPARTMENT, use_warehouse, start_local_postgres, \
+    generate_warehouse, drop_warehouse, lotno, product_code, process_tables
+
+BENCH_TOKEN = "Bearer benchmark"
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """Nearest-rank percentile of already sorted values"""
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+
+def summarize(latencies: list, queries: list, sizes: list, errors: int) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "calls": len(latencies),
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+        "mean_ms": round(sum(latencies) / len(latencies), 3),
+        "max_ms": round(latencies[-1], 3),
+        "queries_per_call": round(sum(queries) / len(queries), 2),
+        "bytes_out": round(sum(sizes) / len(sizes)),
+        "errors": errors,
+    }
+
+
+#################################################################################
+########################         Case Section         ###########################
+#################################################################################
+
+def tool_arguments(spec) -> dict:
+    """Arguments of each tool for a lot in the middle of product P00"""
+    lot = lotno(0, spec.lots // 2)
+    tables = process_tables(spec)
+    mapping_data = {"lotno": lot}
+    return {
+        "lot": lot,
+        "mapping": {"mapping_data": mapping_data},
+        "execute": {"mapping_data": {"table_name": tables[-1], "lotno": lot}},
+        "page": {"mapping_data": {"table_name": tables[-1], "lotno": "-"}, "page_size": 1000},
+        "summary": {"mapping_data": mapping_data, "table_list": tables, "no_cache": True},
+        "statistics": {"mapping_data": mapping_data, "table_list": tables, "no_cache": True, "mode": "statistics"},
+        "export": {"mapping_data": {"table_name": tables[-1], "lotno": lot}, "format": "csv"},
+    }
+
+
+def controller_cases(spec) -> dict:
+    """name -> async callable of one controller call"""
+    from controllers import dwh_async_controller as controller
+
+    arguments = tool_arguments(spec)
+    chat = f"Benchmark lot {arguments['lot']}"
+    return {
+        "lot_mapper": lambda: controller.lot_mapper(arguments["lot"]),
+        "process_mapper": lambda: controller.process_mapper(product_code=product_code(0), department=BENCH_DEPARTMENT),
+        "helper_mapping_info": lambda: controller.helper_mapping_info_func(chat),
+        "helper_process_mapper": lambda: controller.helper_process_mapper_func(chat, arguments["mapping"]),
+        "main_execute_sql": lambda: controller.main_execute_sql_func(chat, arguments["execute"]),
+        "main_execute_sql_page": lambda: controller.main_execute_sql_func(chat, arguments["page"]),
+        "main_summary_each_process_data": lambda: controller.main_summary_each_process_data_func(chat, arguments["summary"]),
+        "main_summary_each_process_data_statistics": lambda: controller.main_summary_each_process_data_func(chat, arguments["statistics"]),
+        "main_summary_each_process_data_defective": lambda: controller.main_summary_each_process_data_def_func(chat, arguments["summary"]),
+        "main_summary_each_process_data_combined": lambda: controller.main_summary_each_process_data_combined_func(chat, arguments["summary"]),
+        "main_defect_pareto": lambda: controller.main_defect_pareto_func(chat, arguments["summary"]),
+        "main_export_data": lambda: controller.main_export_data_func(chat, arguments["export"]),
+    }
+
+
+def route_cases(spec) -> dict:
+    """operation_id -> request body of each tool route (MCP tools dispatch to these routes)"""
+    arguments = tool_arguments(spec)
+    chat = f"Benchmark lot {arguments['lot']}"
+    return {
+        "helper_mapping_info": {"chatInput": chat},
+        "helper_process_mapper": {"chatInput": chat, "arguments": arguments["mapping"]},
+        "main_execute_sql": {"chatInput": chat, "arguments": arguments["execute"]},
+        "main_summary_each_process_data": {"chatInput": chat, "arguments": arguments["summary"]},
+        "main_summary_each_process_data_defective": {"chatInput": chat, "arguments": arguments["summary"]},
+        "main_summary_each_process_data_combined": {"chatInput": chat, "arguments": arguments["summary"]},
+        "main_defect_pareto": {"chatInput": chat, "arguments": arguments["summary"]},
+        "main_export_data": {"chatInput": chat, "arguments": arguments["export"]},
+    }
+
+
+#################################################################################
+########################       Measure Section        ###########################
+#################################################################################
+
+async def call_controller(func) -> tuple[int, bool]:
+    """Run one controller call, return (bytes out, success)"""
+    from models.serialization import dumps
+
+    result = await func()
+    # Component functions (lot_mapper ...) return plain data without "success"
+    success = bool(result.get("success", True)) if isinstance(result, dict) else bool(result)
+    if isinstance(result, dict) and hasattr(result.get("content"), "__aiter__"):
+        # Export stream: read the whole file
+        size = 0
+        async for chunk in result["content"]:
+            size += len(chunk)
+        return size, success
+    return len(dumps(result)), success
+
+
+async def measure_controller(func, repeat: int) -> dict:
+    from models.metrics import start_request, end_request
+    from models.result_cache import result_cache
+
+    await call_controller(func)  # warm up
+
+    latencies, queries, sizes, errors = [], [], [], 0
+    for _ in range(repeat):
+        result_cache.clear()
+        stats, token = start_request()
+        started = time.perf_counter()
+        try:
+            size, success = await call_controller(func)
+        finally:
+            latencies.append((time.perf_counter() - started) * 1000)
+            end_request(token)
+        queries.append(stats["db_queries"])
+        sizes.append(size)
+        errors += not success
+    return summarize(latencies, queries, sizes, errors)
+
+
+async def measure_route(client, operation: str, body: dict, repeat: int) -> dict:
+    from models.metrics import metric_value
+    from models.result_cache import result_cache
+
+    path = f"/dwh_agent/{operation}"
+    await client.post(path, json=body)  # warm up
+
+    latencies, queries, sizes = [], [], []
+    errors_before = metric_value("dwh_request_errors_total", operation=operation)
+    for _ in range(repeat):
+        result_cache.clear()
+        queries_before = metric_value("dwh_db_queries_total", operation=operation)
+        started = time.perf_counter()
+        response = await client.post(path, json=body)
+        latencies.append((time.perf_counter() - started) * 1000)
+        queries.append(metric_value("dwh_db_queries_total", operation=operation) - queries_before)
+        sizes.append(len(response.content))
+    return summarize(latencies, queries, sizes, int(metric_value("dwh_request_errors_total", operation=operation) - errors_before))
+
+
+async def run_scale(scale: str, spec, args) -> list:
+    """Measure all cases against a freshly started application (catalog loaded from the generated warehouse)"""
+    import httpx
+    import main
+
+    results = []
+
+    def report(kind: str, name: str, result: dict):
+        results.append({"scale": scale, "kind": kind, "name": name, **result})
+        print(f"  {scale:<7} {kind:<10} {name:<43} p50={result['p50_ms']:>9.3f} p95={result['p95_ms']:>9.3f} "
+              f"p99={result['p99_ms']:>9.3f} ms  queries={result['queries_per_call']:>6}  bytes={result['bytes_out']:>9}  "
+              f"errors={result['errors']}", file=sys.stderr)
+
+    async with main.app.router.lifespan_context(main.app):
+        if "controller" in args.kinds:
+            for name, func in controller_cases(spec).items():
+                if not args.only or name in args.only:
+                    report("controller", name, await measure_controller(func, args.repeat))
+
+        if "route" in args.kinds:
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench",
+                                         headers={"Authorization": BENCH_TOKEN}, timeout=None) as client:
+                for operation, body in route_cases(spec).items():
+                    if not args.only or operation in args.only:
+                        report("route", operation, await measure_route(client, operation, body, args.repeat))
+
+    return results
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def scale_spec(scale: str, args):
+    return SCALES[scale]._replace(**{key: value for key, value in
+                                     (("columns", args.columns), ("defect_ratio", args.defect_ratio)) if value is not None})
+
+
+def run_worker(args):
+    """Worker process: measure the already generated warehouse of args.scales[0], write results to args.worker_output"""
+    scale = args.scales[0]
+    # Tool banners of the controllers go to stdout, keep the report readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = asyncio.run(run_scale(scale, scale_spec(scale, args), args))
+    with open(args.worker_output, "w") as f:
+        json.dump(results, f)
+
+
+def run(args) -> dict:
+    """
+        Generate each scale, then measure it in a fresh worker process:
+        no lot index / cache / catalog state of the previous scale leaks into the next one
+    """
+    from models.database import get_pg_engine, dispose_pg_engine, PG_POOL_SIZE, PG_MAX_OVERFLOW
+
+    meta = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "pool_size": PG_POOL_SIZE,
+        "max_overflow": PG_MAX_OVERFLOW,
+        "scales": {},
+    }
+    results = []
+
+    try:
+        for scale in args.scales:
+            spec = scale_spec(scale, args)
+            meta["scales"][scale] = spec._asdict()
+            print(f"🏭 Generating {scale} warehouse: {spec}", file=sys.stderr)
+            generate_warehouse(get_pg_engine(), spec, args.schema)
+
+            with tempfile.NamedTemporaryFile(suffix=".json") as output:
+                command = [sys.executable, "-m", "benchmarks.bench_suite", "--scales", scale, "--kinds", *args.kinds,
+                           "--repeat", str(args.repeat), "--schema", args.schema, "--worker-output", output.name]
+                for option, value in (("--columns", args.columns), ("--defect-ratio", args.defect_ratio)):
+                    if value is not None:
+                        command += [option, str(value)]
+                if args.only:
+                    command += ["--only", *args.only]
+                subprocess.run(command, check=True)
+                results.extend(json.load(output))
+    finally:
+        if not args.keep:
+            drop_warehouse(get_pg_engine(), args.schema)
+        dispose_pg_engine()
+
+    return {"meta": meta, "results": results}
+
+
+def compare(base: dict, current: dict):
+    """Print p50 / p95 of the current run against a previous run, case by case"""
+    base_results = {(item["scale"], item["kind"], item["name"]): item for item in base["results"]}
+    print(f"\nCompared with {base['meta'].get('git_commit')} ({base['meta'].get('started_at')}):")
+    for item in current["results"]:
+        previous = base_results.get((item["scale"], item["kind"], item["name"]))
+        if previous is None:
+            continue
+        ratios = {key: item[key] / previous[key] if previous[key] else None for key in ("p50_ms", "p95_ms")}
+        print(f"  {item['scale']:<7} {item['kind']:<10} {item['name']:<43} "
+              + "  ".join(f"{key}={previous[key]:.3f}->{item[key]:.3f} ({ratio:.2f}x)" if ratio else f"{key}=n/a"
+                          for key, ratio in ratios.items())
+              + f"  queries={previous['queries_per_call']}->{item['queries_per_call']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark controller functions & MCP routes on a synthetic warehouse")
+    parser.add_argument("--scales", nargs="+", choices=SCALES, default=["small", "medium"])
+    parser.add_argument("--kinds", nargs="+", choices=("controller", "route"), default=["controller", "route"])
+    parser.add_argument("--only", nargs="+", help="Run only these case names / operation_ids")
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--columns", type=int, help="Override data columns per process table of every scale")
+    parser.add_argument("--defect-ratio", type=float, help="Override defect column ratio of every scale")
+    parser.add_argument("--schema", default=BENCH_SCHEMA)
+    parser.add_argument("--local", metavar="DIR", help="Throwaway local PostgreSQL data directory (pgserver)")
+    parser.add_argument("--json", help="Write results to JSON file")
+    parser.add_argument("--compare", help="Previous JSON results to compare with")
+    parser.add_argument("--keep", action="store_true", help="Keep synthetic warehouse schema")
+    parser.add_argument("--worker-output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Slow query / N+1 warnings of every call would bury the report
+    logging.getLogger("models.query_log").setLevel(logging.ERROR)
+
+    # Before models.database is imported: connection string & search_path of the synthetic warehouse
+    use_warehouse(start_local_postgres(args.local) if args.local and not args.worker_output else None, args.schema)
+
+    if args.worker_output:
+        run_worker(args)
+        sys.exit(0)
+
+    report = run(args)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"📄 Results written to {args.json}", file=sys.stderr)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
@@ -0,0 +1,389 @@
+"""
+    Load generator: many concurrent agents running the tool sequence of a real chat turn
+        helper_mapping_info -> helper_process_mapper -> main_summary_each_process_data -> main_summary_each_process_data_defective
+    with think time between calls, over plain HTTP (tool routes) or MCP (SSE session per agent, tools/call).
+
+    Concurrency is stepped (--agents 1 5 10 20 50), each step runs --duration seconds. Every --interval seconds
+    and for each step it reports throughput, p50 / p95 / p99 latency, error rate and pool checkout wait / checked out
+    connections (scraped from /metrics), then the step where throughput stops growing (saturation).
+
+    Target:
+        --url http://host:8080    running server (HTTP or MCP), lots from --lots
+        (no --url)                in-process application over ASGI (HTTP only), --scale generates the synthetic warehouse
+
+    Usage: python -m benchmarks.load_test --scale medium --agents 1 5 10 20 50 --duration 30 --think-time 0.5
+           python -m benchmarks.load_test --url http://127.0.0.1:8080 --protocol mcp --lots 25XPB0062:3 25XPB2941 --agents 5 10
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import math
+import random
+import re
+import sys
+import time
+
+from benchmarks.warehouse import SCALES, BENCH_SCHEMA, use_warehouse, start_local_postgres, generate_warehouse, \
+    drop_warehouse, lotno
+
+SEQUENCE = ("helper_mapping_info", "helper_process_mapper", "main_summary_each_process_data", "main_summary_each_process_data_defective")
+
+
+def percentile(sorted_values: list, fraction: float) -> float | None:
+    """Nearest-rank percentile of already sorted values"""
+    if not sorted_values:
+        return None
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+
+#################################################################################
+########################        Lot Mix Section       ###########################
+#################################################################################
+
+class LotMix:
+    """
+        Weighted lots (LOT or LOT:WEIGHT). hot_ratio of the sequences go to the first <hot_lots> lots,
+        like many agents asking about the lot of the day
+    """
+
+    def __init__(self, lots: list, hot_lots: int = 0, hot_ratio: float = 0.0):
+        self.lots, self.weights = [], []
+        for item in lots:
+            lot, _, weight = item.partition(":")
+            self.lots.append(lot)
+            self.weights.append(float(weight or 1))
+        self.hot_lots = self.lots[:hot_lots]
+        self.hot_ratio = hot_ratio if self.hot_lots else 0.0
+
+    def pick(self, rng: random.Random) -> str:
+        if self.hot_ratio and rng.random() < self.hot_ratio:
+            return rng.choice(self.hot_lots)
+        return rng.choices(self.lots, self.weights)[0]
+
+
+#################################################################################
+########################        Caller Section        ###########################
+#################################################################################
+
+class HttpCaller:
+    """Tool call as POST /dwh_agent/<operation> (what MCP dispatches to)"""
+
+    def __init__(self, client):
+        self.client = client
+
+    async def call(self, operation: str, body: dict) -> tuple[int, dict | None]:
+        response = await self.client.post(f"/dwh_agent/{operation}", json=body)
+        try:
+            return response.status_code, response.json()
+        except ValueError:
+            return response.status_code, None
+
+    async def close(self):
+        pass
+
+
+class McpCaller:
+    """Tool call through an MCP session (SSE transport of fastapi_mcp), one session per agent like a real MCP client"""
+
+    def __init__(self, url: str, token: str):
+        self.url = url
+        self.token = token
+        self._stack = contextlib.AsyncExitStack()
+        self.session = None
+
+    async def open(self):
+        from mcp import ClientSession
+        from mcp.client.sse import sse_client
+
+        read, write = await self._stack.enter_async_context(sse_client(f"{self.url}/mcp", headers={"Authorization": self.token}))
+        self.session = await self._stack.enter_async_context(ClientSession(read, write))
+        await self.session.initialize()
+        return self
+
+    async def call(self, operation: str, body: dict) -> tuple[int, dict | None]:
+        result = await self.session.call_tool(operation, body)
+        text = "".join(getattr(item, "text", "") for item in result.content)
+        try:
+            content = json.loads(text)
+        except ValueError:
+            content = None
+        return (500 if result.isError else 200), content
+
+    async def close(self):
+        await self._stack.aclose()
+
+
+#################################################################################
+########################      Load Test Section       ###########################
+#################################################################################
+
+class LoadTest:
+    """Run agents, keep one record per tool call: (finished_at, operation, latency_ms, status, ok)"""
+
+    def __init__(self, args, lot_mix: LotMix, metrics_client):
+        self.args = args
+        self.lot_mix = lot_mix
+        self.metrics_client = metrics_client
+        self.records: list[tuple] = []
+        self.sequences: list[float] = []
+        self.intervals: list[dict] = []
+
+    async def think(self, rng: random.Random):
+        if self.args.think_time > 0:
+            await asyncio.sleep(rng.expovariate(1 / self.args.think_time))
+
+    async def timed_call(self, caller, operation: str, body: dict) -> dict | None:
+        started = time.perf_counter()
+        try:
+            status, content = await caller.call(operation, body)
+        except Exception as e:
+            status, content = 599, {"error": f"{type(e).__name__}: {e}"}
+        ok = status == 200 and isinstance(content, dict) and content.get("success") is True
+        self.records.append((time.monotonic(), operation, (time.perf_counter() - started) * 1000, status, ok))
+        return content if ok else None
+
+    async def run_sequence(self, caller, rng: random.Random):
+        lot = self.lot_mix.pick(rng)
+        chat = f"Summarize process and defective data of lot {lot}"
+        lot_arguments = {"mapping_data": {"lotno": lot}}
+
+        await self.timed_call(caller, "helper_mapping_info", {"chatInput": chat})
+        await self.think(rng)
+
+        mapped = await self.timed_call(caller, "helper_process_mapper", {"chatInput": chat, "arguments": lot_arguments})
+        if not mapped:
+            return
+        summary_arguments = {**lot_arguments, "table_list": [item["table_name"] for item in mapped["content"]],
+                             "no_cache": self.args.no_cache}
+        await self.think(rng)
+
+        await self.timed_call(caller, "main_summary_each_process_data", {"chatInput": chat, "arguments": summary_arguments})
+        await self.think(rng)
+
+        await self.timed_call(caller, "main_summary_each_process_data_defective", {"chatInput": chat, "arguments": summary_arguments})
+        self.sequences.append(time.monotonic())
+        await self.think(rng)
+
+    async def agent(self, index: int, make_caller, stop: asyncio.Event):
+        rng = random.Random(self.args.seed * 100003 + index)
+        caller = await make_caller()
+        try:
+            while not stop.is_set():
+                await self.run_sequence(caller, rng)
+        finally:
+            await caller.close()
+
+    # ----- Pool metrics -----
+
+    async def scrape_pool(self) -> dict:
+        """{engine: {"wait_sum", "wait_count", "checked_out", "overflow"}} from /metrics, empty when unavailable"""
+        try:
+            response = await self.metrics_client.get("/metrics")
+            text = response.text if response.status_code == 200 else ""
+        except Exception:
+            return {}
+        pool = {}
+        for name, engine, value in re.findall(
+                r'^dwh_pool_(checkout_wait_seconds_sum|checkout_wait_seconds_count|checked_out|overflow)\{engine="(\w+)"\} (\S+)$',
+                text, flags=re.MULTILINE):
+            key = {"checkout_wait_seconds_sum": "wait_sum", "checkout_wait_seconds_count": "wait_count"}.get(name, name)
+            pool.setdefault(engine, {})[key] = float(value)
+        return pool
+
+    @staticmethod
+    def pool_delta(before: dict, after: dict) -> dict:
+        """Mean checkout wait (ms) between two scrapes & current checked out / overflow, per engine"""
+        delta = {}
+        for engine, values in after.items():
+            previous = before.get(engine, {})
+            count = values.get("wait_count", 0) - previous.get("wait_count", 0)
+            wait = values.get("wait_sum", 0) - previous.get("wait_sum", 0)
+            delta[engine] = {"checkouts": int(count), "mean_wait_ms": round(wait / count * 1000, 3) if count else 0.0,
+                             "checked_out": int(values.get("checked_out", 0)), "overflow": int(values.get("overflow", 0))}
+        return delta
+
+    # ----- Report -----
+
+    def summarize(self, records: list, sequences: int, seconds: float) -> dict:
+        latencies = sorted(record[2] for record in records)
+        errors = sum(1 for record in records if not record[4])
+        # Fast rejections of admission control, counted in errors too
+        rejected = sum(1 for record in records if record[3] in (429, 503))
+        statuses = {}
+        for record in records:
+            statuses[str(record[3])] = statuses.get(str(record[3]), 0) + 1
+        return {
+            "calls": len(records),
+            "calls_per_s": round(len(records) / seconds, 2) if seconds else None,
+            "sequences_per_s": round(sequences / seconds, 3) if seconds else None,
+            "p50_ms": round(percentile(latencies, 0.50), 3) if latencies else None,
+            "p95_ms": round(percentile(latencies, 0.95), 3) if latencies else None,
+            "p99_ms": round(percentile(latencies, 0.99), 3) if latencies else None,
+            "error_rate": round(errors / len(records), 4) if records else None,
+            "rejected_rate": round(rejected / len(records), 4) if records else None,
+            "statuses": statuses,
+        }
+
+    async def reporter(self, agents: int, started: float, stop: asyncio.Event):
+        """Print & keep one line per interval while the step runs"""
+        last, pool_before = started, await self.scrape_pool()
+        position, sequence_position = len(self.records), len(self.sequences)
+        while not stop.is_set():
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(stop.wait(), self.args.interval)
+            now = time.monotonic()
+            records, position = self.records[position:], len(self.records)
+            sequences, sequence_position = len(self.sequences) - sequence_position, len(self.sequences)
+            pool_after = await self.scrape_pool()
+            interval = {"agents": agents, "elapsed_s": round(now - started, 1), **self.summarize(records, sequences, now - last),
+                        "pool": self.pool_delta(pool_before, pool_after)}
+            self.intervals.append(interval)
+            pool = "  ".join(f"{engine}: wait={values['mean_wait_ms']}ms out={values['checked_out']} overflow={values['overflow']}"
+                             for engine, values in interval["pool"].items())
+            print(f"  agents={agents:<4} t={interval['elapsed_s']:>6}s  {interval['calls_per_s'] or 0:>8} calls/s  "
+                  f"p50={interval['p50_ms']} p95={interval['p95_ms']} p99={interval['p99_ms']} ms  "
+                  f"errors={interval['error_rate']} rejected={interval['rejected_rate']}  {pool}", file=sys.stderr)
+            last, pool_before = now, pool_after
+
+    async def run_step(self, agents: int, make_caller) -> dict:
+        """Run <agents> agents for --duration seconds, return the step summary"""
+        stop = asyncio.Event()
+        started = time.monotonic()
+        position, sequence_position = len(self.records), len(self.sequences)
+        pool_before = await self.scrape_pool()
+
+        reporter = asyncio.create_task(self.reporter(agents, started, stop))
+        tasks = [asyncio.create_task(self.agent(index, make_caller, stop)) for index in range(agents)]
+        await asyncio.sleep(self.args.duration)
+        stop.set()
+        # Let in-flight sequences finish their current call, then cancel the rest
+        done, pending = await asyncio.wait(tasks, timeout=self.args.drain_timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*tasks, reporter, return_exceptions=True)
+
+        seconds = time.monotonic() - started
+        records = self.records[position:]
+        summary = {"agents": agents, "seconds": round(seconds, 1),
+                   **self.summarize(records, len(self.sequences) - sequence_position, seconds),
+                   "pool": self.pool_delta(pool_before, await self.scrape_pool()),
+                   "operations": {operation: self.summarize([record for record in records if record[1] == operation], 0, seconds)
+                                  for operation in SEQUENCE}}
+        return summary
+
+
+def saturation_step(steps: list, min_gain: float = 0.1) -> dict | None:
+    """First step whose throughput grew less than <min_gain> over the previous one (more agents only add latency)"""
+    for previous, step in zip(steps, steps[1:]):
+        if previous["calls_per_s"] and step["calls_per_s"] is not None and step["calls_per_s"] < previous["calls_per_s"] * (1 + min_gain):
+            return {"agents": step["agents"], "previous_agents": previous["agents"],
+                    "calls_per_s": step["calls_per_s"], "p95_ms": step["p95_ms"], "previous_p95_ms": previous["p95_ms"]}
+    return None
+
+
+#################################################################################
+########################          Main Section        ###########################
+#################################################################################
+
+async def run(args, lots: list) -> dict:
+    import httpx
+
+    lot_mix = LotMix(lots, args.hot_lots, args.hot_ratio)
+    limits = httpx.Limits(max_connections=max(args.agents) + 5, max_keepalive_connections=max(args.agents) + 5)
+    headers = {"Authorization": args.token}
+
+    async with contextlib.AsyncExitStack() as stack:
+        if args.url:
+            client = await stack.enter_async_context(
+                httpx.AsyncClient(base_url=args.url, headers=headers, timeout=args.timeout, limits=limits))
+        else:
+            import main
+            await stack.enter_async_context(main.app.router.lifespan_context(main.app))
+            client = await stack.enter_async_context(httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=main.app), base_url="http://load", headers=headers, timeout=args.timeout))
+            # Tool banners of the controllers go to stdout, keep the report readable
+            stack.enter_context(contextlib.redirect_stdout(io.StringIO()))
+
+        if args.protocol == "mcp":
+            async def make_caller():
+                return await McpCaller(args.url, args.token).open()
+        else:
+            async def make_caller():
+                return HttpCaller(client)
+
+        load_test = LoadTest(args, lot_mix, client)
+        steps = []
+        for agents in args.agents:
+            print(f"🚀 {agents} agents for {args.duration}s ({args.protocol}, think time {args.think_time}s)", file=sys.stderr)
+            step = await load_test.run_step(agents, make_caller)
+            steps.append(step)
+            print(f"  => {step['calls_per_s']} calls/s  {step['sequences_per_s']} sequences/s  p50={step['p50_ms']} "
+                  f"p95={step['p95_ms']} p99={step['p99_ms']} ms  errors={step['error_rate']} rejected={step['rejected_rate']}", file=sys.stderr)
+
+    saturation = saturation_step(steps)
+    if saturation:
+        print(f"📉 Saturation at {saturation['agents']} agents: {saturation['calls_per_s']} calls/s "
+              f"(no gain over {saturation['previous_agents']} agents), p95 {saturation['previous_p95_ms']} -> {saturation['p95_ms']} ms",
+              file=sys.stderr)
+    else:
+        print("📈 Throughput still growing at the last step, add more agents to find saturation", file=sys.stderr)
+
+    return {"settings": {key: value for key, value in vars(args).items() if key != "token"}, "lots": lots,
+            "steps": steps, "intervals": load_test.intervals, "saturation": saturation}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent MCP / HTTP agent load generator")
+    parser.add_argument("--url", help="Base URL of a running server, in-process application when empty")
+    parser.add_argument("--protocol", choices=("http", "mcp"), default="http", help="mcp needs --url")
+    parser.add_argument("--token", default="Bearer loadtest", help="Authorization header value")
+    parser.add_argument("--agents", type=int, nargs="+", default=[1, 5, 10, 20], help="Concurrency steps")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds per step")
+    parser.add_argument("--interval", type=float, default=5, help="Seconds between interval reports")
+    parser.add_argument("--think-time", type=float, default=0.5, help="Mean think time between calls (exponential), 0 for none")
+    parser.add_argument("--lots", nargs="+", help="Lot mix LOT[:WEIGHT], default: all lots of the synthetic warehouse")
+    parser.add_argument("--hot-lots", type=int, default=0, help="First N lots of the mix are hot")
+    parser.add_argument("--hot-ratio", type=float, default=0.0, help="Share of sequences on the hot lots")
+    parser.add_argument("--no-cache", action="store_true", help="Send no_cache with the summary calls")
+    parser.add_argument("--timeout", type=float, default=120, help="Client timeout of one call")
+    parser.add_argument("--drain-timeout", type=float, default=30, help="Seconds to let running sequences finish after a step")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--scale", choices=SCALES, help="In-process only: generate the synthetic warehouse at this scale")
+    parser.add_argument("--schema", default=BENCH_SCHEMA)
+    parser.add_argument("--local", metavar="DIR", help="In-process only: throwaway local PostgreSQL data directory (pgserver)")
+    parser.add_argument("--json", help="Write steps, intervals & saturation to JSON file")
+    args = parser.parse_args()
+
+    if args.protocol == "mcp" and not args.url:
+        parser.error("--protocol mcp needs --url of a running server (SSE is not streamed by the in-process transport)")
+    if args.url and (args.scale or args.local):
+        parser.error("--scale / --local generate a warehouse for the in-process application only")
+    if not args.lots and not args.scale:
+        parser.error("--lots is required without --scale")
+
+    # Slow query / N+1 warnings of every call would bury the report
+    logging.getLogger("models.query_log").setLevel(logging.ERROR)
+
+    spec = SCALES[args.scale] if args.scale else None
+    if spec:
+        # Before models.database is imported: connection string & search_path of the synthetic warehouse
+        use_warehouse(start_local_postgres(args.local) if args.local else None, args.schema)
+        from models.database import get_pg_engine, dispose_pg_engine
+        print(f"🏭 Generating {args.scale} warehouse: {spec}", file=sys.stderr)
+        generate_warehouse(get_pg_engine(), spec, args.schema)
+
+    lots = args.lots or [lotno(product, lot) for product in range(spec.products) for lot in range(spec.lots)]
+    try:
+        report = asyncio.run(run(args, lots))
+    finally:
+        if spec:
+            drop_warehouse(get_pg_engine(), args.schema)
+            dispose_pg_engine()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"📄 Results written to {args.json}", file=sys.stderr)
@@ -0,0 +1,203 @@
+"""
+    Synthetic local warehouse for benchmarks: config tables + LOT_INFO & process tables with generated rows.
+
+    Everything is created in its own schema (default "dwh_bench"), the application reads it through
+    search_path (PGOPTIONS), so the real CONFIG_* tables of the database are never touched.
+
+    Built per product:
+        <PRODUCT>_LOT_INFO                 LOTNO, PRODUCT, UPDATE_DATE (CONFIG_TABLE_FIELD target)
+        <PRODUCT>_<PROCESS> x processes    LOTNO, PRODUCT, SEQ, UPDATE_DATE, M0..Mn (NUMERIC), D0..Dk (INT defect count)
+    and CONFIG_WAREHOUSE_TABLE / CONFIG_LINK_CODE (Measure / Defective columns) / CONFIG_TABLE_FIELD rows.
+
+    Database: PG_CONNECTION_STRING, or a throwaway local PostgreSQL with --local (needs `pip install pgserver`).
+
+    Usage: python -m benchmarks.warehouse --scale small [--local DIR] [--drop]
+"""
+from typing import NamedTuple
+import argparse
+import os
+import random
+
+from sqlalchemy import text
+
+BENCH_SCHEMA = os.getenv("BENCH_SCHEMA", "dwh_bench")
+BENCH_DEPARTMENT = "BENCH"
+
+
+class WarehouseSpec(NamedTuple):
+    """Shape of the synthetic warehouse"""
+    products: int = 2
+    processes: int = 5            # Process tables per product
+    lots: int = 50                # Lots per product
+    rows_per_lot: int = 20        # Rows of one lot in each process table
+    columns: int = 10             # Data columns per process table (measure + defect)
+    defect_ratio: float = 0.3     # Share of data columns that are defect counts
+    seed: int = 42
+
+    @property
+    def defect_columns(self) -> int:
+        return max(1, round(self.columns * self.defect_ratio)) if self.defect_ratio > 0 else 0
+
+    @property
+    def measure_columns(self) -> int:
+        return max(0, self.columns - self.defect_columns)
+
+    @property
+    def rows_per_table(self) -> int:
+        return self.lots * self.rows_per_lot
+
+
+SCALES = {
+    "small": WarehouseSpec(products=2, processes=5, lots=50, rows_per_lot=20, columns=10),
+    "medium": WarehouseSpec(products=4, processes=10, lots=200, rows_per_lot=100, columns=20),
+    "large": WarehouseSpec(products=8, processes=20, lots=500, rows_per_lot=500, columns=40),
+}
+
+
+def product_code(product: int) -> str:
+    return f"P{product:02d}"
+
+
+def process_code(process: int) -> str:
+    return f"{1000 + process * 10}"
+
+
+def lot_table(product: int) -> str:
+    return f"{product_code(product)}_LOT_INFO"
+
+
+def process_table(product: int, process: int) -> str:
+    return f"{product_code(product)}_{process_code(process)}"
+
+
+def lotno(product: int, lot: int) -> str:
+    return f"{product_code(product)}L{lot:06d}"
+
+
+def process_tables(spec: WarehouseSpec, product: int = 0) -> list:
+    return [process_table(product, process) for process in range(spec.processes)]
+
+
+#################################################################################
+########################      Generator Section       ###########################
+#################################################################################
+
+def _data_columns(spec: WarehouseSpec) -> list:
+    """(column, view_column, SPECIAL_DATA_TYPE) of a process table"""
+    return [(f"m{index}", f"Measure {index}", "Measure") for index in range(spec.measure_columns)] + \
+           [(f"d{index}", f"Defect {index}", "Defective") for index in range(spec.defect_columns)]
+
+
+def generate_warehouse(engine, spec: WarehouseSpec, schema: str = BENCH_SCHEMA):
+    """Drop & create <schema> with config tables and the data tables of <spec>, in one transaction"""
+    rng = random.Random(spec.seed)
+    columns = _data_columns(spec)
+
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f'DROP SCHEMA IF EXISTS "{schema}" CASCADE')
+        conn.exec_driver_sql(f'CREATE SCHEMA "{schema}"')
+        conn.exec_driver_sql(f'SET LOCAL search_path TO "{schema}"')
+        # Same random rows for the same seed
+        conn.exec_driver_sql(f"SELECT SETSEED({rng.random() * 2 - 1})")
+
+        conn.exec_driver_sql("CREATE TABLE CONFIG_WAREHOUSE_TABLE (TABLE_NAME TEXT, DEPARTMENT TEXT, PRODUCT_CODE TEXT, PROCESS_CODE TEXT, IS_ACTIVE INT)")
+        conn.exec_driver_sql("CREATE TABLE CONFIG_LINK_CODE (PRODUCT_SUBGROUP TEXT, DG_PROCESS_CODE TEXT, DG_PROCESS_NAME TEXT, "
+                             "DG_DEPARTMENT TEXT, LINK_CODE_MAIN TEXT, VIEW_COLUMN TEXT, SPECIAL_DATA_TYPE TEXT)")
+        conn.exec_driver_sql("CREATE TABLE CONFIG_TABLE_FIELD (TARGET_TABLE_NAME TEXT, DEPARTMENT TEXT)")
+
+        warehouse_rows, link_rows, field_rows = [], [], []
+        for product in range(spec.products):
+            field_rows.append({"table_name": lot_table(product).lower(), "department": BENCH_DEPARTMENT})
+            for process in range(spec.processes):
+                warehouse_rows.append({"table_name": process_table(product, process), "department": BENCH_DEPARTMENT,
+                                       "product_code": product_code(product), "process_code": process_code(process)})
+                link_rows.extend({"product": product_code(product), "process": process_code(process),
+                                  "process_name": f"Process {process_code(process)}", "department": BENCH_DEPARTMENT,
+                                  "column": column, "view_column": view_column, "data_type": data_type}
+                                 for column, view_column, data_type in columns)
+
+        conn.execute(text("INSERT INTO CONFIG_WAREHOUSE_TABLE VALUES (:table_name, :department, :product_code, :process_code, 1)"), warehouse_rows)
+        conn.execute(text("INSERT INTO CONFIG_LINK_CODE VALUES (:product, :process, :process_name, :department, :column, :view_column, :data_type)"), link_rows)
+        conn.execute(text("INSERT INTO CONFIG_TABLE_FIELD VALUES (:table_name, :department)"), field_rows)
+
+        column_definitions = "".join(f", {column} {'NUMERIC' if data_type == 'Measure' else 'INT'}" for column, _, data_type in columns)
+        column_values = "".join(f", ROUND((RANDOM() * 100)::NUMERIC, 4)" if data_type == "Measure"
+                                else ", (RANDOM() < 0.1)::INT * FLOOR(RANDOM() * 5)::INT" for _, _, data_type in columns)
+
+        for product in range(spec.products):
+            conn.exec_driver_sql(f"CREATE TABLE {lot_table(product)} (LOTNO TEXT PRIMARY KEY, PRODUCT TEXT, UPDATE_DATE TIMESTAMP)")
+            conn.execute(text(f"""
+                INSERT INTO {lot_table(product)}
+                SELECT :prefix || LPAD(lot::TEXT, 6, '0'), :product, TIMESTAMP '2026-01-01' + lot * INTERVAL '1 minute'
+                FROM GENERATE_SERIES(0, :lots - 1) AS lot
+            """), {"prefix": f"{product_code(product)}L", "product": product_code(product), "lots": spec.lots})
+
+            for process in range(spec.processes):
+                table_name = process_table(product, process)
+                conn.exec_driver_sql(f"CREATE TABLE {table_name} (LOTNO TEXT NOT NULL, PRODUCT TEXT, SEQ INT NOT NULL, UPDATE_DATE TIMESTAMP"
+                                     f"{column_definitions}, PRIMARY KEY (LOTNO, SEQ))")
+                conn.execute(text(f"""
+                    INSERT INTO {table_name}
+                    SELECT :prefix || LPAD(lot::TEXT, 6, '0'), :product, seq,
+                        TIMESTAMP '2026-01-01' + (lot * :rows_per_lot + seq) * INTERVAL '1 second'{column_values}
+                    FROM GENERATE_SERIES(0, :lots - 1) AS lot, GENERATE_SERIES(1, :rows_per_lot) AS seq
+                """), {"prefix": f"{product_code(product)}L", "product": product_code(product),
+                       "lots": spec.lots, "rows_per_lot": spec.rows_per_lot})
+
+        for table_name in [lot_table(product) for product in range(spec.products)] + \
+                          [process_table(product, process) for product in range(spec.products) for process in range(spec.processes)]:
+            conn.exec_driver_sql(f"ANALYZE {table_name}")
+
+
+def drop_warehouse(engine, schema: str = BENCH_SCHEMA):
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f'DROP SCHEMA IF EXISTS "{schema}" CASCADE')
+
+
+#################################################################################
+########################    Local Database Section    ###########################
+#################################################################################
+
+def start_local_postgres(data_dir: str) -> str:
+    """Start (or reuse) a throwaway PostgreSQL in <data_dir> with pgserver, return its connection string"""
+    try:
+        import pgserver
+    except ImportError as e:
+        raise SystemExit("--local needs the optional pgserver package: pip install pgserver") from e
+
+    server = pgserver.get_server(data_dir, cleanup_mode=None)
+    return server.get_uri()
+
+
+def use_warehouse(connection_string: str | None = None, schema: str = BENCH_SCHEMA):
+    """
+        Point the application at the synthetic warehouse. Call before the first connection of models.database:
+        PG_CONNECTION_STRING (if given) and search_path of every new connection (libpq PGOPTIONS)
+    """
+    if connection_string:
+        os.environ["PG_CONNECTION_STRING"] = connection_string
+        os.environ.pop("PG_ASYNC_CONNECTION_STRING", None)
+    os.environ["PGOPTIONS"] = f"-c search_path={schema}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate the synthetic benchmark warehouse")
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--schema", default=BENCH_SCHEMA)
+    parser.add_argument("--local", metavar="DIR", help="Throwaway local PostgreSQL data directory (pgserver)")
+    parser.add_argument("--drop", action="store_true", help="Drop the schema instead of generating it")
+    args = parser.parse_args()
+
+    use_warehouse(start_local_postgres(args.local) if args.local else None, args.schema)
+    from models.database import get_pg_engine, dispose_pg_engine
+
+    try:
+        if args.drop:
+            drop_warehouse(get_pg_engine(), args.schema)
+            print(f"🗑️ Dropped schema {args.schema}")
+        else:
+            spec = SCALES[args.scale]
+            generate_warehouse(get_pg_engine(), spec, args.schema)
+            print(f"🏭 Generated {args.scale} warehouse in schema {args.schema}: {spec}")
+    finally:
+        dispose_pg_engine()
@@ -0,0 +1,1093 @@
+# get async postgres session from database module
+from models.database import get_pg_async_session, SUMMARY_CONCURRENCY
+
+# get in-memory config tables & lot location from catalog / lot index module
+from models.catalog import get_catalog_async, TableMetadata
+from models.lot_index import lot_index, LotLocation, LOT_PROBE_MODE, LOT_PROBE_CONCURRENCY
+from models.paging import cursor_registry, encode_page_token, decode_page_token, page_size_of
+from models.result_cache import result_cache
+from models.single_flight import coalesce, tool_call_key
+from models.export import copy_csv_stream, parquet_stream, start_stream, EXPORT_DATE_COLUMN, EXPORT_MEDIA_TYPES
+
+# shared query builder & row shaping
+from controllers.dwh_queries import lot_probe_qry, lot_probe_union_qry, lot_data_qry, lot_projection_qry, lot_combined_qry, sample_data_qry, page_data_qry, scan_data_qry, export_data_qry, statistics_qry, defect_total_qry, \
+    build_lot_mapping_data, build_table_error, build_combined_data, rows_to_dicts, format_output, \
+    build_statistics_data, sql_statistics, describe_rows, defect_columns, sum_defect_rows, build_defect_totals, build_defect_pareto, filter_process_data, split_process_data, \
+    map_chat_input
+
+from datetime import datetime
+import asyncio
+import logging
+from dotenv import load_dotenv
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+### Async controllers of the MCP tool routes (psycopg 3 async engine).
+### Each DB wait yields the event loop, so concurrent tool calls overlap instead of queueing.
+### Tool functions are @coalesce: identical concurrent calls (same arguments) share one in-flight execution.
+
+
+#########################################################################################################
+######################################## --- Component Function --- ########################################
+
+async def info_mapping():
+    """
+        Info Mapping Function: A component function use for retrieving all table_name and related information in Data Warehouse
+
+        Return: list of InfoMappingRow (table_name, department, product_code, process_code, process_name) from catalog
+    """
+
+    return list((await get_catalog_async()).info_rows)
+
+@coalesce("lot_mapper", key_func=lambda lotno: lotno)
+async def lot_mapper(
+    lotno: str
+):
+    """
+        Lot Mapper Function: A component function use for finding all significant information by using lotno as key
+
+        Return: mapping_data format
+    """
+
+    target_table = ""
+
+    if lotno:
+        catalog = await get_catalog_async()
+        target_product = None
+
+        # Find <lotno> in lot index first (O(1))
+        location = lot_index.lookup(lotno)
+
+        if not location:
+            # Unknown lot (fresh index or negative cache), reject without any query
+            if lot_index.is_missing(lotno):
+                lot_index.stats["reject"] += 1
+                return build_lot_mapping_data(lotno, target_table)
+
+            # Index may lag behind (not synced recently), probe every LOT_INFO table (one statement in union mode)
+            location = await lot_prober(list(catalog.lot_tables), lotno)
+            if location:
+                lot_index.add(lotno, *location)
+            else:
+                lot_index.add_missing(lotno)
+                return build_lot_mapping_data(lotno, target_table)
+
+        target_table, target_product = location
+
+        # Fill mapping_data with target_table filter
+        return build_lot_mapping_data(lotno, target_table, catalog.product_mapping(target_product))
+
+    else:
+        return build_lot_mapping_data(lotno, target_table)
+
+async def lot_prober(
+    table_list: list,
+    lotno: str,
+    probe_mode: str = LOT_PROBE_MODE,
+):
+    """
+        Lot Prober Function: A component function use for finding which table in <table_list> hold <lotno>
+        probe_mode: "union" -> all table in one UNION ALL statement,
+                    "concurrent" -> one pooled connection per table, first hit cancel the others,
+                    "sequential" -> one table at a time
+
+        Return: LotLocation (table_name, product) of first hit, None if not found
+    """
+
+    if not table_list or not lotno:
+        return None
+
+    if probe_mode == "concurrent":
+        return await _lot_prober_concurrent(table_list, lotno)
+
+    async with get_pg_async_session() as pg_session:
+        if probe_mode == "sequential":
+            # For-loop to find <lotno> in each table. If found, then return table_name. Else continue
+            for table_name in table_list:
+                probe = (await pg_session.execute(lot_probe_qry(table_name, lotno))).fetchone()
+
+                # If lotno was found, return table_name & product
+                if probe:
+                    return LotLocation(table_name, probe.product)
+            return None
+
+        probe = (await pg_session.execute(lot_probe_union_qry(table_list, lotno))).fetchone()
+
+    return LotLocation(probe.table_name, probe.product) if probe else None
+
+async def _lot_prober_concurrent(
+    table_list: list,
+    lotno: str,
+):
+    """
+        Probe each table over its own pooled connection (at most LOT_PROBE_CONCURRENCY at once).
+        First hit wins, the remaining probes are cancelled.
+    """
+    semaphore = asyncio.Semaphore(LOT_PROBE_CONCURRENCY)
+
+    async def probe_table(table_name: str):
+        async with semaphore:
+            async with get_pg_async_session() as pg_session:
+                probe = (await pg_session.execute(lot_probe_qry(table_name, lotno))).fetchone()
+        return LotLocation(table_name, probe.product) if probe else None
+
+    tasks = [asyncio.create_task(probe_table(table_name)) for table_name in table_list]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            location = await next_done
+            if location:
+                return location
+        return None
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+async def process_mapper(
+    product_code: str,
+    department: str,
+):
+    """
+        Process Mapper Function: A component function use for listing all table that include in the same product.
+        By using product_code in mapping_data
+
+        Return: process_table_lists
+    """
+
+    if product_code and department:
+        table_list = (await get_catalog_async()).process_tables(product_code, department)
+
+        return [{"table_name": table_name} for table_name in table_list]
+
+    else:
+        return []
+
+async def process_retrieving_data(
+    table_name: str,
+    lotno: str,
+    metadata: TableMetadata | None = None,
+    use_cache: bool = True,
+):
+    """
+        Process Retrieving Data Function: A component function use for execute data from each table based on
+        table_name & lotno from mapping data.
+        Remark: Exclude DEFECTIVE column
+
+        Return: Table Schema format (each table might not the same)
+    """
+
+    return await _retrieving_data(table_name=table_name, lotno=lotno, defective_flag=False, metadata=metadata,
+                                  use_cache=use_cache)
+
+async def process_retrieving_data_defective(
+    table_name: str,
+    lotno: str,
+    metadata: TableMetadata | None = None,
+    use_cache: bool = True,
+):
+    """
+        Process Retrieving Data Defective Function: A component function use for execute defective/NG/NC Reject data
+        from each table based on table_name & lotno from mapping data.
+        Remark: Only DEFECTIVE column
+
+        Return: Table Schema format (each table might not the same)
+    """
+
+    return await _retrieving_data(table_name=table_name, lotno=lotno, defective_flag=True, metadata=metadata,
+                                  use_cache=use_cache)
+
+async def _retrieving_data(
+    table_name: str,
+    lotno: str,
+    defective_flag: bool,
+    metadata: TableMetadata | None = None,
+    use_cache: bool = True,
+):
+    """
+        Shared body of process_retrieving_data & process_retrieving_data_defective.
+        defective_flag: True -> keep only DEFECTIVE column, False -> exclude DEFECTIVE column
+        metadata: prefetched by metadata_prefetch for the whole table_list, resolved from current catalog if not given
+        use_cache: False -> skip result cache lookup (result is still stored for next call)
+    """
+
+    if table_name and lotno:
+        # Mapping, exclude column & rename list of target table
+        if metadata is None:
+            metadata = (await get_catalog_async()).table_metadata(table_name, defective_flag)
+
+        # Check if mapping data was found
+        if not metadata:
+            return []
+
+        # Same table & lot of the same catalog version within TTL -> skip the warehouse
+        cache_key = (table_name, lotno, "defective" if defective_flag else "process", metadata.catalog_version)
+        output_data = result_cache.get(cache_key, bypass=not use_cache)
+        if output_data is None:
+            output_data = await _read_data(table_name, lotno, metadata)
+            result_cache.put(cache_key, output_data)
+
+        return output_data
+    else:
+        return []
+
+async def process_statistics_data(
+    table_name: str,
+    lotno: str,
+    metadata: TableMetadata | None = None,
+    use_cache: bool = True,
+):
+    """
+        Process Statistics Data Function: A component function use for per-column statistics of each table
+        (count, nulls, min/max/mean/std, percentiles, top values) instead of raw rows.
+        Remark: Exclude DEFECTIVE column
+
+        Return: {"table_name", "rows", "columns"}
+    """
+
+    return await _statistics_data(table_name=table_name, lotno=lotno, defective_flag=False, metadata=metadata,
+                                  use_cache=use_cache)
+
+async def process_statistics_data_defective(
+    table_name: str,
+    lotno: str,
+    metadata: TableMetadata | None = None,
+    use_cache: bool = True,
+):
+    """
+        Process Statistics Data Defective Function: A component function use for per-column statistics of
+        defective/NG/NC Reject data of each table instead of raw rows.
+        Remark: Only DEFECTIVE column
+
+        Return: {"table_name", "rows", "columns"}
+    """
+
+    return await _statistics_data(table_name=table_name, lotno=lotno, defective_flag=True, metadata=metadata,
+                                  use_cache=use_cache)
+
+async def _statistics_data(
+    table_name: str,
+    lotno: str,
+    defective_flag: bool,
+    metadata: TableMetadata | None = None,
+    use_cache: bool = True,
+):
+    """
+        Shared body of process_statistics_data & process_statistics_data_defective.
+        Aggregated in SQL when the catalog know the table columns, else computed with pandas on the lot rows
+    """
+
+    if table_name and lotno:
+        # Mapping, exclude column & rename list of target table
+        if metadata is None:
+            metadata = (await get_catalog_async()).table_metadata(table_name, defective_flag)
+
+        # Check if mapping data was found
+        if not metadata:
+            return build_statistics_data(table_name)
+
+        cache_key = (table_name, lotno, "statistics_defective" if defective_flag else "statistics", metadata.catalog_version)
+        output_data = result_cache.get(cache_key, bypass=not use_cache)
+        if output_data is None:
+            if metadata.projection is not None:
+                async with get_pg_async_session() as pg_session:
+                    row = (await pg_session.execute(statistics_qry(table_name, metadata.projection, metadata.column_kinds, lotno))).mappings().one()
+                output_data = sql_statistics(table_name, row, metadata.projection, metadata.column_kinds)
+            else:
+                rows = await _retrieving_data(table_name, lotno, defective_flag, metadata, use_cache)
+                output_data = describe_rows(table_name, rows)
+            result_cache.put(cache_key, output_data)
+
+        return output_data
+    else:
+        return build_statistics_data(table_name)
+
+async def process_defect_totals(
+    table_name: str,
+    lotno: str,
+    metadata: TableMetadata | None = None,
+    use_cache: bool = True,
+):
+    """
+        Process Defect Totals Function: A component function use for summing each defective/NG/NC Reject column
+        of the lot in one table, summed in SQL when the catalog know the table columns.
+
+        Return: {"table_name", "process_code", "totals": {view_column: total}}
+    """
+
+    if table_name and lotno:
+        # Mapping & view column of defective side
+        if metadata is None:
+            metadata = (await get_catalog_async()).table_metadata(table_name, defective_flag=True)
+
+        # Check if mapping data was found
+        if not metadata:
+            return build_defect_totals(table_name)
+
+        cache_key = (table_name, lotno, "defect_totals", metadata.catalog_version)
+        output_data = result_cache.get(cache_key, bypass=not use_cache)
+        if output_data is None:
+            totals = {}
+            if metadata.projection is not None:
+                columns = defect_columns(metadata)
+                if columns:
+                    async with get_pg_async_session() as pg_session:
+                        totals = dict((await pg_session.execute(defect_total_qry(table_name, columns, lotno))).mappings().one())
+            else:
+                rows = await _retrieving_data(table_name, lotno, True, metadata, use_cache)
+                totals = sum_defect_rows(rows, metadata.rename_list.values())
+
+            output_data = build_defect_totals(table_name, totals, metadata.process_code)
+            result_cache.put(cache_key, output_data)
+
+        return output_data
+    else:
+        return build_defect_totals(table_name)
+
+async def _read_data(
+    table_name: str,
+    lotno: str,
+    metadata: TableMetadata,
+) -> list:
+    """
+        Read data of <lotno> from <table_name> and keep only the columns of <metadata> side
+    """
+
+    # Kept columns only, already renamed to view_column in SQL
+    if metadata.projection is not None:
+        async with get_pg_async_session() as pg_session:
+            process_data = (await pg_session.execute(lot_projection_qry(table_name, metadata.projection, lotno))).fetchall()
+
+        return rows_to_dicts(process_data)
+
+    # Table columns unknown, query all column (SELECT *)
+    async with get_pg_async_session() as pg_session:
+        process_data = (await pg_session.execute(lot_data_qry(table_name, lotno))).fetchall()
+
+    # Filter column, remove column from "process_data" that exist in "exclude_column" list (opposite side of defective_flag)
+    # Then rename column by using "rename_list"
+    if metadata.exclude_column:
+        return filter_process_data(process_data, metadata.exclude_column, metadata.rename_list)
+    else:
+        return rows_to_dicts(process_data)
+
+
+async def process_retrieving_data_combined(
+    table_name: str,
+    lotno: str,
+    metadata: tuple | None = None,
+    use_cache: bool = True,
+):
+    """
+        Process Retrieving Data Combined Function: A component function use for execute data of each table once
+        and split the columns into "process" (exclude DEFECTIVE column) & "defective" (only DEFECTIVE column) section.
+        metadata: (process TableMetadata, defective TableMetadata) prefetched by metadata_prefetch_combined
+        use_cache: False -> skip result cache lookup (result is still stored for next call)
+
+        Return: {"table_name", "process", "defective"}
+    """
+
+    if table_name and lotno:
+        # Mapping, exclude column & rename list of both side
+        if metadata is None:
+            metadata = (await get_catalog_async()).prefetch_combined_metadata([table_name])[table_name]
+
+        # Check if mapping data was found
+        if not metadata:
+            return build_combined_data(table_name)
+
+        process_metadata, defective_metadata = metadata
+
+        # Same table & lot of the same catalog version within TTL -> skip the warehouse
+        cache_key = (table_name, lotno, "combined", process_metadata.catalog_version)
+        output_data = result_cache.get(cache_key, bypass=not use_cache)
+        if output_data is not None:
+            return output_data
+
+        # Columns of both side in one read, else all column (SELECT *) when table columns unknown
+        if process_metadata.projection is not None and defective_metadata.projection is not None:
+            data_qry = lot_combined_qry(table_name, process_metadata, defective_metadata, lotno)
+        else:
+            data_qry = lot_data_qry(table_name, lotno)
+
+        async with get_pg_async_session() as pg_session:
+            process_data = (await pg_session.execute(data_qry)).fetchall()
+
+        output_data = build_combined_data(table_name, *split_process_data(process_data, process_metadata, defective_metadata))
+        result_cache.put(cache_key, output_data)
+
+        return output_data
+    else:
+        return build_combined_data(table_name)
+
+
+async def metadata_prefetch(
+    table_list: list,
+    defective_flag: bool,
+):
+    """
+        Metadata Prefetch Function: A component function use for resolving mapping, exclude column and view column
+        of every table in <table_list> at once, from one catalog snapshot (same version for the whole summary)
+
+        Return: metadata bundle {table_name: TableMetadata | None}
+    """
+
+    if table_list:
+        return (await get_catalog_async()).prefetch_metadata(table_list, defective_flag)
+    else:
+        return {}
+
+async def metadata_prefetch_combined(
+    table_list: list,
+):
+    """
+        Metadata Prefetch Combined Function: Same as metadata_prefetch for both process & defective side at once
+
+        Return: metadata bundle {table_name: (process TableMetadata, defective TableMetadata) | None}
+    """
+
+    if table_list:
+        return (await get_catalog_async()).prefetch_combined_metadata(table_list)
+    else:
+        return {}
+
+async def summary_fan_out(
+    table_list: list,
+    lotno: str,
+    retrieving_func,
+    metadata: dict | None = None,
+    use_cache: bool = True,
+    concurrency: int = SUMMARY_CONCURRENCY,
+):
+    """
+        Summary Fan-out Function: A component function use for running <retrieving_func> of each table concurrently,
+        at most <concurrency> tables (pooled connections) at once.
+
+        Return: list of each table output in the same order as <table_list>,
+                failed table is reported as {"table_name", "error"} instead of failing the whole summary
+        metadata: bundle from metadata_prefetch, each table retrieval use only its own entry
+        use_cache: False -> bypass result cache lookup (arguments "no_cache" of the summary tools)
+    """
+
+    metadata = metadata or {}
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def retrieve_table(table_name: str):
+        async with semaphore:
+            try:
+                return await retrieving_func(table_name=table_name, lotno=lotno, metadata=metadata.get(table_name),
+                                             use_cache=use_cache)
+            except Exception as e:
+                logger.error(f"Error retrieving lot {lotno} from {table_name}: {e}")
+                return build_table_error(table_name, e)
+
+    # gather keep input order, each task already catch its own error
+    return list(await asyncio.gather(*(retrieve_table(table_name) for table_name in table_list)))
+
+async def summary_fan_out_stream(
+    table_list: list,
+    lotno: str,
+    retrieving_func,
+    metadata: dict | None = None,
+    use_cache: bool = True,
+    concurrency: int = SUMMARY_CONCURRENCY,
+):
+    """
+        Summary Fan-out Stream Function: Same as summary_fan_out, but yield each table output as soon as it is ready.
+        At most <concurrency> tables are read at once and at most <concurrency> outputs wait for the consumer,
+        so a slow client slows down the reads instead of growing memory.
+
+        Yield: (index in table_list, table_name, output) in completion order
+    """
+
+    metadata = metadata or {}
+    if not table_list:
+        return
+
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, concurrency))
+    tables = iter(enumerate(table_list))
+
+    async def worker():
+        # Workers share one iterator, each table is read exactly once
+        for index, table_name in tables:
+            try:
+                output = await retrieving_func(table_name=table_name, lotno=lotno, metadata=metadata.get(table_name),
+                                               use_cache=use_cache)
+            except Exception as e:
+                logger.error(f"Error retrieving lot {lotno} from {table_name}: {e}")
+                output = build_table_error(table_name, e)
+            await queue.put((index, table_name, output))
+
+    workers = [asyncio.create_task(worker()) for _ in range(max(1, min(concurrency, len(table_list))))]
+    try:
+        for _ in range(len(table_list)):
+            yield await queue.get()
+    finally:
+        # Client gone or stream finished, stop remaining reads
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+
+async def execute_sql_page(
+    mapping_data: dict,
+    page_size: int | None = None,
+    continuation_token: str | None = None,
+):
+    """
+        Execute SQL Page Function: A component function use for reading <table_name> page by page, filter by lotno if given.
+        Table with key (primary / unique) -> keyset paging on the key, stateless.
+        Table without key -> server-side cursor kept open between pages (closed after PAGING_CURSOR_TTL idle seconds),
+        the token carry the page number: a retried page is replayed, an older one rejected.
+
+        Return: {"success", "content", "continuation_token"} (continuation_token None on last page)
+    """
+
+    page_size = page_size_of(page_size)
+
+    try:
+        state = decode_page_token(continuation_token) if continuation_token else {}
+
+        # Next page of server-side cursor
+        if "cursor" in state:
+            next_seq, rows = await cursor_registry.fetch(state["cursor"], int(state.get("seq", -1)), page_size)
+            return {
+                "success": True,
+                "content": rows_to_dicts(rows),
+                "continuation_token": encode_page_token({"cursor": state["cursor"], "seq": next_seq}) if next_seq is not None else None,
+            }
+
+        catalog = await get_catalog_async()
+        table_name = catalog.resolve_table(state.get("table") or mapping_data["table_name"])
+        if table_name is None:
+            raise ValueError(f"Unknown table: {state.get('table') or mapping_data['table_name']}")
+
+        lotno = state.get("lotno") if state else mapping_data.get("lotno")
+        lotno = lotno if lotno and lotno != "-" else None
+        after = state.get("after")
+
+        key_columns = catalog.table_key(table_name)
+        if after and len(after) != len(key_columns):
+            raise ValueError("Invalid continuation_token: table key changed, start again without continuation_token")
+
+    except ValueError as e:
+        return {
+            "success": False,
+            "content": [],
+            "error": str(e),
+        }
+
+    if key_columns:
+        # One more row than page_size tells if there is a next page
+        async with get_pg_async_session() as pg_session:
+            rows = (await pg_session.execute(page_data_qry(table_name, key_columns, lotno, after, page_size + 1))).fetchall()
+
+        next_token = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            last_row = rows[-1]._mapping
+            next_token = encode_page_token({"table": table_name, "lotno": lotno, "after": [last_row[column] for column in key_columns]})
+    else:
+        cursor_id, next_seq, rows = await cursor_registry.open(scan_data_qry(table_name, lotno), page_size)
+        next_token = encode_page_token({"cursor": cursor_id, "seq": next_seq}) if cursor_id else None
+
+    return {
+        "success": True,
+        "content": rows_to_dicts(rows),
+        "continuation_token": next_token,
+    }
+
+
+async def column_view_mapper(
+    mapping_data: dict,
+    defective_flag: bool,
+):
+    """
+        Column View Mapper Function: A component function use for mapping actual column_name with view_column for user.
+        Return: mapping dict of link_code_main and view_column
+    """
+
+    if mapping_data:
+        # Create dict in format "{link_code_main: view_column}"
+        view_column_dict = (await get_catalog_async()).view_columns(mapping_data, defective_flag)
+
+        return view_column_dict
+    else:
+        return []
+
+
+################################################ Helper Function #########################################################
+### Mostly, Helper Function use for Helper Agent that map & prepare actual data before sent to Main Agent
+
+# [HELPER] - Mapping Info Function
+async def helper_mapping_info_func(
+    chatInput: str | None = None,
+)-> dict:
+    """
+        Input: A description containing [Lot No., Process Name, Process Code, Product Code, Table Name, Department].
+        Example: 'Get data about 2354ABC of Racking Process'
+
+        Output: Actual Parameter Name within JSON object / Dict
+    """
+    if chatInput:
+        print("Calling tool: [Helper] Mapping Information Tool")
+
+        # Init Info Mapping (precompiled matcher of current catalog version)
+        catalog = await get_catalog_async()
+
+        # Map the Parameter Code & Lot Number from user's input
+        mapping_dict = map_chat_input(chatInput, catalog.info_matcher)
+
+        return {
+            "success": True,
+            "content": f"Mapping found: '{chatInput}',  Mapping Param: {mapping_dict}",
+        }
+    else:
+        return {
+            "success": False,
+            "content": "No Mapping Prompt Provided, Please tell user to try again.",
+        }
+
+# [HELPER] - Process Mapper Function
+@coalesce("helper_process_mapper")
+async def helper_process_mapper_func(
+    chatInput: str | None = None,
+    arguments: dict | None = None,
+)->dict:
+    """
+        Tool for finding list of table (process) that match with the target LOTNO
+
+        Input: Relation with the LOTNO
+        Remark: Run this tool if user's want to get data with condition to filter with LOTNO
+        Example: 'Find process list that relate with lotno 25XPB0062' (find list of tables before goes summary data)
+        Output: process_table_lists
+    """
+    if chatInput:
+        print("Calling tool: [Helper] Process Mapper Tool")
+
+        # Check if arguments and mapping_data exist
+        if  not arguments or "mapping_data" not in arguments or \
+            not arguments["mapping_data"] or \
+            'lotno' not in arguments["mapping_data"]:
+            return {
+                "success": False,
+                "content": [],
+            }
+
+        mapping_data = await lot_mapper(arguments["mapping_data"]["lotno"])
+
+        # Check if mapping_data is valid dict
+        if not mapping_data or not isinstance(mapping_data, dict):
+            return {
+                "success": False,
+                "content": [],
+            }
+
+        # Get Table Name within the product target
+        table_list = await process_mapper(product_code=mapping_data["product_code"], department=mapping_data["department"])
+
+        if table_list:
+            return {
+                "success": True,
+                "content": table_list,
+            }
+        else:
+            return {
+                "success": False,
+                "content": [],
+            }
+    else:
+        return {
+            "success": False,
+            "content": [],
+        }
+
+
+################################################ Main Function #########################################################
+### Mostly, Main Function use for Main Agent that will execute, summary, analyze data in DWH with information from Helper Agent
+
+# [MAIN] - Execute SQL Query Function
+def execute_sql_call_key(chatInput: str | None = None, arguments: dict | None = None) -> tuple | None:
+    """Coalesce key of main_execute_sql, None for paging calls: each caller owns its cursor position / page sequence"""
+    if arguments and ("page_size" in arguments or arguments.get("continuation_token")):
+        return None
+    return tool_call_key(chatInput, arguments)
+
+@coalesce("main_execute_sql", key_func=execute_sql_call_key)
+async def main_execute_sql_func(
+    chatInput: str | None = None,
+    arguments: dict | None = None,
+)-> dict:
+    """
+        Tool for executing sql query base-on sql_statement, user's input and mapping information from DWH database
+
+        Input: User request to get data with mapping parameter.
+        Example: 'Get data from pac_1000'
+
+        Output: Example data of target table within JSON object / Dict
+        Paging: arguments "page_size" (and "continuation_token" of previous page) -> read the table page by page
+        Format: arguments "format": "columnar" -> {"columns", "rows"} per table ("dictionary_encode": true for repeated strings)
+    """
+
+    if chatInput:
+        print("Calling tool: [MAIN] Executing SQL Query Tool")
+
+        # Check if arguments and mapping_data exist
+        if not arguments or "mapping_data" not in arguments or not arguments["mapping_data"] or 'table_name' not in arguments["mapping_data"]:
+            return {
+                "success": False,
+                "content": [],
+            }
+
+        # Table name is put into SQL as identifier, accept only table known by the catalog
+        table_name = (await get_catalog_async()).resolve_table(arguments["mapping_data"]["table_name"])
+        if table_name is None:
+            return {
+                "success": False,
+                "content": [],
+                "error": f"Unknown table: {arguments['mapping_data']['table_name']}",
+            }
+
+        mapping_data = {**arguments["mapping_data"], "table_name": table_name}
+
+        # Paging mode, when client ask for "page_size" or send "continuation_token" of previous page
+        if "page_size" in arguments or arguments.get("continuation_token"):
+            page = await execute_sql_page(mapping_data=mapping_data,
+                                          page_size=arguments.get("page_size"),
+                                          continuation_token=arguments.get("continuation_token"))
+            if page["success"]:
+                page["content"] = format_output(page["content"], arguments.get("format"), arguments.get("dictionary_encode", False))
+            return page
+
+        async with get_pg_async_session() as pg_session:
+            sql_output = (await pg_session.execute(sample_data_qry(mapping_data))).fetchall()
+
+        return {
+            "success": True,
+            "content": format_output(rows_to_dicts(sql_output), arguments.get("format"), arguments.get("dictionary_encode", False)),
+        }
+    else:
+        return {
+            "success": False,
+            "content": [],
+        }
+
+
+# [MAIN] - Summary Lot Data Function
+@coalesce("main_summary_each_process_data")
+async def main_summary_each_process_data_func(
+    chatInput: str | None = None,
+    arguments: dict | None = None,
+)->dict:
+    """
+        Tool for summary lot data base-on sql_statement, user's input and mapping information from DWH database
+
+        Input: User request to summry lot data with mapping parameter.
+        Remark: User's input contain "summary" and have only "lotno" in the request
+        Example: 'Summary data of 25XPB0062'
+        Output: Example data of target table within JSON object / Dict
+        Format: arguments "format": "columnar" -> {"columns", "rows"} per table ("dictionary_encode": true for repeated strings)
+        Mode: arguments "mode": "statistics" -> per-column statistics of each table instead of raw rows
+    """
+    if chatInput:
+        print("Calling tool: [MAIN] Summary Lot Data Tool")
+
+        # Check if arguments and mapping_data exist
+        if  not arguments or "mapping_data" not in arguments or \
+            not arguments["mapping_data"] or \
+            'lotno' not in arguments["mapping_data"] or "table_list" not in arguments:
+            return {
+                "success": False,
+                "content": [],
+            }
+
+        table_list = arguments["table_list"]
+
+        # Prefetch metadata of all table at once, then each table retrieval use only this bundle
+        metadata = await metadata_prefetch(table_list=table_list, defective_flag=False)
+
+        # Statistics mode: per-column aggregates of each table instead of raw rows
+        retrieving_func = process_statistics_data if arguments.get("mode") == "statistics" else process_retrieving_data
+
+        # Fan-out each process data filter by lotno, result in the same order as table_list
+        joined_data = await summary_fan_out(table_list=table_list,
+                                            lotno=arguments["mapping_data"]["lotno"],
+                                            retrieving_func=retrieving_func,
+                                            metadata=metadata,
+                                            use_cache=not arguments.get("no_cache", False))
+
+        return {
+            "success": True,
+            "content": [format_output(output, arguments.get("format"), arguments.get("dictionary_encode", False))
+                        for output in joined_data],
+        }
+    else:
+        return {
+            "success": False,
+            "content": [],
+        }
+
+# [MAIN] - Summary Lot Data Defective Function
+@coalesce("main_summary_each_process_data_def")
+async def main_summary_each_process_data_def_func(
+    chatInput: str | None = None,
+    arguments: dict | None = None,
+)->dict:
+    """
+        Tool for summary lot data base-on sql_statement, user's input and mapping information from DWH database
+
+        Input: User request to summry lot data with mapping parameter.
+        Remark: User's input contain "summary" and have only "lotno" in the request (Defective)
+        Example: 'Summary data of 25XPB0062'
+        Output: Example data of target table within JSON object / Dict
+        Format: arguments "format": "columnar" -> {"columns", "rows"} per table ("dictionary_encode": true for repeated strings)
+        Mode: arguments "mode": "statistics" -> per-column statistics of each table instead of raw rows
+    """
+    if chatInput:
+        print("Calling tool: [MAIN] Summary Lot Data Defective Tool")
+
+        # Check if arguments and mapping_data exist
+        if  not arguments or "mapping_data" not in arguments or \
+            not arguments["mapping_data"] or \
+            'lotno' not in arguments["mapping_data"] or "table_list" not in arguments:
+            return {
+                "success": False,
+                "content": [],
+            }
+
+        table_list = arguments["table_list"]
+
+        # Prefetch metadata of all table at once, then each table retrieval use only this bundle
+        metadata = await metadata_prefetch(table_list=table_list, defective_flag=True)
+
+        # Statistics mode: per-column aggregates of each table instead of raw rows
+        retrieving_func = process_statistics_data_defective if arguments.get("mode") == "statistics" else process_retrieving_data_defective
+
+        # Fan-out each process data filter by lotno, result in the same order as table_list
+        joined_data = await summary_fan_out(table_list=table_list,
+                                            lotno=arguments["mapping_data"]["lotno"],
+                                            retrieving_func=retrieving_func,
+                                            metadata=metadata,
+                                            use_cache=not arguments.get("no_cache", False))
+
+        return {
+            "success": True,
+            "content": [format_output(output, arguments.get("format"), arguments.get("dictionary_encode", False))
+                        for output in joined_data],
+        }
+    else:
+        return {
+            "success": False,
+            "content": [],
+        }
+
+# [MAIN] - Summary Lot Data Combined Function
+@coalesce("main_summary_each_process_data_combined")
+async def main_summary_each_process_data_combined_func(
+    chatInput: str | None = None,
+    arguments: dict | None = None,
+)->dict:
+    """
+        Tool for summary lot data (process & defective) base-on user's input and mapping information from DWH database
+
+        Input: User request to summry full lot report with mapping parameter.
+        Remark: User's input ask for both process & defective data and have only "lotno" in the request
+        Example: 'Full report of 25XPB0062'
+        Output: Data of each table split into "process" & "defective" section within JSON object / Dict
+        Format: arguments "format": "columnar" -> {"columns", "rows"} per table ("dictionary_encode": true for repeated strings)
+    """
+    if chatInput:
+        print("Calling tool: [MAIN] Summary Lot Data Combined Tool")
+
+        # Check if arguments and mapping_data exist
+        if  not arguments or "mapping_data" not in arguments or \
+            not arguments["mapping_data"] or \
+            'lotno' not in arguments["mapping_data"] or "table_list" not in arguments:
+            return {
+                "success": False,
+                "content": [],
+            }
+
+        table_list = arguments["table_list"]
+
+        # Prefetch metadata of both side for all table at once
+        metadata = await metadata_prefetch_combined(table_list=table_list)
+
+        # Fan-out each process data filter by lotno (one read per table), result in the same order as table_list
+        joined_data = await summary_fan_out(table_list=table_list,
+                                            lotno=arguments["mapping_data"]["lotno"],
+                                            retrieving_func=process_retrieving_data_combined,
+                                            metadata=metadata,
+                                            use_cache=not arguments.get("no_cache", False))
+
+        return {
+            "success": True,
+            "content": [format_output(output, arguments.get("format"), arguments.get("dictionary_encode", False))
+                        for output in joined_data],
+        }
+    else:
+        return {
+            "success": False,
+            "content": [],
+        }
+
+# [MAIN] - Defect Pareto Function
+@coalesce("main_defect_pareto")
+async def main_defect_pareto_func(
+    chatInput: str | None = None,
+    arguments: dict | None = None,
+)->dict:
+    """
+        Tool for defect analysis of a lot: every defective column of all process tables summed in one pass,
+        ranked as Pareto (quantity, percent, cumulative percent) per process and overall by VIEW_COLUMN name
+
+        Input: User request to find main defect / NG / reject of lot with mapping parameter.
+        Example: 'Which defects dominate lot 25XPB0062'
+        Output: {"lotno", "total_defects", "overall", "processes", "errors"} within JSON object / Dict
+    """
+    if chatInput:
+        print("Calling tool: [MAIN] Defect Pareto Tool")
+
+        # Check if arguments and mapping_data exist
+        if  not arguments or "mapping_data" not in arguments or \
+            not arguments["mapping_data"] or \
+            'lotno' not in arguments["mapping_data"] or "table_list" not in arguments:
+            return {
+                "success": False,
+                "content": [],
+            }
+
+        table_list = arguments["table_list"]
+
+        # Prefetch metadata (defective side) of all table at once
+        metadata = await metadata_prefetch(table_list=table_list, defective_flag=True)
+
+        # Fan-out defect totals of each table, then rank all of them together
+        joined_data = await summary_fan_out(table_list=table_list,
+                                            lotno=arguments["mapping_data"]["lotno"],
+                                            retrieving_func=process_defect_totals,
+                                            metadata=metadata,
+                                            use_cache=not arguments.get("no_cache", False))
+
+        return {
+            "success": True,
+            "content": build_defect_pareto(arguments["mapping_data"]["lotno"], joined_data),
+        }
+    else:
+        return {
+            "success": False,
+            "content": [],
+        }
+
+# [MAIN] - Summary Lot Data Stream Function
+async def main_summary_stream_func(
+    chatInput: str | None = None,
+    arguments: dict | None = None,
+    section: str = "process",
+):
+    """
+        Streaming version of the summary tools, each table is sent as soon as it is ready.
+        section: "process" (exclude DEFECTIVE column) | "defective" (only DEFECTIVE column) | "combined" (both)
+
+        Yield: {"index", "table_name", "content"} for each table, then {"done", "success", "tables", "errors"}
+    """
+    # Check if arguments and mapping_data exist
+    if  not chatInput or not arguments or "mapping_data" not in arguments or \
+        not arguments["mapping_data"] or \
+        'lotno' not in arguments["mapping_data"] or "table_list" not in arguments:
+        yield {"done": True, "success": False, "tables": 0, "errors": 0}
+        return
+
+    print(f"Calling tool: [MAIN] Summary Lot Data Stream Tool ({section})")
+
+    table_list = arguments["table_list"]
+
+    # Prefetch metadata of all table at once, then each table retrieval use only this bundle
+    if section == "combined":
+        retrieving_func = process_retrieving_data_combined
+        metadata = await metadata_prefetch_combined(table_list=table_list)
+    else:
+        defective_flag = section == "defective"
+        if arguments.get("mode") == "statistics":
+            retrieving_func = process_statistics_data_defective if defective_flag else process_statistics_data
+        else:
+            retrieving_func = process_retrieving_data_defective if defective_flag else process_retrieving_data
+        metadata = await metadata_prefetch(table_list=table_list, defective_flag=defective_flag)
+
+    errors = 0
+    async for index, table_name, output in summary_fan_out_stream(table_list=table_list,
+                                                                  lotno=arguments["mapping_data"]["lotno"],
+                                                                  retrieving_func=retrieving_func,
+                                                                  metadata=metadata,
+                                                                  use_cache=not arguments.get("no_cache", False)):
+        if isinstance(output, dict) and "error" in output:
+            errors += 1
+        yield {"index": index, "table_name": table_name,
+               "content": format_output(output, arguments.get("format"), arguments.get("dictionary_encode", False))}
+
+    yield {"done": True, "success": True, "tables": len(table_list), "errors": errors}
+
+
+# [MAIN] - Export Data Function
+async def main_export_data_func(
+    chatInput: str | None = None,
+    arguments: dict | None = None,
+) -> dict:
+    """
+        Bulk export of one table for analysts, filter by lotno and / or date range, streamed as CSV (COPY) or Parquet
+
+        Input: arguments {"mapping_data": {"table_name", "lotno"}, "format": "csv" | "parquet",
+                          "date_from", "date_to" (ISO date / datetime), "date_column" (default EXPORT_DATE_COLUMN)}
+        Output: {"success", "content": async iterator of file chunks, "media_type", "filename"}
+    """
+    if not chatInput or not arguments or not arguments.get("mapping_data") or "table_name" not in arguments["mapping_data"]:
+        return {
+            "success": False,
+            "content": [],
+        }
+
+    print("Calling tool: [MAIN] Export Data Tool")
+
+    mapping_data = arguments["mapping_data"]
+    export_format = arguments.get("format") or "csv"
+    lotno = mapping_data.get("lotno") if mapping_data.get("lotno") != "-" else None
+
+    try:
+        if export_format not in EXPORT_MEDIA_TYPES:
+            raise ValueError(f"Unknown export format: {export_format}, use one of {list(EXPORT_MEDIA_TYPES)}")
+
+        # Table & column name are put into SQL as identifier, accept only names known by the catalog
+        catalog = await get_catalog_async()
+        table_name = catalog.resolve_table(mapping_data["table_name"])
+        if table_name is None:
+            raise ValueError(f"Unknown table: {mapping_data['table_name']}")
+
+        date_from = datetime.fromisoformat(arguments["date_from"]) if arguments.get("date_from") else None
+        date_to = datetime.fromisoformat(arguments["date_to"]) if arguments.get("date_to") else None
+        date_column = None
+        if date_from or date_to:
+            date_column = catalog.resolve_column(table_name, arguments.get("date_column") or EXPORT_DATE_COLUMN)
+            if date_column is None:
+                raise ValueError(f"Unknown column: {arguments.get('date_column') or EXPORT_DATE_COLUMN}")
+
+        if not lotno and not date_column:
+            raise ValueError("Export needs lotno or date_from / date_to")
+
+    except ValueError as e:
+        return {
+            "success": False,
+            "content": [],
+            "error": str(e),
+        }
+
+    export_qry = export_data_qry(table_name, lotno, date_column, date_from, date_to)
+    stream = copy_csv_stream(export_qry) if export_format == "csv" else parquet_stream(export_qry)
+
+    return {
+        "success": True,
+        # First chunk read here: query error is returned before the response starts
+        "content": await start_stream(stream),
+        "media_type": EXPORT_MEDIA_TYPES[export_format],
+        "filename": f"{table_name}_{lotno or 'range'}.{export_format}",
+    }
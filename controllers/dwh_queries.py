@@ -0,0 +1,517 @@
+from sqlalchemy import text
+from sqlalchemy.sql.elements import TextClause
+from functools import lru_cache
+from datetime import date
+import pandas as pd
+
+# identifier quoting shared with catalog / lot index
+from models.catalog import quote_identifier, quote_name
+
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+
+#########################################################################################################
+######################################## --- Query Builder --- ##########################################
+### Statements of the component functions in dwh_async_controller, kept apart from the DB calls.
+### Config tables (CONFIG_WAREHOUSE_TABLE, CONFIG_LINK_CODE, CONFIG_TABLE_FIELD) are served by models/catalog.py
+### Values are always bound parameters, identifiers are always quoted: the same statement text is reused for every lot,
+### so psycopg can prepare it once per connection (PG_PREPARE_THRESHOLD).
+### Table name from user's input must be resolved by the catalog (catalog.resolve_table) before it reaches a builder.
+
+def table_sql(table_name: str) -> str:
+    """
+        Quoted table name for a text() statement (":" inside identifier is not a bind parameter)
+    """
+    return quote_name(table_name).replace(":", "\\:")
+
+def column_sql(column_name: str) -> str:
+    """
+        Quoted exact column name / alias for a text() statement
+    """
+    return quote_identifier(column_name).replace(":", "\\:")
+
+
+def lot_probe_qry(table_name: str, lotno: str) -> TextClause:
+    """
+        Query for checking <lotno> exist in <table_name>. Select only lotno & product of the lot
+    """
+    return text(f"SELECT LOTNO, PRODUCT FROM {table_sql(table_name)} WHERE LOTNO = :lotno LIMIT 1").bindparams(lotno=lotno)
+
+def lot_probe_union_qry(table_names: list, lotno: str) -> TextClause:
+    """
+        Query for checking <lotno> in all <table_names> in one round-trip.
+        UNION ALL branches run in table order and LIMIT 1 stops at the first hit
+    """
+    branches = [f"(SELECT CAST(:table_name_{index} AS TEXT) AS TABLE_NAME, PRODUCT FROM {table_sql(table_name)} WHERE LOTNO = :lotno LIMIT 1)"
+                for index, table_name in enumerate(table_names)]
+
+    return text("SELECT * FROM (\n" + "\nUNION ALL\n".join(branches) + "\n) AS probe LIMIT 1").bindparams(
+        lotno=lotno, **{f"table_name_{index}": table_name for index, table_name in enumerate(table_names)})
+
+def lot_data_qry(table_name: str, lotno: str) -> TextClause:
+    """
+        Query for all data of <lotno> in <table_name>
+    """
+    return text(f"""
+                SELECT *
+                FROM {table_sql(table_name)}
+                WHERE LOTNO = :lotno
+            """).bindparams(lotno=lotno)
+
+def lot_projection_qry(table_name: str, projection: tuple, lotno: str) -> TextClause:
+    """
+        Query for data of <lotno> in <table_name>, only kept columns and already renamed to view_column
+        projection: ((column_name, view_column), ...) from catalog TableMetadata
+    """
+    return _projection_select(table_name, projection).bindparams(lotno=lotno)
+
+@lru_cache(maxsize=1024)
+def _projection_select(table_name: str, projection: tuple) -> TextClause:
+    """
+        Built SELECT of (table, projection), reused until the catalog gives another projection (new version)
+    """
+    select_list = ",\n    ".join(f"{column_sql(column)} AS {column_sql(view_column)}" for column, view_column in projection)
+
+    return text(f"SELECT\n    {select_list}\nFROM {table_sql(table_name)}\nWHERE LOTNO = :lotno")
+
+def lot_combined_qry(table_name: str, process_metadata, defective_metadata, lotno: str) -> TextClause:
+    """
+        Query for data of <lotno> in <table_name> with the columns of both process & defective side, read once.
+        Columns keep their actual name, split_process_data rename them per side
+    """
+    columns = dict.fromkeys(column for metadata in (process_metadata, defective_metadata)
+                            for column, _ in metadata.projection)
+
+    return lot_projection_qry(table_name, tuple((column, column) for column in columns), lotno)
+
+def sample_data_qry(mapping_data: dict) -> TextClause:
+    """
+        Query for example data (5 rows) of <table_name>, filter by <lotno> if user's input contain 'lotno' parameter
+    """
+    # CONDITION: if user's input contain 'lotno' parameter
+    if( 'lotno' in mapping_data) and (mapping_data['lotno'] != '-'):
+        return text(f"SELECT * FROM {table_sql(mapping_data['table_name'])} WHERE lotno = :lotno LIMIT 5").bindparams(lotno=mapping_data['lotno'])
+    else:
+        return text(f"SELECT * FROM {table_sql(mapping_data['table_name'])} LIMIT 5")
+
+
+def page_data_qry(table_name: str, key_columns: tuple, lotno: str | None, after: list | None, limit: int) -> TextClause:
+    """
+        Query for one page of <table_name> in key order (keyset paging), filter by <lotno> if given.
+        after: key values of the last row of previous page, None for first page
+    """
+    conditions = []
+    params = {"limit": limit}
+    if lotno:
+        conditions.append("LOTNO = :lotno")
+        params["lotno"] = lotno
+    if after:
+        key_list = ", ".join(column_sql(column) for column in key_columns)
+        conditions.append(f"({key_list}) > ({', '.join(f':after_{index}' for index in range(len(key_columns)))})")
+        params.update({f"after_{index}": value for index, value in enumerate(after)})
+
+    where = f"WHERE {' AND '.join(conditions)}\n" if conditions else ""
+    order = ", ".join(column_sql(column) for column in key_columns)
+
+    return text(f"SELECT *\nFROM {table_sql(table_name)}\n{where}ORDER BY {order}\nLIMIT :limit").bindparams(**params)
+
+def scan_data_qry(table_name: str, lotno: str | None) -> TextClause:
+    """
+        Query for all data of <table_name> (read page by page through a server-side cursor), filter by <lotno> if given
+    """
+    if lotno:
+        return text(f"SELECT * FROM {table_sql(table_name)} WHERE LOTNO = :lotno").bindparams(lotno=lotno)
+    else:
+        return text(f"SELECT * FROM {table_sql(table_name)}")
+
+def export_data_qry(table_name: str, lotno: str | None, date_column: str | None = None,
+                    date_from=None, date_to=None) -> TextClause:
+    """
+        Query for export of <table_name>, filter by <lotno> and / or <date_column> in [date_from, date_to)
+    """
+    conditions = []
+    params = {}
+    if lotno:
+        conditions.append("LOTNO = :lotno")
+        params["lotno"] = lotno
+    if date_column and date_from is not None:
+        conditions.append(f"{column_sql(date_column)} >= :date_from")
+        params["date_from"] = date_from
+    if date_column and date_to is not None:
+        conditions.append(f"{column_sql(date_column)} < :date_to")
+        params["date_to"] = date_to
+
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    return text(f"SELECT * FROM {table_sql(table_name)}{where}").bindparams(**params)
+
+# Statistics computed per column by the summary "statistics" mode (SQL aggregate & pandas fallback give the same output)
+STATISTICS_PERCENTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+STATISTICS_TOP_VALUES = 5
+
+def statistics_qry(table_name: str, projection: tuple, column_kinds: tuple, lotno: str) -> TextClause:
+    """
+        Query for per-column statistics of <lotno> in <table_name>, aggregated in SQL: one row, one JSON object per column
+        projection / column_kinds: from catalog TableMetadata
+    """
+    return _statistics_select(table_name, projection, column_kinds).bindparams(lotno=lotno)
+
+@lru_cache(maxsize=1024)
+def _statistics_select(table_name: str, projection: tuple, column_kinds: tuple) -> TextClause:
+    """
+        Built statistics SELECT of (table, projection), reused until the catalog gives another projection (new version)
+    """
+    table = table_sql(table_name)
+    percentiles = ", ".join(str(percentile) for percentile in STATISTICS_PERCENTILES)
+
+    select_list = ["COUNT(*) AS row_count"]
+    for index, ((column, _), kind) in enumerate(zip(projection, column_kinds)):
+        name = column_sql(column)
+        counts = f"'count', COUNT({name}), 'nulls', COUNT(*) - COUNT({name})"
+        if kind == "numeric":
+            stats = f"""{counts}, 'min', MIN({name}), 'max', MAX({name}),
+                'mean', AVG({name})::FLOAT8, 'std', STDDEV_SAMP({name})::FLOAT8,
+                'percentiles', PERCENTILE_CONT(ARRAY[{percentiles}]) WITHIN GROUP (ORDER BY {name}::FLOAT8)"""
+        elif kind == "datetime":
+            stats = f"{counts}, 'min', MIN({name}), 'max', MAX({name})"
+        else:
+            # Most frequent values of the lot, scalar sub-query over the same lot rows
+            stats = f"""{counts}, 'distinct', COUNT(DISTINCT {name}::TEXT),
+                'top', (SELECT JSON_AGG(JSON_BUILD_OBJECT('value', value, 'count', count) ORDER BY count DESC, value)
+                        FROM (SELECT {name}::TEXT AS value, COUNT(*) AS count FROM {table}
+                              WHERE LOTNO = :lotno AND {name} IS NOT NULL
+                              GROUP BY 1 ORDER BY 2 DESC, 1 LIMIT {STATISTICS_TOP_VALUES}) AS top_values)"""
+        select_list.append(f"JSON_BUILD_OBJECT({stats}) AS stat_{index}")
+
+    select_list = ",\n    ".join(select_list)
+
+    return text(f"SELECT\n    {select_list}\nFROM {table}\nWHERE LOTNO = :lotno")
+
+def defect_total_qry(table_name: str, columns: tuple, lotno: str) -> TextClause:
+    """
+        Query for total of each defective column of <lotno> in <table_name>, one row named by view_column
+        columns: ((column_name, view_column), ...) from defect_columns
+    """
+    return _defect_total_select(table_name, columns).bindparams(lotno=lotno)
+
+@lru_cache(maxsize=1024)
+def _defect_total_select(table_name: str, columns: tuple) -> TextClause:
+    """
+        Built defect total SELECT of (table, columns), reused until the catalog gives another projection (new version)
+    """
+    select_list = ",\n    ".join(f"COALESCE(SUM({column_sql(column)}), 0)::FLOAT8 AS {column_sql(view_column)}"
+                                  for column, view_column in columns)
+
+    return text(f"SELECT\n    {select_list}\nFROM {table_sql(table_name)}\nWHERE LOTNO = :lotno")
+
+
+#########################################################################################################
+######################################## --- Row Shaping --- ############################################
+
+def rows_to_dicts(rows) -> list:
+    """
+        Convert result rows to list of dicts once, in the controller (routes serialize the content as is)
+    """
+    if not rows:
+        return []
+    keys = rows[0]._fields
+    return [dict(zip(keys, row)) for row in rows]
+
+def build_lot_mapping_data(lotno: str, table_name: str, mapping_row=None) -> dict:
+    """
+        Build mapping_data format of lot_mapper from the first mapping row (or empty mapping if not found)
+    """
+    return {
+        "lotno": lotno,
+        "table_name": table_name,
+        "department": mapping_row.department if mapping_row else None,
+        "product_code": mapping_row.product_code if mapping_row else None,
+        "process_code": mapping_row.process_code if mapping_row else None,
+        "process_name": mapping_row.process_name if mapping_row else None,
+    }
+
+def build_table_error(table_name: str, error: Exception) -> dict:
+    """
+        Build per-table error entry of summary content, so one failed table does not fail the whole summary
+    """
+    return {
+        "table_name": table_name,
+        "error": f"{type(error).__name__}: {error}",
+    }
+
+def filter_process_data(process_data, exclude_column: list, rename_list) -> list:
+    """
+        Filter column, remove column from "process_data" that exist in "exclude_column" list.
+        Then rename column by using "rename_list" {link_code_main: view_column}
+    """
+    filtered_data = []
+    for row_dict in rows_to_dicts(process_data):
+        filtered_row = {k: v for k, v in row_dict.items() if k.lower() not in exclude_column}
+        filtered_data.append(filtered_row)
+
+    if isinstance(rename_list, dict):
+        filtered_data = [{rename_list.get(k, k): v for k, v in row.items()} for row in filtered_data]
+
+    return filtered_data
+
+def split_process_data(process_data, process_metadata, defective_metadata) -> tuple[list, list]:
+    """
+        Split each lot row into "process" (non DEFECTIVE) & "defective" section, same output as retrieving each side alone.
+        Use the projection of each side when known, else filter_process_data on SELECT * rows
+    """
+    if process_metadata.projection is not None and defective_metadata.projection is not None:
+        rows = [row._mapping for row in process_data]
+        return tuple([{view_column: row[column] for column, view_column in metadata.projection} for row in rows]
+                     for metadata in (process_metadata, defective_metadata))
+
+    return tuple(filter_process_data(process_data, metadata.exclude_column, metadata.rename_list) if metadata.exclude_column
+                 else rows_to_dicts(process_data)
+                 for metadata in (process_metadata, defective_metadata))
+
+def build_combined_data(table_name: str, process_data: list | None = None, defective_data: list | None = None) -> dict:
+    """
+        Build per-table entry of combined retrieval
+    """
+    return {
+        "table_name": table_name,
+        "process": process_data or [],
+        "defective": defective_data or [],
+    }
+
+def to_columnar(rows: list, dictionary_encode: bool = False) -> dict:
+    """
+        Columnar form of one table rows: {"columns": [...], "rows": [[...]]}, each column name sent once.
+        dictionary_encode: string column with repeated values keep index into "dictionary" {column: [values]} instead
+    """
+    columns = list(dict.fromkeys(column for row in rows for column in row))
+    values = [[row.get(column) for column in columns] for row in rows]
+    output = {"columns": columns, "rows": values}
+
+    if dictionary_encode and values:
+        dictionary = {}
+        for index, column in enumerate(columns):
+            column_values = [row[index] for row in values if row[index] is not None]
+            if not column_values or not all(isinstance(value, str) for value in column_values):
+                continue
+
+            # Encode only when values repeat enough to pay for the dictionary
+            distinct = list(dict.fromkeys(column_values))
+            if len(distinct) * 2 > len(column_values):
+                continue
+
+            position = {value: position for position, value in enumerate(distinct)}
+            for row in values:
+                if row[index] is not None:
+                    row[index] = position[row[index]]
+            dictionary[column] = distinct
+
+        if dictionary:
+            output["dictionary"] = dictionary
+
+    return output
+
+def format_output(output, output_format: str | None = None, dictionary_encode: bool = False):
+    """
+        Output of one table in the format asked by client: "columnar" or default list of dicts.
+        Combined entry is formatted per section, per-table error entry is kept as is
+    """
+    if output_format != "columnar":
+        return output
+    if isinstance(output, list):
+        return to_columnar(output, dictionary_encode)
+    if isinstance(output, dict) and "process" in output and "defective" in output:
+        return {**output,
+                "process": to_columnar(output["process"], dictionary_encode),
+                "defective": to_columnar(output["defective"], dictionary_encode)}
+    return output
+
+def build_statistics_data(table_name: str, row_count: int = 0, columns: list | None = None) -> dict:
+    """
+        Build per-table entry of summary "statistics" mode
+    """
+    return {
+        "table_name": table_name,
+        "rows": row_count,
+        "columns": columns or [],
+    }
+
+def _percentile_label(percentile: float) -> str:
+    return f"p{round(percentile * 100):02d}"
+
+def _number(value):
+    """NumPy scalar / NaN -> plain float or None"""
+    if value is None or pd.isna(value):
+        return None
+    return value.item() if hasattr(value, "item") else value
+
+def _timestamp(value):
+    """pandas Timestamp -> datetime (serialized natively by orjson), date / datetime unchanged"""
+    return value.to_pydatetime() if isinstance(value, pd.Timestamp) else value
+
+def sql_statistics(table_name: str, row, projection: tuple, column_kinds: tuple) -> dict:
+    """
+        Shape the one row of statistics_qry into per-column statistics
+    """
+    columns = []
+    for index, ((_, view_column), kind) in enumerate(zip(projection, column_kinds)):
+        stats = dict(row[f"stat_{index}"])
+        if kind == "numeric":
+            stats.update(zip(map(_percentile_label, STATISTICS_PERCENTILES), stats.pop("percentiles") or [None] * len(STATISTICS_PERCENTILES)))
+        elif kind == "categorical":
+            stats["top"] = stats["top"] or []
+        columns.append({"column": view_column, "kind": kind, **stats})
+
+    return build_statistics_data(table_name, row["row_count"], columns)
+
+def describe_rows(table_name: str, rows: list) -> dict:
+    """
+        Per-column statistics of already read rows with pandas (table columns unknown to the catalog), same output as SQL
+    """
+    if not rows:
+        return build_statistics_data(table_name)
+
+    frame = pd.DataFrame.from_records(rows)
+    columns = []
+    for view_column in frame.columns:
+        series = frame[view_column]
+        count = int(series.count())
+        stats = {"count": count, "nulls": len(series) - count}
+
+        values = series.dropna()
+        numeric = pd.to_numeric(values, errors="coerce") if series.dtype == object else values
+        if count and not pd.api.types.is_bool_dtype(values) and pd.api.types.is_numeric_dtype(numeric) and numeric.notna().all():
+            kind = "numeric"
+            numeric = numeric.astype(float)
+            stats.update({"min": _number(values.min()), "max": _number(values.max()),
+                          "mean": _number(numeric.mean()), "std": _number(numeric.std())})
+            stats.update(zip(map(_percentile_label, STATISTICS_PERCENTILES), map(_number, numeric.quantile(list(STATISTICS_PERCENTILES)))))
+        elif count and (pd.api.types.is_datetime64_any_dtype(values) or all(isinstance(value, date) for value in values)):
+            kind = "datetime"
+            stats.update({"min": _timestamp(values.min()), "max": _timestamp(values.max())})
+        else:
+            kind = "categorical"
+            counts = values.astype(str).value_counts()
+            top = counts.sort_index().sort_values(ascending=False, kind="stable").head(STATISTICS_TOP_VALUES)
+            stats.update({"distinct": int(counts.size), "top": [{"value": value, "count": int(count)} for value, count in top.items()]})
+        columns.append({"column": view_column, "kind": kind, **stats})
+
+    return build_statistics_data(table_name, len(rows), columns)
+
+def defect_columns(metadata) -> tuple:
+    """
+        Numeric DEFECTIVE columns (LINK_CODE_MAIN of defective side) of a table: ((column_name, view_column), ...)
+    """
+    return tuple((column, view_column)
+                 for (column, view_column), kind in zip(metadata.projection, metadata.column_kinds or ())
+                 if column in metadata.rename_list and kind == "numeric")
+
+def sum_defect_rows(rows: list, view_columns) -> dict:
+    """
+        Total of each defective column (view_column) of already read rows (table columns unknown to the catalog)
+    """
+    columns = [column for column in dict.fromkeys(view_columns) if rows and column in rows[0]]
+    if not columns:
+        return {}
+    totals = pd.DataFrame.from_records(rows, columns=columns).apply(pd.to_numeric, errors="coerce").sum()
+    return {column: float(total) for column, total in totals.items()}
+
+def build_defect_totals(table_name: str, totals: dict | None = None, process_code: str | None = None) -> dict:
+    """
+        Build per-table entry of defect totals {view_column: total}
+    """
+    return {
+        "table_name": table_name,
+        "process_code": process_code,
+        "totals": totals or {},
+    }
+
+def _quantity(value: float):
+    return int(value) if float(value).is_integer() else round(float(value), 4)
+
+def _pareto_rows(frame) -> list:
+    return [{"defect": defect, "quantity": _quantity(quantity), "percent": round(percent, 2), "cumulative_percent": round(cumulative, 2)}
+            for defect, quantity, percent, cumulative in frame[["defect", "quantity", "percent", "cumulative_percent"]].itertuples(index=False)]
+
+def build_defect_pareto(lotno: str, table_totals: list) -> dict:
+    """
+        Ranked defect Pareto of the lot, per process (table) and overall (same view_column summed across tables).
+        Percent & cumulative percent of each process are computed in one vectorized pass over all tables
+    """
+    entries = [entry for entry in table_totals if "totals" in entry]
+    errors = [entry for entry in table_totals if "error" in entry]
+
+    totals = [(entry["table_name"], defect, quantity) for entry in entries for defect, quantity in entry["totals"].items()]
+    if not totals:
+        # No table, every table failed or no numeric Defective column: empty Pareto, keep the per-table errors
+        return {
+            "lotno": lotno,
+            "total_defects": 0,
+            "overall": [],
+            "processes": [{"table_name": entry["table_name"], "process_code": entry["process_code"], "total_defects": 0, "pareto": []}
+                          for entry in entries],
+            "errors": errors,
+        }
+
+    # Explicit float: object dtype (e.g. None totals) can not cumsum
+    frame = pd.DataFrame(totals, columns=["table_name", "defect", "quantity"]).astype({"quantity": float})
+    frame = frame[frame["quantity"] > 0]
+
+    # Per process: rank by quantity (then name), share of the process total
+    frame = frame.sort_values(["table_name", "quantity", "defect"], ascending=[True, False, True], kind="stable")
+    by_table = frame.groupby("table_name", sort=False)["quantity"]
+    frame["percent"] = frame["quantity"] / by_table.transform("sum") * 100
+    frame["cumulative_percent"] = frame.groupby("table_name", sort=False)["percent"].cumsum()
+
+    # Overall: same defect of every process summed
+    overall = frame.groupby("defect", as_index=False)["quantity"].sum()
+    overall = overall.sort_values(["quantity", "defect"], ascending=[False, True], kind="stable")
+    overall["percent"] = overall["quantity"] / overall["quantity"].sum() * 100
+    overall["cumulative_percent"] = overall["percent"].cumsum()
+
+    process_frames = dict(tuple(frame.groupby("table_name", sort=False)))
+    processes = []
+    for entry in entries:
+        process_frame = process_frames.get(entry["table_name"])
+        processes.append({
+            "table_name": entry["table_name"],
+            "process_code": entry["process_code"],
+            "total_defects": _quantity(process_frame["quantity"].sum()) if process_frame is not None else 0,
+            "pareto": _pareto_rows(process_frame) if process_frame is not None else [],
+        })
+
+    return {
+        "lotno": lotno,
+        "total_defects": _quantity(overall["quantity"].sum()),
+        "overall": _pareto_rows(overall),
+        "processes": processes,
+        "errors": errors,
+    }
+
+def map_chat_input(chatInput: str, info_matcher) -> dict:
+    """
+        Map user's input with the actual table_name (best ranked match of catalog InfoMatcher) and extract the Lot Number
+    """
+    # 1. Map the Parameter Code (table name, process name, process code, product code) in one pass
+    # Matcher is case-insensitive to handle 'Racking' vs 'racking'
+    mapping_dict = {}
+    row = info_matcher.best_match(chatInput)
+    if row:
+        mapping_dict["table_name"] = row.table_name
+        mapping_dict["department"] = row.department
+        mapping_dict["product_code"] = row.product_code
+        mapping_dict["process_code"] = row.process_code
+        mapping_dict["process_name"] = row.process_name
+
+    # 2. Extract the Lot Number using Regex (Pattern Matching)
+    # First try to find after 'lotno' keyword, then fallback to alphanumeric pattern
+    lot_match = re.search(r'lotno[:\s=]+([A-Z0-9]{8,12})', chatInput, re.IGNORECASE)
+    if not lot_match:
+        lot_match = re.search(r'\b([A-Z0-9]{8,12})\b', chatInput, re.IGNORECASE)
+    lot_no = lot_match.group(1) if lot_match else "-"
+
+    mapping_dict["lotno"] = lot_no
+
+    return mapping_dict
@@ -1,30 +1,84 @@
 from fastapi import FastAPI, Request
+from starlette.types import ASGIApp, Receive, Scope, Send, Message
 from fastapi_mcp import FastApiMCP
 import socket
 import time
 from datetime import datetime
 import os
 import asyncio # New: Required for creating and cancelling tasks
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
 from fastapi.middleware.cors import CORSMiddleware
 import logging
 
+# ----- import database lifecycle -----
+from models.database import dispose_pg_engine, init_pg_async_engine, dispose_pg_async_engine
+from models.catalog import catalog_cache, listen_catalog_changes
+from models.lot_index import LOT_INDEX_ENABLED, run_lot_index_sync
+from models.paging import run_cursor_sweep
+from models.metrics import METRICS_ENABLED, REQUESTS_IN_PROGRESS, start_request, end_request, record_request, route_operation, is_failed_payload
+from models.query_log import query_log
+from models.admission import admission_control, AdmissionRejected
+from models.serialization import DWHJSONResponse
+
 # ----- import router -----
 # Assuming routers/dwh_router.py exists
-from routers import dwh_router 
+from routers import dwh_router, metrics_router
 
 # --- Configuration ---
 logger = logging.getLogger(__name__)
 
-# Limit to 3 concurrent workers/tasks
-MAX_CONCURRENT_TASKS = 3
-semaphore = asyncio.Semaphore(MAX_CONCURRENT_TASKS)
+# Concurrent tool calls are limited per operation by AdmissionMiddleware (models/admission.py)
 
 # --- Global Task Tracking ---
 # This holds the asyncio Task object for managing the background process
 db_status_task: asyncio.Task | None = None 
+# This holds the asyncio Task object for reloading the warehouse catalog on NOTIFY / TTL
+catalog_listener_task: asyncio.Task | None = None
+# This holds the asyncio Task object for building & following the lot location index
+lot_index_task: asyncio.Task | None = None
+# This holds the asyncio Task object for closing abandoned paging cursors of main_execute_sql
+cursor_sweep_task: asyncio.Task | None = None
             
+# --- Application Lifespan ---
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Own the PostgreSQL engines for the application lifetime: warm the async pool at startup, close both at shutdown"""
+    global catalog_listener_task, lot_index_task, cursor_sweep_task
+
+    # Sync engine (catalog & lot index loaders) is created on first use, only the async tool pool is warmed
+    await init_pg_async_engine()
+
+    # Preload warehouse catalog & keep it fresh in background
+    try:
+        await asyncio.to_thread(catalog_cache.refresh)
+    except Exception as e:
+        logger.error(f"Error preloading warehouse catalog: {e}")
+    catalog_listener_task = asyncio.create_task(listen_catalog_changes())
+
+    # Bulk build lot location index in background, lot_mapper probes tables until it is ready
+    if LOT_INDEX_ENABLED:
+        lot_index_task = asyncio.create_task(run_lot_index_sync())
+
+    # Close idle paging cursors, all of them at shutdown (before the async engine is disposed)
+    cursor_sweep_task = asyncio.create_task(run_cursor_sweep())
+
+    try:
+        yield
+    finally:
+        background_tasks = [task for task in (catalog_listener_task, lot_index_task, cursor_sweep_task) if task]
+        for task in background_tasks:
+            task.cancel()
+        await asyncio.gather(*background_tasks, return_exceptions=True)
+        catalog_listener_task = None
+        lot_index_task = None
+        cursor_sweep_task = None
+
+        await dispose_pg_async_engine()
+        await asyncio.to_thread(dispose_pg_engine)
+
 # Create the FastAPI application instance
-app = FastAPI(title="MTLW-DWH Agent API", version="1.0.0")
+app = FastAPI(title="MTLW-DWH Agent API", version="1.0.0", lifespan=lifespan)
 
 # --- Middleware ---
 app.add_middleware(
@@ -37,6 +91,7 @@ app.add_middleware(
 
 # ----- include app router -----
 app.include_router(dwh_router.router)
+app.include_router(metrics_router.router)
 
 #################################################################################
 ########################   Helper Function Section   ############################
@@ -54,33 +109,120 @@ def log_route_access(request, response_time: float, status_code: int | None=None
     except Exception as log_error:
         logger.debug(f"Logging error for {request.url.path}: {log_error}")
 
-async def worker(name):
-    print(f"[{time.strftime('%H:%M:%S')}] Task {name}: Waiting to acquire semaphore...")
-
-    # 2. Acquire the semaphore using 'async with'
-    # The task will pause here if the limit is reached
-    async with semaphore:
-        print(f"[{time.strftime('%H:%M:%S')}] Task {name}: >>> ACQUIRED. Working for 1 second...")
-        await asyncio.sleep(1)  # Simulate I/O-bound work (e.g., API call)
-        print(f"[{time.strftime('%H:%M:%S')}] Task {name}: <<< RELEASED. Finished work.")
-    
-async def main():
-    """Main async function to demonstrate async functionality."""
-
-    # Create 10 tasks, but only 3 will run concurrently
-    tasks = [worker(i) for i in range(10)]
-    await asyncio.gather(*tasks)
-        
+class MetricsMiddleware:
+    """
+        Plain ASGI middleware (no BaseHTTPMiddleware: streaming & MCP SSE responses pass through untouched).
+        Time each request until its last body chunk, count body bytes & DB queries / rows of the request,
+        label them with the operation_id of the matched route, report repeated statements (query_log)
+        then log the access with log_route_access.
+        A tool answering {"success": false} (first body chunk) is counted as failed request
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        stats, token = start_request(scope)
+        response = {"status": 500, "bytes": 0}
+        error = None
+
+        async def send_with_metrics(message: Message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                body = message.get("body", b"")
+                if not response["bytes"] and is_failed_payload(body):
+                    stats["failed"] = True
+                response["bytes"] += len(body)
+            await send(message)
+
+        REQUESTS_IN_PROGRESS.inc()
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            REQUESTS_IN_PROGRESS.dec()
+            end_request(token)
+            response_time = time.perf_counter() - started
+            operation = route_operation(scope)
+            record_request(operation, scope["method"], response["status"], response_time,
+                           response["bytes"], stats, error is not None)
+            query_log.finish_request(operation, stats)
+            log_route_access(Request(scope), response_time, response["status"], error)
+
+class AdmissionMiddleware:
+    """
+        Plain ASGI middleware: concurrency limit & bounded wait queue per tool operation (admission_control).
+        The slot is held until the last body chunk (streamed summaries & exports included).
+        Queue full -> 429, no slot in time -> 503, both with Retry-After, before any DB work
+    """
+
+    def __init__(self, app: ASGIApp, api: FastAPI):
+        self.app = app
+        self.api = api
+        self._operations: dict[tuple[str, str], str] | None = None
+
+    def operation_of(self, scope: Scope) -> str | None:
+        """Limited operation of the request, from the OpenAPI paths (tool routes have no path parameter: exact lookup)"""
+        if self._operations is None:
+            self._operations = {
+                (method.upper(), path): operation["operationId"]
+                for path, methods in self.api.openapi()["paths"].items()
+                for method, operation in methods.items()
+                if admission_control.limiter(operation.get("operationId"))
+            }
+        return self._operations.get((scope["method"], scope["path"]))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        operation = self.operation_of(scope) if scope["type"] == "http" and admission_control.enabled else None
+        if operation is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            limiter = await admission_control.acquire(operation)
+        except AdmissionRejected as e:
+            # Label the rejected request with its operation in metrics & access log (route_operation)
+            scope["route"] = SimpleNamespace(operation_id=operation)
+            response = DWHJSONResponse(
+                {"success": False, "error": f"Server busy ({e.limiter} {e.reason}), retry after {e.retry_after} seconds",
+                 "retry_after": e.retry_after},
+                status_code=e.status_code,
+                headers={"Retry-After": str(e.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(time.perf_counter() - started)
+
 #################################################################################
 ########################        Main Section         ############################
 #################################################################################
 
+# Per-operation concurrency limits of the tool routes (inside MetricsMiddleware: rejections are measured too)
+app.add_middleware(AdmissionMiddleware, api=app)
+
+# Request metrics & access log of every route (MCP tool calls included, they are dispatched to the routes)
+app.add_middleware(MetricsMiddleware)
+
 # Set up MCP without conflicting middleware
 mcp = FastApiMCP(
     app, 
     include_operations=[
         "helper_mapping_info", "helper_process_mapper","main_execute_sql",
-        "main_summary_each_process_data", "main_summary_each_process_data_defective"
+        "main_summary_each_process_data", "main_summary_each_process_data_defective",
+        "main_summary_each_process_data_combined", "main_defect_pareto",
         # "generate_sql", "execute_sql",
         # "common_info", "lot_in_process", "quality_info", "machine_info", "summary_lot_data"
     ],
@@ -89,5 +231,4 @@ mcp = FastApiMCP(
 # Mount the MCP server directly to FastAPI app
 mcp.mount()
 
-if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+# Concurrent agent load: python -m benchmarks.load_test (see README, Load Test)
\ No newline at end of file
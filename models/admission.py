@@ -0,0 +1,211 @@
+from collections import deque
+import os
+import math
+import time
+import asyncio
+import logging
+from dotenv import load_dotenv
+
+from models.database import PG_POOL_SIZE, PG_MAX_OVERFLOW, PG_POOL_TIMEOUT, SUMMARY_CONCURRENCY
+from prometheus_client import Counter, Gauge, Histogram
+
+from models.metrics import registry, METRICS_LATENCY_BUCKETS
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+## 🚦 Admission control settings (override through environment)
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "1") == "1"
+# Heavy tool calls running at once: each summary fans out over up to SUMMARY_CONCURRENCY pooled connections
+ADMISSION_HEAVY_CONCURRENCY = int(os.getenv("ADMISSION_HEAVY_CONCURRENCY", str(max(1, (PG_POOL_SIZE + PG_MAX_OVERFLOW) // SUMMARY_CONCURRENCY))))
+ADMISSION_HEAVY_QUEUE = int(os.getenv("ADMISSION_HEAVY_QUEUE", "20"))  # Heavy calls waiting for a slot, more -> 429
+ADMISSION_SQL_CONCURRENCY = int(os.getenv("ADMISSION_SQL_CONCURRENCY", str(max(1, PG_POOL_SIZE // 2))))  # main_execute_sql, one connection each
+ADMISSION_SQL_QUEUE = int(os.getenv("ADMISSION_SQL_QUEUE", "20"))
+# Seconds waiting in queue before 503, below PG_POOL_TIMEOUT: fail fast instead of timing out on the pool
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", str(max(1, PG_POOL_TIMEOUT // 3))))
+ADMISSION_MAX_RETRY_AFTER = int(os.getenv("ADMISSION_MAX_RETRY_AFTER", "60"))  # Upper bound of the Retry-After hint (seconds)
+# Per-operation overrides "operation=concurrency:queue,...": the operation gets its own limiter
+ADMISSION_LIMITS = os.getenv("ADMISSION_LIMITS", "")
+
+# Tool operations sharing the heavy limiter (one connection budget), helpers are never limited
+HEAVY_OPERATIONS = (
+    "main_summary_each_process_data", "main_summary_each_process_data_defective",
+    "main_summary_each_process_data_combined", "main_defect_pareto", "main_export_data",
+)
+SQL_OPERATIONS = ("main_execute_sql",)
+
+ADMISSION_ACTIVE = Gauge("dwh_admission_active", "Requests holding an admission slot", ("limiter",), registry=registry)
+ADMISSION_QUEUED = Gauge("dwh_admission_queued", "Requests waiting for an admission slot", ("limiter",), registry=registry)
+ADMISSION_WAIT = Histogram("dwh_admission_wait_seconds", "Wait for an admission slot (admitted requests)", ("operation",),
+                           buckets=(0,) + METRICS_LATENCY_BUCKETS, registry=registry)
+ADMISSION_REJECTED = Counter("dwh_admission_rejected_total", "Requests rejected by admission control", ("operation", "reason"), registry=registry)
+
+
+class AdmissionRejected(Exception):
+    """No slot for the request: queue full (429) or queue wait timeout (503), with a Retry-After hint in seconds"""
+
+    def __init__(self, limiter: str, reason: str, status_code: int, retry_after: int):
+        super().__init__(f"{limiter} {reason}, retry after {retry_after}s")
+        self.limiter = limiter
+        self.reason = reason
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+#################################################################################
+########################        Limiter Section       ###########################
+#################################################################################
+
+class Limiter:
+    """
+        Concurrency limit (semaphore) with a bounded FIFO wait queue for backpressure:
+        - slot free and nobody waiting -> admitted at once
+        - <queue_size> requests already waiting -> AdmissionRejected 429 without waiting
+        - no slot within <queue_timeout> seconds -> AdmissionRejected 503
+        Retry-After hint: time to drain the queue ahead, from the moving average of the slot hold time
+    """
+
+    def __init__(self, name: str, concurrency: int, queue_size: int, queue_timeout: float = ADMISSION_QUEUE_TIMEOUT):
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.queue_size = max(0, queue_size)
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self.hold_seconds = 1.0  # Moving average of the slot hold time
+        self.stats = {"admitted": 0, "queued": 0, "rejected_queue_full": 0, "rejected_timeout": 0, "max_queued": 0}
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> int:
+        drain = self.hold_seconds * (self.queued + 1) / self.concurrency
+        return min(ADMISSION_MAX_RETRY_AFTER, max(1, math.ceil(drain)))
+
+    def _update_gauges(self):
+        ADMISSION_ACTIVE.labels(limiter=self.name).set(self.active)
+        ADMISSION_QUEUED.labels(limiter=self.name).set(self.queued)
+
+    async def acquire(self) -> float:
+        """Take a slot, return the seconds waited for it"""
+        if self.active < self.concurrency and not self._waiters:
+            self.active += 1
+            self.stats["admitted"] += 1
+            self._update_gauges()
+            return 0.0
+
+        if self.queued >= self.queue_size:
+            self.stats["rejected_queue_full"] += 1
+            raise AdmissionRejected(self.name, "queue full", 429, self.retry_after())
+
+        started = time.perf_counter()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.stats["queued"] += 1
+        self.stats["max_queued"] = max(self.stats["max_queued"], self.queued)
+        self._update_gauges()
+        try:
+            async with asyncio.timeout(self.queue_timeout):
+                await waiter
+        except (TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # Slot handed over at the same moment: give it to the next waiter
+                self.release()
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+                self._update_gauges()
+            if isinstance(e, TimeoutError):
+                self.stats["rejected_timeout"] += 1
+                raise AdmissionRejected(self.name, "queue wait timeout", 503, self.retry_after()) from None
+            raise
+
+        self.stats["admitted"] += 1
+        return time.perf_counter() - started
+
+    def release(self, held_seconds: float | None = None):
+        """Free the slot (or hand it over to the first waiter still waiting)"""
+        if held_seconds is not None:
+            self.hold_seconds = 0.8 * self.hold_seconds + 0.2 * held_seconds
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                self._update_gauges()
+                return
+        self.active -= 1
+        self._update_gauges()
+
+    def snapshot(self) -> dict:
+        return {
+            **self.stats,
+            "active": self.active,
+            "queued": self.queued,
+            "concurrency": self.concurrency,
+            "queue_size": self.queue_size,
+            "queue_timeout": self.queue_timeout,
+            "hold_seconds": round(self.hold_seconds, 4),
+            "retry_after": self.retry_after(),
+        }
+
+
+#################################################################################
+########################    Admission Control Section   #########################
+#################################################################################
+
+def parse_limits(value: str) -> dict[str, tuple[int, int]]:
+    """ "operation=concurrency:queue,..." -> {operation: (concurrency, queue)}, malformed items are logged & skipped"""
+    limits = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        try:
+            operation, _, limit = item.partition("=")
+            concurrency, _, queue = limit.partition(":")
+            limits[operation.strip()] = (int(concurrency), int(queue or 0))
+        except ValueError:
+            logger.warning(f"Ignoring malformed ADMISSION_LIMITS item: {item}")
+    return limits
+
+
+class AdmissionControl:
+    """Limiter of each limited operation (heavy tool calls share one), unlimited operations are always admitted"""
+
+    def __init__(self, enabled: bool = ADMISSION_ENABLED, overrides: str = ADMISSION_LIMITS):
+        self.enabled = enabled
+        heavy = Limiter("heavy", ADMISSION_HEAVY_CONCURRENCY, ADMISSION_HEAVY_QUEUE)
+        sql = Limiter("sql", ADMISSION_SQL_CONCURRENCY, ADMISSION_SQL_QUEUE)
+        self.limiters: dict[str, Limiter] = {
+            **{operation: heavy for operation in HEAVY_OPERATIONS},
+            **{operation: sql for operation in SQL_OPERATIONS},
+        }
+        for operation, (concurrency, queue) in parse_limits(overrides).items():
+            self.limiters[operation] = Limiter(operation, concurrency, queue)
+
+    def limiter(self, operation: str) -> Limiter | None:
+        return self.limiters.get(operation) if self.enabled else None
+
+    async def acquire(self, operation: str) -> Limiter | None:
+        """Slot of <operation> (None when not limited), raise AdmissionRejected"""
+        limiter = self.limiter(operation)
+        if limiter is None:
+            return None
+        try:
+            waited = await limiter.acquire()
+        except AdmissionRejected as e:
+            ADMISSION_REJECTED.labels(operation=operation, reason="queue_full" if e.status_code == 429 else "timeout").inc()
+            logger.warning(f"Admission rejected {operation}: {e}")
+            raise
+        ADMISSION_WAIT.labels(operation=operation).observe(waited)
+        return limiter
+
+    def snapshot(self) -> dict:
+        """State of each limiter & the operations it covers, for monitoring"""
+        limiters = {}
+        for operation, limiter in self.limiters.items():
+            entry = limiters.setdefault(limiter.name, {**limiter.snapshot(), "operations": []})
+            entry["operations"].append(operation)
+        return {"enabled": self.enabled, "limiters": limiters}
+
+
+admission_control = AdmissionControl()
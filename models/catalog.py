@@ -0,0 +1,532 @@
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from typing import NamedTuple
+import os
+import re
+import time
+import asyncio
+import logging
+import threading
+import psycopg
+from dotenv import load_dotenv
+
+# get postgres session from database module
+from models.database import PG_CONNECTION_STRING, get_pg_engine, get_pg_session
+from models.matcher import InfoMatcher
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+## 📚 Warehouse catalog settings (override through environment)
+CATALOG_TTL = int(os.getenv("CATALOG_TTL", "300"))  # Reload config tables at least every 5 minutes
+CATALOG_RETRY_INTERVAL = int(os.getenv("CATALOG_RETRY_INTERVAL", "10"))  # Keep serving old catalog, retry after error
+CATALOG_NOTIFY_CHANNEL = os.getenv("CATALOG_NOTIFY_CHANNEL", "dwh_catalog_changed")
+
+
+def listen_conninfo() -> str:
+    """LISTEN needs a plain libpq connection (psycopg 3), not a SQLAlchemy driver URL"""
+    return make_url(PG_CONNECTION_STRING).set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+#################################################################################
+########################      Identifier Section     ############################
+#################################################################################
+
+# Name written without quote in DDL / config, PostgreSQL fold it to lower case
+_PLAIN_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_$]*$")
+
+def quote_identifier(name: str) -> str:
+    """Quote exact name (as stored in INFORMATION_SCHEMA / view_column) as PostgreSQL identifier"""
+    return '"' + name.replace('"', '""') + '"'
+
+def quote_name(name: str) -> str:
+    """
+        Quote config name (table / column, optionally schema.table) with the same meaning as writing it unquoted:
+        plain parts are folded to lower case, any other name is kept exact
+    """
+    parts = name.split(".")
+    if all(_PLAIN_IDENTIFIER.match(part) for part in parts):
+        return ".".join(quote_identifier(part.lower()) for part in parts)
+    return quote_identifier(name)
+
+
+#################################################################################
+########################     Catalog Row Section     ############################
+#################################################################################
+
+class InfoMappingRow(NamedTuple):
+    """Row of info_mapping (same column order as the original query, index & attribute access)"""
+    table_name: str
+    department: str | None
+    product_code: str | None
+    process_code: str | None
+    process_name: str | None
+
+
+class TableMapping(NamedTuple):
+    """Row of CONFIG_WAREHOUSE_TABLE by TABLE_NAME"""
+    table_name: str
+    department: str | None
+    process_code: str | None
+    product_code: str | None
+
+
+class LinkCode(NamedTuple):
+    """Row of CONFIG_LINK_CODE: actual column name & view column for user"""
+    link_code_main: str
+    view_column: str | None
+
+
+class TableMetadata(NamedTuple):
+    """Prefetched metadata of one process table for retrieving data (normal or defective side)"""
+    table_name: str
+    department: str | None
+    process_code: str | None
+    product_code: str | None
+    exclude_column: frozenset   # LINK_CODE_MAIN of the opposite side, removed from output
+    rename_list: dict           # {link_code_main: view_column} of this side
+    projection: tuple | None    # ((column_name, view_column), ...) kept in output, None if table columns unknown
+    catalog_version: int        # Version of the catalog snapshot this metadata come from (result cache key)
+    column_kinds: tuple | None = None  # "numeric" | "datetime" | "categorical" of each projection column (statistics)
+
+
+# INFORMATION_SCHEMA.COLUMNS data type -> kind of statistics computed on the column, other types are "categorical"
+_COLUMN_KINDS = {
+    "smallint": "numeric", "integer": "numeric", "bigint": "numeric",
+    "numeric": "numeric", "real": "numeric", "double precision": "numeric",
+    "date": "datetime", "timestamp without time zone": "datetime", "timestamp with time zone": "datetime",
+}
+
+
+# Queries for loading all config tables (one round-trip each)
+CONFIG_WAREHOUSE_TABLE_QRY = text("""
+    SELECT TABLE_NAME, DEPARTMENT, PRODUCT_CODE, PROCESS_CODE, (IS_ACTIVE = 1) AS IS_ACTIVE
+    FROM CONFIG_WAREHOUSE_TABLE
+""")
+
+CONFIG_LINK_CODE_QRY = text("""
+    SELECT PRODUCT_SUBGROUP, DG_PROCESS_CODE, DG_PROCESS_NAME, DG_DEPARTMENT,
+        LINK_CODE_MAIN, VIEW_COLUMN, SPECIAL_DATA_TYPE
+    FROM CONFIG_LINK_CODE
+""")
+
+# Columns of each CONFIG_WAREHOUSE_TABLE table, first schema in search_path wins (same as unqualified table name)
+CONFIG_TABLE_COLUMN_QRY = text("""
+    SELECT DISTINCT t.TABLE_NAME, c.TABLE_SCHEMA, c.COLUMN_NAME, c.DATA_TYPE, c.ORDINAL_POSITION,
+        ARRAY_POSITION(CURRENT_SCHEMAS(false), c.TABLE_SCHEMA::TEXT) AS SCHEMA_RANK
+    FROM CONFIG_WAREHOUSE_TABLE t
+    JOIN INFORMATION_SCHEMA.COLUMNS c ON UPPER(c.TABLE_NAME) = UPPER(t.TABLE_NAME)
+    WHERE c.TABLE_SCHEMA::TEXT = ANY(CURRENT_SCHEMAS(false))
+    ORDER BY t.TABLE_NAME, SCHEMA_RANK, c.ORDINAL_POSITION
+""")
+
+# Key columns (primary key, else NOT NULL unique index) of each warehouse & LOT_INFO table, for keyset paging
+CONFIG_TABLE_KEY_QRY = text("""
+    SELECT t.TABLE_NAME, i.INDEXRELID::BIGINT AS INDEX_ID, a.ATTNAME AS COLUMN_NAME, a.ATTNOTNULL AS NOT_NULL
+    FROM (
+        SELECT TABLE_NAME FROM CONFIG_WAREHOUSE_TABLE
+        UNION
+        SELECT UPPER(TARGET_TABLE_NAME) FROM CONFIG_TABLE_FIELD WHERE TARGET_TABLE_NAME IS NOT NULL
+    ) t
+    JOIN PG_INDEX i ON i.INDRELID = TO_REGCLASS(t.TABLE_NAME) AND i.INDISUNIQUE
+        AND i.INDPRED IS NULL AND i.INDEXPRS IS NULL
+    CROSS JOIN LATERAL UNNEST(i.INDKEY::INT2[]) WITH ORDINALITY AS k(ATTNUM, POSITION)
+    JOIN PG_ATTRIBUTE a ON a.ATTRELID = i.INDRELID AND a.ATTNUM = k.ATTNUM
+    ORDER BY t.TABLE_NAME, i.INDISPRIMARY DESC, i.INDEXRELID, k.POSITION
+""")
+
+CONFIG_TABLE_FIELD_QRY = text("""
+    SELECT DISTINCT UPPER(TARGET_TABLE_NAME) AS TABLE_NAME, DEPARTMENT,
+        UPPER(SPLIT_PART(LOWER(TARGET_TABLE_NAME), '_lot_info', 1)) AS PRODUCT_CODE
+    FROM CONFIG_TABLE_FIELD
+    WHERE TARGET_TABLE_NAME IS NOT NULL
+""")
+
+
+#################################################################################
+########################      Catalog Section        ############################
+#################################################################################
+
+def _sort_key(row: tuple) -> tuple:
+    """Stable sort key for rows that may contain None"""
+    return tuple("" if value is None else str(value) for value in row)
+
+
+class WarehouseCatalog:
+    """
+        Immutable in-memory snapshot of CONFIG_WAREHOUSE_TABLE, CONFIG_LINK_CODE, CONFIG_TABLE_FIELD and the columns & key of each table.
+        Indexed by table name, by (product, department) and by (product, process, department, defective),
+        so the component functions never need a round-trip for config data.
+    """
+
+    def __init__(self, version: int, fingerprint: int, warehouse_rows: list, link_code_rows: list, table_field_rows: list,
+                 table_column_rows: list | None = None, table_key_rows: list | None = None):
+        self.version = version
+        self.fingerprint = fingerprint
+        self.loaded_at = time.time()
+
+        # --- Index CONFIG_LINK_CODE ---
+        # NULL never match in SQL equality, skip rows with NULL key
+        process_names_by_product: dict[tuple, dict] = {}
+        process_names_by_process: dict[str, dict] = {}
+        link_codes: dict[tuple, list] = {}
+        for row in link_code_rows:
+            if row.product_subgroup is not None and row.dg_process_code is not None:
+                process_names_by_product.setdefault((row.product_subgroup, row.dg_process_code), {})[row.dg_process_name] = None
+            if row.dg_process_code is not None:
+                process_names_by_process.setdefault(row.dg_process_code, {})[row.dg_process_name] = None
+            if None in (row.product_subgroup, row.dg_process_code, row.dg_department, row.special_data_type):
+                continue
+            key = (row.product_subgroup, row.dg_process_code, row.dg_department, row.special_data_type == "Defective")
+            link_codes.setdefault(key, []).append(LinkCode(row.link_code_main, row.view_column))
+
+        # --- Index CONFIG_WAREHOUSE_TABLE ---
+        tables: dict[str, TableMapping] = {}
+        product_tables: dict[tuple, dict] = {}
+        product_mappings: dict[str, dict] = {}
+        info_rows: dict[InfoMappingRow, None] = {}
+        for row in warehouse_rows:
+            # First row wins, same as fetchone() of "WHERE TABLE_NAME = ..."
+            tables.setdefault(row.table_name, TableMapping(row.table_name, row.department, row.process_code, row.product_code))
+            product_tables.setdefault((row.product_code, row.department), {})[row.table_name] = None
+
+            if not row.is_active:
+                continue
+
+            # info_mapping: LEFT JOIN on (product, process)
+            for process_name in process_names_by_product.get((row.product_code, row.process_code)) or [None]:
+                info_rows[InfoMappingRow(row.table_name, row.department, row.product_code, row.process_code, process_name)] = None
+
+            # lot_mapper: LEFT JOIN on process only
+            for process_name in process_names_by_process.get(row.process_code) or [None]:
+                mapping_row = InfoMappingRow(row.table_name, row.department, row.product_code, row.process_code, process_name)
+                product_mappings.setdefault(row.product_code, {})[mapping_row] = None
+
+        # --- Index CONFIG_TABLE_FIELD (LOT_INFO tables) ---
+        lot_tables: dict[str, None] = {}
+        for row in table_field_rows:
+            lot_tables[row.table_name] = None
+            info_rows[InfoMappingRow(row.table_name, row.department, row.product_code, None, None)] = None
+
+        # --- Index table columns (INFORMATION_SCHEMA) ---
+        table_columns: dict[str, list] = {}
+        table_schemas: dict[str, str] = {}
+        column_kinds: dict[tuple, str] = {}
+        for row in table_column_rows or []:
+            if table_schemas.setdefault(row.table_name, row.table_schema) == row.table_schema:
+                table_columns.setdefault(row.table_name, []).append(row.column_name)
+                column_kinds[(row.table_name, row.column_name)] = _COLUMN_KINDS.get(row.data_type, "categorical")
+
+        # --- Index table key (first usable unique index, primary key first) ---
+        index_columns: dict[tuple, list] = {}
+        for row in table_key_rows or []:
+            index_columns.setdefault((row.table_name, row.index_id), []).append(row)
+        table_keys: dict[str, tuple] = {}
+        for (table_name, _), rows in index_columns.items():
+            if table_name not in table_keys and all(row.not_null for row in rows):
+                table_keys[table_name] = tuple(row.column_name for row in rows)
+
+        self.tables = tables
+        self.table_columns = {key: tuple(value) for key, value in table_columns.items()}
+        self.column_kinds = column_kinds
+        self.table_keys = table_keys
+        self.product_tables = {key: tuple(sorted(value)) for key, value in product_tables.items()}
+        self.product_mappings = {key: tuple(value) for key, value in product_mappings.items()}
+        self.link_codes = {key: tuple(value) for key, value in link_codes.items()}
+        self.lot_tables = tuple(sorted(lot_tables))
+        self.info_rows = tuple(sorted(info_rows, key=_sort_key))
+
+        # Only table in catalog may be queried by name from user's input
+        self._lot_table_set = frozenset(self.lot_tables)
+        self._table_names_upper = {table_name.upper(): table_name for table_name in (*self.lot_tables, *self.tables)}
+
+        # Precompiled chatInput matcher, built once per catalog version
+        self.info_matcher = InfoMatcher(self.info_rows)
+
+        # (table_name, defective_flag) -> TableMetadata, resolved on first use
+        self._table_metadata: dict[tuple, TableMetadata | None] = {}
+
+    def table_mapping(self, table_name: str) -> TableMapping | None:
+        """Mapping data (department, process, product) of <table_name>"""
+        return self.tables.get(table_name)
+
+    def process_tables(self, product_code: str, department: str) -> tuple:
+        """All process table within the same product & department"""
+        return self.product_tables.get((product_code, department), ())
+
+    def product_mapping(self, product_code: str) -> InfoMappingRow | None:
+        """First mapping row (department, product, process) of <product_code>"""
+        rows = self.product_mappings.get(product_code)
+        return rows[0] if rows else None
+
+    def link_code(self, mapping_data: dict, defective_flag: bool) -> tuple:
+        """LINK_CODE_MAIN & VIEW_COLUMN of <mapping_data>. defective_flag: True -> only Defective, False -> non Defective"""
+        key = (mapping_data["product_code"], mapping_data["process_code"], mapping_data["department"], defective_flag)
+        return self.link_codes.get(key, ())
+
+    def link_code_main(self, mapping_data: dict, defective_flag: bool) -> list:
+        """List of LINK_CODE_MAIN of <mapping_data>"""
+        return [item.link_code_main for item in self.link_code(mapping_data, defective_flag)]
+
+    def view_columns(self, mapping_data: dict, defective_flag: bool) -> dict:
+        """Mapping dict in format {link_code_main: view_column}"""
+        return {item.link_code_main: item.view_column for item in self.link_code(mapping_data, defective_flag)}
+
+
+    def resolve_table(self, table_name: str) -> str | None:
+        """Catalog name of <table_name> (CONFIG_WAREHOUSE_TABLE or LOT_INFO table, case-insensitive), None if unknown"""
+        if not isinstance(table_name, str):
+            return None
+        if table_name in self.tables or table_name in self._lot_table_set:
+            return table_name
+        return self._table_names_upper.get(table_name.upper())
+
+    def resolve_column(self, table_name: str, column_name: str) -> str | None:
+        """
+            Actual name of <column_name> in <table_name> (case-insensitive), None if unknown.
+            Table without known columns accept only plain identifier (folded like unquoted SQL)
+        """
+        if not isinstance(column_name, str):
+            return None
+        columns = self.table_columns.get(table_name)
+        if columns is None:
+            return column_name.lower() if _PLAIN_IDENTIFIER.match(column_name) else None
+        if column_name in columns:
+            return column_name
+        return next((column for column in columns if column.upper() == column_name.upper()), None)
+
+    def table_key(self, table_name: str) -> tuple:
+        """Key columns of <table_name> for keyset paging, empty if table has no usable unique key"""
+        return self.table_keys.get(table_name, ())
+
+    def table_metadata(self, table_name: str, defective_flag: bool) -> TableMetadata | None:
+        """Mapping, exclude columns & view columns of <table_name> (None if table is not in CONFIG_WAREHOUSE_TABLE)"""
+        key = (table_name, defective_flag)
+        if key not in self._table_metadata:
+            mapping = self.tables.get(table_name)
+            if mapping is None:
+                self._table_metadata[key] = None
+            else:
+                mapping_data = mapping._asdict()
+                exclude_column = frozenset(self.link_code_main(mapping_data, defective_flag=not defective_flag))
+                rename_list = self.view_columns(mapping_data, defective_flag)
+                projection = self._projection(table_name, exclude_column, rename_list)
+                self._table_metadata[key] = TableMetadata(
+                    *mapping,
+                    exclude_column=exclude_column,
+                    rename_list=rename_list,
+                    projection=projection,
+                    catalog_version=self.version,
+                    column_kinds=tuple(self.column_kinds.get((table_name, column), "categorical") for column, _ in projection)
+                                 if projection is not None else None,
+                )
+        return self._table_metadata[key]
+
+    def _projection(self, table_name: str, exclude_column: frozenset, rename_list: dict) -> tuple | None:
+        """
+            Kept columns of <table_name> with their output name, same result as filter_process_data on SELECT *.
+            No exclude column -> all columns without rename
+        """
+        columns = self.table_columns.get(table_name)
+        if not columns:
+            return None
+        if not exclude_column:
+            return tuple((column, column) for column in columns)
+
+        # view_column -> column, later column win on same view_column (same as renaming dict keys)
+        projection: dict[str, str] = {}
+        for column in columns:
+            if column.lower() not in exclude_column:
+                projection[rename_list.get(column, column)] = column
+        return tuple((column, view_column) for view_column, column in projection.items())
+
+    def prefetch_metadata(self, table_list: list, defective_flag: bool) -> dict:
+        """Metadata bundle {table_name: TableMetadata | None} of every table in <table_list> from this snapshot"""
+        return {table_name: self.table_metadata(table_name, defective_flag) for table_name in table_list}
+
+    def prefetch_combined_metadata(self, table_list: list) -> dict:
+        """Metadata bundle {table_name: (process TableMetadata, defective TableMetadata) | None} for combined retrieval"""
+        bundle = {}
+        for table_name in table_list:
+            process_metadata = self.table_metadata(table_name, defective_flag=False)
+            bundle[table_name] = (process_metadata, self.table_metadata(table_name, defective_flag=True)) if process_metadata else None
+        return bundle
+
+
+def load_warehouse_catalog(version: int = 1) -> WarehouseCatalog:
+    """Load all config tables from DWH and build a new catalog snapshot"""
+    with get_pg_session() as pg_session:
+        warehouse_rows = pg_session.execute(CONFIG_WAREHOUSE_TABLE_QRY).fetchall()
+        link_code_rows = pg_session.execute(CONFIG_LINK_CODE_QRY).fetchall()
+        table_field_rows = pg_session.execute(CONFIG_TABLE_FIELD_QRY).fetchall()
+
+        # Without column list, retrieval fall back to SELECT * & filtering in Python
+        try:
+            table_column_rows = pg_session.execute(CONFIG_TABLE_COLUMN_QRY).fetchall()
+        except Exception as e:
+            pg_session.rollback()
+            logger.warning(f"Error loading warehouse table columns, retrieve with SELECT *: {e}")
+            table_column_rows = []
+
+        # Without key, paging fall back to server-side cursor
+        try:
+            table_key_rows = pg_session.execute(CONFIG_TABLE_KEY_QRY).fetchall()
+        except Exception as e:
+            pg_session.rollback()
+            logger.warning(f"Error loading warehouse table keys, page with server-side cursor: {e}")
+            table_key_rows = []
+
+    fingerprint = hash((
+        tuple(sorted((tuple(row) for row in warehouse_rows), key=_sort_key)),
+        tuple(sorted((tuple(row) for row in link_code_rows), key=_sort_key)),
+        tuple(sorted((tuple(row) for row in table_field_rows), key=_sort_key)),
+        tuple(tuple(row) for row in table_column_rows),
+        tuple(tuple(row) for row in table_key_rows),
+    ))
+
+    return WarehouseCatalog(version, fingerprint, warehouse_rows, link_code_rows, table_field_rows,
+                            table_column_rows, table_key_rows)
+
+
+class WarehouseCatalogCache:
+    """
+        Holder of the current WarehouseCatalog.
+        Reload on TTL or on NOTIFY, the new snapshot is swapped in with a single reference assignment,
+        so readers always see either the old or the new catalog, never a half-built one.
+        Version only increases when the config content changed.
+    """
+
+    def __init__(self, ttl: int = CATALOG_TTL):
+        self.ttl = ttl
+        self._catalog: WarehouseCatalog | None = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+        self._refresh_task: asyncio.Task | None = None
+
+    @property
+    def version(self) -> int:
+        return self._catalog.version if self._catalog else 0
+
+    def is_stale(self) -> bool:
+        return self._catalog is None or time.monotonic() >= self._expires_at
+
+    def invalidate(self):
+        """Mark current catalog as expired, next call will reload"""
+        self._expires_at = 0.0
+
+    def refresh(self, force: bool = True) -> WarehouseCatalog:
+        """Reload config tables (only one loader at a time)"""
+        with self._lock:
+            if not force and not self.is_stale():
+                return self._catalog  # type:ignore
+
+            try:
+                catalog = load_warehouse_catalog(version=self.version + 1)
+            except Exception as e:
+                if self._catalog is None:
+                    raise
+                logger.error(f"Error reloading warehouse catalog, keep version {self.version}: {e}")
+                self._expires_at = time.monotonic() + CATALOG_RETRY_INTERVAL
+                return self._catalog
+
+            if self._catalog is None or catalog.fingerprint != self._catalog.fingerprint:
+                self._catalog = catalog
+                logger.info(f"Warehouse catalog loaded: version {catalog.version}, {len(catalog.tables)} tables")
+            else:
+                self._catalog.loaded_at = catalog.loaded_at
+
+            self._expires_at = time.monotonic() + self.ttl
+            return self._catalog
+
+    def get(self) -> WarehouseCatalog:
+        """Get current catalog, reload first if stale"""
+        if self.is_stale():
+            return self.refresh(force=False)
+        return self._catalog  # type:ignore
+
+    async def get_async(self) -> WarehouseCatalog:
+        """
+            Get current catalog from async code. Stale catalog is returned at once (stale-while-revalidate)
+            and one background task reloads it in a worker thread, requests only wait for the very first load.
+        """
+        if self._catalog is None:
+            return await asyncio.to_thread(self.refresh, False)
+        if self.is_stale() and (self._refresh_task is None or self._refresh_task.done()):
+            self._refresh_task = asyncio.create_task(asyncio.to_thread(self.refresh, False))
+        return self._catalog
+
+
+catalog_cache = WarehouseCatalogCache()
+
+def get_catalog() -> WarehouseCatalog:
+    """Get current warehouse catalog (sync)"""
+    return catalog_cache.get()
+
+async def get_catalog_async() -> WarehouseCatalog:
+    """Get current warehouse catalog (async)"""
+    return await catalog_cache.get_async()
+
+
+#################################################################################
+########################    LISTEN/NOTIFY Section    ############################
+#################################################################################
+
+CATALOG_NOTIFY_TRIGGER_SQL = f"""
+CREATE OR REPLACE FUNCTION notify_dwh_catalog_changed() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('{CATALOG_NOTIFY_CHANNEL}', TG_TABLE_NAME);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+""" + "".join(f"""
+DROP TRIGGER IF EXISTS trg_dwh_catalog_changed ON {table_name};
+CREATE TRIGGER trg_dwh_catalog_changed
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table_name}
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_dwh_catalog_changed();
+""" for table_name in ("CONFIG_WAREHOUSE_TABLE", "CONFIG_LINK_CODE", "CONFIG_TABLE_FIELD"))
+
+
+def install_catalog_notify_trigger():
+    """Install NOTIFY trigger on the config tables (run once by DBA / deployment)"""
+    with get_pg_engine().begin() as conn:
+        conn.exec_driver_sql(CATALOG_NOTIFY_TRIGGER_SQL)
+    logger.info(f"Catalog NOTIFY trigger installed on channel '{CATALOG_NOTIFY_CHANNEL}'")
+
+
+async def listen_catalog_changes(cache: WarehouseCatalogCache = catalog_cache, debounce: float = 0.5):
+    """
+        Background task: LISTEN on the catalog channel and reload the catalog on NOTIFY,
+        or when TTL passes without any notification. Reconnect on connection error.
+    """
+    while True:
+        try:
+            async with await psycopg.AsyncConnection.connect(listen_conninfo(), autocommit=True) as conn:
+                await conn.execute(f"LISTEN {CATALOG_NOTIFY_CHANNEL}")
+                logger.info(f"Listening for warehouse catalog changes on '{CATALOG_NOTIFY_CHANNEL}'")
+
+                while True:
+                    notified = [notify async for notify in conn.notifies(timeout=cache.ttl, stop_after=1)]
+
+                    # Coalesce burst of NOTIFY (one per statement) into one reload
+                    if notified:
+                        notified += [notify async for notify in conn.notifies(timeout=debounce)]
+                        logger.info(f"Warehouse catalog changed: {sorted({notify.payload for notify in notified})}")
+
+                    await asyncio.to_thread(cache.refresh)
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error in warehouse catalog listener: {e}")
+            cache.invalidate()
+            await asyncio.sleep(CATALOG_RETRY_INTERVAL)
+
+
+if __name__ == "__main__":
+    print("📚 Installing warehouse catalog NOTIFY trigger...")
+    install_catalog_notify_trigger()
+
+    catalog = get_catalog()
+    print(f"  version: {catalog.version}")
+    print(f"  tables: {len(catalog.tables)}, link codes: {sum(len(v) for v in catalog.link_codes.values())}, lot tables: {len(catalog.lot_tables)}")
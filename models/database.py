@@ -1,15 +1,23 @@
 from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncEngine, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.exc import SQLAlchemyError, DisconnectionError
+from sqlalchemy.exc import SQLAlchemyError, DisconnectionError, TimeoutError as PoolTimeoutError
+from collections import OrderedDict
 import os
 import logging
-from sqlalchemy.pool import QueuePool
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+import asyncio
 import psycopg2
+from psycopg.pq import TransactionStatus
 import time
 from datetime import datetime
 from dotenv import load_dotenv
 
+from models.metrics import POOL_WAIT, POOL_TIMEOUTS
+from models.query_log import query_log
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
@@ -29,24 +37,97 @@ if not PG_CONNECTION_STRING:
 
     PG_CONNECTION_STRING = f"postgresql://{PG_USERNAME}:{PG_PASSWORD}@{PG_HOSTNAME}:{PG_PORT}/{PG_DATABASE}"
 
+## ⚡ Async PostgreSQL connection (psycopg 3 driver) for the MCP tool routes, built from PG_CONNECTION_STRING when unset
+PG_ASYNC_CONNECTION_STRING = os.getenv("PG_ASYNC_CONNECTION_STRING")
+
+
+def pg_async_connection_string() -> str:
+    """Async engine URL: PG_ASYNC_CONNECTION_STRING or PG_CONNECTION_STRING with the psycopg 3 driver (parsed on first connect, not at import)"""
+    return PG_ASYNC_CONNECTION_STRING or \
+        make_url(PG_CONNECTION_STRING).set(drivername="postgresql+psycopg").render_as_string(hide_password=False)
+
+
+## ⚙️ Connection pool settings (override through environment)
+PG_POOL_SIZE = int(os.getenv("PG_POOL_SIZE", "10"))
+PG_MAX_OVERFLOW = int(os.getenv("PG_MAX_OVERFLOW", "20"))
+PG_POOL_RECYCLE = int(os.getenv("PG_POOL_RECYCLE", "3600"))  # Recycle connections every hour
+PG_POOL_TIMEOUT = int(os.getenv("PG_POOL_TIMEOUT", "30"))  # Timeout for getting connection from pool
+PG_POOL_WARM_SIZE = int(os.getenv("PG_POOL_WARM_SIZE", str(PG_POOL_SIZE)))  # Async connections pre-opened at startup
+# Sync engine only serves the catalog & lot index loaders (background, one query at a time each): small pool, no warm up
+PG_SYNC_POOL_SIZE = int(os.getenv("PG_SYNC_POOL_SIZE", "2"))
+PG_SYNC_MAX_OVERFLOW = int(os.getenv("PG_SYNC_MAX_OVERFLOW", "2"))
+# Server-side paging cursors hold their connection between page requests: own small pool, outside the tool pool budget
+PG_CURSOR_POOL_SIZE = int(os.getenv("PG_CURSOR_POOL_SIZE", "4"))
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", str(min(8, PG_POOL_SIZE))))  # Max pooled connections used by one summary fan-out
+
+## 🧾 Server-side prepared statements of async engine (psycopg 3), "none" disable (e.g. behind PgBouncer transaction pooling)
+PG_PREPARE_THRESHOLD = None if os.getenv("PG_PREPARE_THRESHOLD", "5").lower() in ("", "none") else int(os.getenv("PG_PREPARE_THRESHOLD", "5"))
+PG_PREPARED_MAX = int(os.getenv("PG_PREPARED_MAX", "100"))  # Prepared statements kept per connection (LRU)
+
+
+#################################################################################
+########################     Timed Pool Section      ############################
+#################################################################################
+
+class _TimedPoolMixin:
+    """Measure checkout of the pool: wait on the queue (pool saturated) + opening of a new / overflow connection"""
+    engine_label = "-"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            # Pool & overflow all checked out during pool_timeout seconds
+            POOL_TIMEOUTS.labels(engine=self.engine_label).inc()
+            raise
+        finally:
+            POOL_WAIT.labels(engine=self.engine_label).observe(time.perf_counter() - started)
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    engine_label = "sync"
+
+
+class TimedAsyncAdaptedQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    engine_label = "async"
+
+
+class TimedCursorPool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    engine_label = "cursor"
+
+
+def pool_status(engine) -> dict:
+    """Gauges of the QueuePool of <engine>: configured size, connections checked out / idle / overflow"""
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": pool._max_overflow,
+    }
+
 
 _pg_engine = None
+_pg_sessionmaker = None
 
 def get_pg_engine():
-    """Get PostgreSQL engine with connection pooling and proper cleanup"""
+    """Get the sync PostgreSQL engine (catalog & lot index loaders, benchmarks), created on first use"""
     global _pg_engine
     if _pg_engine is None:
         try:
             _pg_engine = create_engine(
                 PG_CONNECTION_STRING, # type:ignore
-                poolclass=QueuePool,
-                pool_size=10,
-                max_overflow=20,
+                poolclass=TimedQueuePool,
+                pool_size=PG_SYNC_POOL_SIZE,
+                max_overflow=PG_SYNC_MAX_OVERFLOW,
                 pool_pre_ping=True,
-                pool_recycle=3600,  # Recycle connections every hour
-                pool_timeout=30,  # Timeout for getting connection from pool
+                pool_recycle=PG_POOL_RECYCLE,
+                pool_timeout=PG_POOL_TIMEOUT,
                 connect_args={"connect_timeout": 10, "application_name": "mtlb_api", "sslmode": "prefer"},
             )
+            query_log.attach(_pg_engine)
             logger.info("PostgreSQL engine created successfully")
         except Exception as e:
             logger.error(f"Error creating PostgreSQL engine: {e}")
@@ -55,6 +136,246 @@ def get_pg_engine():
     return _pg_engine
 
 
+def get_pg_session() -> Session:
+    """
+        Get a new Session bound to the shared engine.
+        Use as context manager, the connection is checked out on first query and returned to the pool on close.
+    """
+    global _pg_sessionmaker
+    if _pg_sessionmaker is None:
+        _pg_sessionmaker = sessionmaker(bind=get_pg_engine())
+
+    return _pg_sessionmaker()
+
+
+def dispose_pg_engine():
+    """Close all pooled connections. Call only once at application shutdown."""
+    global _pg_engine, _pg_sessionmaker
+    if _pg_engine is not None:
+        _pg_engine.dispose()
+        logger.info("PostgreSQL engine disposed")
+
+    _pg_engine = None
+    _pg_sessionmaker = None
+
+
+#################################################################################
+######################     Prepared Statement Section     #######################
+#################################################################################
+
+class PlanCacheStats:
+    """
+        Estimate how often statements of the async engine run as server-side prepared statement.
+
+        psycopg prepares a statement on a connection after it ran <prepare_threshold> times there,
+        and keeps the last <prepared_max> of them. The same rule is replayed per pooled connection here
+        (statement text as key): "estimated_hit" is an execution that should have reused a server-side plan.
+        It is not read from the server, behind PgBouncer (transaction mode) or after DEALLOCATE it is wrong,
+        sample_prepared_statements() reads what the server really holds.
+    """
+
+    def __init__(self, prepare_threshold: int | None = PG_PREPARE_THRESHOLD, prepared_max: int = PG_PREPARED_MAX):
+        self.prepare_threshold = prepare_threshold
+        self.prepared_max = prepared_max
+        self.stats = {"execute": 0, "skip": 0, "estimated_prepare": 0, "estimated_hit": 0}
+
+    def attach(self, engine):
+        """Count executions of <engine> (sync engine of AsyncEngine) & apply prepared_max to its new connections"""
+        event.listen(engine, "connect", self._connect)
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "rollback", self._rollback)
+
+    def _connect(self, dbapi_connection, connection_record):
+        dbapi_connection.driver_connection.prepared_max = self.prepared_max
+
+    def _rollback(self, conn):
+        # psycopg forgets (DEALLOCATE ALL) the prepared statements of a connection on ROLLBACK
+        if not conn.invalidated:
+            conn.connection.info.pop("plan_cache_counts", None)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        # executemany & server-side (named) cursor are never prepared by psycopg
+        if executemany or self.prepare_threshold is None or (context is not None and context.execution_options.get("stream_results")):
+            self.stats["skip"] += 1
+            return
+
+        # Counts live with the DBAPI connection, gone when the pool close / invalidate it
+        counts = conn.connection.info.setdefault("plan_cache_counts", OrderedDict())
+        count = counts.pop(statement, 0)
+        counts[statement] = count + 1
+        while len(counts) > self.prepared_max:
+            counts.popitem(last=False)
+
+        self.stats["execute"] += 1
+        if count > self.prepare_threshold:
+            self.stats["estimated_hit"] += 1
+        elif count == self.prepare_threshold:
+            self.stats["estimated_prepare"] += 1
+
+    def snapshot(self) -> dict:
+        """Counters & estimated hit rate, for monitoring"""
+        return {
+            **self.stats,
+            "prepare_threshold": self.prepare_threshold,
+            "prepared_max": self.prepared_max,
+            "estimated_hit_rate": round(self.stats["estimated_hit"] / self.stats["execute"], 4) if self.stats["execute"] else None,
+        }
+
+
+plan_cache = PlanCacheStats()
+
+
+class PreparedAsyncSession(AsyncSession):
+    """
+        AsyncSession that ends a clean transaction with COMMIT instead of ROLLBACK.
+        psycopg drops the prepared statements of a connection on every ROLLBACK (the default end of a session),
+        so without it no statement would stay prepared past one pool checkout.
+        Async engine only runs SELECT, an error / aborted transaction is still rolled back.
+    """
+
+    async def __aexit__(self, type_, value, traceback):
+        if type_ is None and self.in_transaction():
+            driver_connection = (await (await self.connection()).get_raw_connection()).driver_connection
+            if driver_connection.info.transaction_status == TransactionStatus.INTRANS:
+                await self.commit()
+        await super().__aexit__(type_, value, traceback)
+
+
+_pg_async_engine: AsyncEngine | None = None
+_pg_async_sessionmaker: async_sessionmaker[PreparedAsyncSession] | None = None
+
+def get_pg_async_engine() -> AsyncEngine:
+    """Get async PostgreSQL engine (psycopg 3) with its own connection pool, sized like the sync engine"""
+    global _pg_async_engine
+    if _pg_async_engine is None:
+        try:
+            _pg_async_engine = create_async_engine(
+                pg_async_connection_string(),
+                poolclass=TimedAsyncAdaptedQueuePool,
+                pool_size=PG_POOL_SIZE,
+                max_overflow=PG_MAX_OVERFLOW,
+                pool_pre_ping=True,
+                pool_recycle=PG_POOL_RECYCLE,
+                pool_timeout=PG_POOL_TIMEOUT,
+                pool_use_lifo=True,  # Reuse the most recent connection, where statements are already prepared
+                connect_args={"connect_timeout": 10, "application_name": "mtlb_api_async", "sslmode": "prefer",
+                              "prepare_threshold": PG_PREPARE_THRESHOLD},
+            )
+            plan_cache.attach(_pg_async_engine.sync_engine)
+            query_log.attach(_pg_async_engine.sync_engine)
+            logger.info("PostgreSQL async engine created successfully")
+        except Exception as e:
+            logger.error(f"Error creating PostgreSQL async engine: {e}")
+            raise
+
+    return _pg_async_engine
+
+
+def get_pg_async_session() -> AsyncSession:
+    """
+        Get a new AsyncSession bound to the shared async engine.
+        Use as async context manager, the connection is returned to the pool on close.
+    """
+    global _pg_async_sessionmaker
+    if _pg_async_sessionmaker is None:
+        _pg_async_sessionmaker = async_sessionmaker(bind=get_pg_async_engine(), class_=PreparedAsyncSession, expire_on_commit=False)
+
+    return _pg_async_sessionmaker()
+
+
+_pg_cursor_engine: AsyncEngine | None = None
+
+def get_pg_cursor_engine() -> AsyncEngine:
+    """
+        Get async engine of the server-side paging cursors (models/paging.py), PG_CURSOR_POOL_SIZE connections, no overflow:
+        a cursor idle between two pages holds one of them, never a connection of the tool pool
+    """
+    global _pg_cursor_engine
+    if _pg_cursor_engine is None:
+        try:
+            _pg_cursor_engine = create_async_engine(
+                pg_async_connection_string(),
+                poolclass=TimedCursorPool,
+                pool_size=PG_CURSOR_POOL_SIZE,
+                max_overflow=0,
+                pool_pre_ping=True,
+                pool_recycle=PG_POOL_RECYCLE,
+                pool_timeout=PG_POOL_TIMEOUT,
+                connect_args={"connect_timeout": 10, "application_name": "mtlb_api_cursor", "sslmode": "prefer",
+                              "prepare_threshold": None},  # Named cursors are never prepared
+            )
+            query_log.attach(_pg_cursor_engine.sync_engine)
+            logger.info("PostgreSQL cursor engine created successfully")
+        except Exception as e:
+            logger.error(f"Error creating PostgreSQL cursor engine: {e}")
+            raise
+
+    return _pg_cursor_engine
+
+
+async def sample_prepared_statements() -> dict:
+    """
+        Prepared statements the server really holds on one pooled async connection (the most recently used one, LIFO pool):
+        pg_prepared_statements of that session, protocol-level ones are those psycopg prepared
+    """
+    try:
+        async with get_pg_async_engine().connect() as conn:
+            row = (await conn.execute(text("""
+                SELECT COUNT(*) AS PREPARED, COUNT(*) FILTER (WHERE NOT FROM_SQL) AS PROTOCOL_PREPARED
+                FROM PG_PREPARED_STATEMENTS
+            """))).one()
+        return {"sampled_connections": 1, "prepared": row.prepared, "protocol_prepared": row.protocol_prepared}
+    except Exception as e:
+        logger.error(f"Error sampling prepared statements: {e}")
+        return {"sampled_connections": 0, "error": str(e)}
+
+
+async def init_pg_async_engine(warm_size: int | None = None):
+    """Create the async PostgreSQL engine for the application lifetime and pre-open pooled connections"""
+    engine = get_pg_async_engine()
+    warm_size = min(PG_POOL_WARM_SIZE if warm_size is None else warm_size, PG_POOL_SIZE)
+
+    # Open warm connections concurrently, then return them to the pool
+    results = await asyncio.gather(*(engine.connect().start() for _ in range(warm_size)), return_exceptions=True)
+    connections = [result for result in results if not isinstance(result, BaseException)]
+    errors = [result for result in results if isinstance(result, BaseException)]
+
+    if errors:
+        logger.error(f"Error warming PostgreSQL async pool: {errors[0]}")
+    logger.info(f"PostgreSQL async pool warmed with {len(connections)} connections")
+
+    await asyncio.gather(*(connection.close() for connection in connections), return_exceptions=True)
+
+    return engine
+
+
+async def dispose_pg_async_engine():
+    """Close all async pooled connections (tool & cursor pools). Call only once at application shutdown."""
+    global _pg_async_engine, _pg_async_sessionmaker, _pg_cursor_engine
+    if _pg_async_engine is not None:
+        await _pg_async_engine.dispose()
+        logger.info("PostgreSQL async engine disposed")
+    if _pg_cursor_engine is not None:
+        await _pg_cursor_engine.dispose()
+        logger.info("PostgreSQL cursor engine disposed")
+
+    _pg_async_engine = None
+    _pg_async_sessionmaker = None
+    _pg_cursor_engine = None
+
+
+def engine_pool_status() -> dict:
+    """Pool gauges of each created engine ("sync" / "async" / "cursor"), for monitoring"""
+    status = {}
+    if _pg_engine is not None:
+        status["sync"] = pool_status(_pg_engine)
+    if _pg_async_engine is not None:
+        status["async"] = pool_status(_pg_async_engine.sync_engine)
+    if _pg_cursor_engine is not None:
+        status["cursor"] = pool_status(_pg_cursor_engine.sync_engine)
+    return status
+
+
 def get_pg_connection():
     """Get PostgreSQL connection with proper context management"""
     engine = get_pg_engine()
@@ -0,0 +1,167 @@
+from sqlalchemy.sql.elements import TextClause
+from typing import AsyncIterator
+import os
+import time
+import secrets
+import logging
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from psycopg.types.numeric import FloatLoader
+from dotenv import load_dotenv
+
+# get async postgres engine from database module
+from models.database import get_pg_async_engine
+from models.query_log import query_log
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+## 📦 Bulk export settings (override through environment)
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "50000"))  # Rows in memory at once = one Parquet row group
+EXPORT_DATE_COLUMN = os.getenv("EXPORT_DATE_COLUMN", "UPDATE_DATE")  # Column of date_from / date_to filter
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def compile_statement(statement: TextClause, dialect) -> tuple[str, dict]:
+    """SQL string (psycopg placeholders) & parameters of a text() statement, to run on the raw psycopg connection"""
+    compiled = statement.compile(dialect=dialect)
+    return str(compiled), compiled.params
+
+
+#################################################################################
+########################        CSV Export Section     ##########################
+#################################################################################
+
+async def copy_csv_stream(statement: TextClause) -> AsyncIterator[bytes]:
+    """
+        Stream result of <statement> as CSV (with header) through COPY ... TO STDOUT.
+        Chunks are sent as PostgreSQL produces them, nothing is held in memory.
+        Raw driver cursor bypass the engine events: the statement is recorded in the query log / metrics once streamed.
+    """
+    async with get_pg_async_engine().connect() as connection:
+        sql, params = compile_statement(statement, connection.dialect)
+        driver_connection = (await connection.get_raw_connection()).driver_connection
+        copy_sql = f"COPY ({sql}) TO STDOUT WITH (FORMAT CSV, HEADER)"
+
+        async with driver_connection.cursor() as cursor:
+            started = time.perf_counter()
+            try:
+                # COPY has no server-side parameter, psycopg bind them client-side
+                async with cursor.copy(copy_sql, params) as copy:
+                    async for chunk in copy:
+                        yield bytes(chunk)
+            finally:
+                query_log.record(copy_sql, time.perf_counter() - started, max(cursor.rowcount, 0))
+
+
+#################################################################################
+########################      Parquet Export Section   ##########################
+#################################################################################
+
+# PostgreSQL type OID -> Arrow type, other types are written as string
+_ARROW_TYPES = {
+    16: pa.bool_(),                          # bool
+    20: pa.int64(), 21: pa.int64(), 23: pa.int64(),    # int8, int2, int4
+    700: pa.float64(), 701: pa.float64(),    # float4, float8
+    1700: pa.float64(),                      # numeric (same as JSON output)
+    1082: pa.date32(),                       # date
+    1114: pa.timestamp("us"),                # timestamp
+    1184: pa.timestamp("us", tz="UTC"),      # timestamptz
+    25: pa.string(), 1043: pa.string(), 1042: pa.string(),  # text, varchar, bpchar
+}
+
+def arrow_schema(description) -> pa.Schema:
+    """Arrow schema of cursor <description>, fixed from the column types so every chunk has the same schema"""
+    return pa.schema([(column.name, _ARROW_TYPES.get(column.type_code, pa.string())) for column in description])
+
+
+class _ChunkSink:
+    """Write-only file for ParquetWriter: keep written bytes until drained, position keep counting"""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+async def parquet_stream(statement: TextClause, chunk_rows: int = EXPORT_CHUNK_ROWS) -> AsyncIterator[bytes]:
+    """
+        Stream result of <statement> as a Parquet file, read through a server-side cursor <chunk_rows> rows at a time.
+        Each chunk is converted with pandas and written as one row group, then sent.
+        Raw driver cursor bypass the engine events: the statement is recorded in the query log / metrics once streamed.
+    """
+    async with get_pg_async_engine().connect() as connection:
+        sql, params = compile_statement(statement, connection.dialect)
+        driver_connection = (await connection.get_raw_connection()).driver_connection
+
+        async with driver_connection.cursor(name=f"export_{secrets.token_hex(8)}") as cursor:
+            # numeric loaded straight as float (Arrow double), no Decimal object per value
+            cursor.adapters.register_loader("numeric", FloatLoader)
+            started = time.perf_counter()
+            row_count = 0
+            try:
+                await cursor.execute(sql, params)
+            except Exception:
+                query_log.record(sql, time.perf_counter() - started, 0)
+                raise
+            schema = arrow_schema(cursor.description)
+            text_columns = [field.name for field, column in zip(schema, cursor.description)
+                            if field.type == pa.string() and column.type_code not in _ARROW_TYPES]
+
+            sink = _ChunkSink()
+            writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema)
+            try:
+                while rows := await cursor.fetchmany(chunk_rows):
+                    row_count += len(rows)
+                    frame = pd.DataFrame.from_records(rows, columns=schema.names)
+                    # uuid / json / interval ... -> text
+                    for column in text_columns:
+                        frame[column] = frame[column].map(lambda value: value if value is None else str(value))
+                    writer.write_table(pa.Table.from_pandas(frame, schema=schema, preserve_index=False))
+                    yield sink.drain()
+            finally:
+                writer.close()
+                query_log.record(sql, time.perf_counter() - started, row_count)
+
+            yield sink.drain()
+
+
+async def start_stream(stream: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """
+        Run <stream> until its first chunk, so a query error is raised before the response status is sent.
+        Return iterator of all chunks (first one included)
+    """
+    first_chunk = await anext(stream, b"")
+
+    async def chunks():
+        try:
+            yield first_chunk
+            async for chunk in stream:
+                yield chunk
+        finally:
+            await stream.aclose()
+
+    return chunks()
@@ -0,0 +1,284 @@
+from sqlalchemy import text
+from collections import OrderedDict
+from typing import NamedTuple
+import os
+import time
+import asyncio
+import logging
+import threading
+from dotenv import load_dotenv
+
+# get postgres session from database module
+from models.database import get_pg_session
+from models.catalog import get_catalog, quote_name
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+## 🗂️ Lot location index settings (override through environment)
+LOT_INDEX_ENABLED = os.getenv("LOT_INDEX_ENABLED", "1") == "1"
+LOT_INDEX_PERSIST = os.getenv("LOT_INDEX_PERSIST", "0") == "1"  # Opt-in: keep side table in DWH (DDL + writes), fast rebuild at startup
+LOT_INDEX_TABLE = os.getenv("LOT_INDEX_TABLE", "LOT_LOCATION_INDEX")
+LOT_INDEX_STATE_TABLE = os.getenv("LOT_INDEX_STATE_TABLE", "LOT_LOCATION_INDEX_STATE")
+LOT_INDEX_WATERMARK_COLUMN = os.getenv("LOT_INDEX_WATERMARK_COLUMN", "UPDATE_DATE")  # Timestamp column of newest rows
+LOT_INDEX_SYNC_INTERVAL = int(os.getenv("LOT_INDEX_SYNC_INTERVAL", "60"))  # Background incremental sync
+# Full re-read of every table (catch rows with backdated / NULL watermark), incremental sync in between
+LOT_INDEX_FULL_SYNC_INTERVAL = int(os.getenv("LOT_INDEX_FULL_SYNC_INTERVAL", "3600"))
+LOT_INDEX_NEGATIVE_TTL = float(os.getenv("LOT_INDEX_NEGATIVE_TTL", "30"))  # Unknown lot rejected without probing for this many seconds
+LOT_INDEX_NEGATIVE_MAX = int(os.getenv("LOT_INDEX_NEGATIVE_MAX", "10000"))  # Unknown lots remembered (oldest dropped first)
+
+## 🔎 Lot probe settings, when lot is not in index (every LOT_INFO table is probed)
+# union: one UNION ALL statement | concurrent: one pooled connection per table, first hit wins | sequential: one table at a time
+LOT_PROBE_MODE = os.getenv("LOT_PROBE_MODE", "union")
+LOT_PROBE_CONCURRENCY = int(os.getenv("LOT_PROBE_CONCURRENCY", "8"))  # Max connections used by concurrent probe
+
+
+class LotLocation(NamedTuple):
+    """Location of a lot: LOT_INFO table and product of the lot"""
+    table_name: str
+    product: str | None
+
+
+#################################################################################
+########################     Lot Index Section       ############################
+#################################################################################
+
+class LotLocationIndex:
+    """
+        In-memory hash index lotno -> (table_name, product) of all LOT_INFO tables (CONFIG_TABLE_FIELD targets).
+
+        - Bulk built at startup (from the side table if LOT_INDEX_PERSIST, else from each LOT_INFO table)
+        - Updated incrementally from rows newer than the per-table watermark (LOT_INDEX_WATERMARK_COLUMN),
+          every table re-read in full each LOT_INDEX_FULL_SYNC_INTERVAL (rows with backdated / NULL watermark)
+        - Miss is final while the index is fresh (sync finished within LOT_INDEX_SYNC_INTERVAL): rejected without any query
+        - Otherwise lot_mapper probes every LOT_INFO table, add() the hit or add_missing() the unknown lot,
+          which is then rejected without probing for LOT_INDEX_NEGATIVE_TTL seconds (negative cache)
+    """
+
+    def __init__(self):
+        self.ready = False
+        self._locations: dict[str, LotLocation] = {}
+        self._watermarks: dict[str, object] = {}       # table_name -> newest watermark value synced
+        self._incremental_tables: set[str] = set()      # table that has watermark column
+        self._pending: dict[str, LotLocation] = {}      # found by probing, persist at next sync
+        self._missing: OrderedDict[str, float] = OrderedDict()  # unknown lotno -> expiry (monotonic)
+        self._persist = LOT_INDEX_PERSIST
+        self._lock = threading.Lock()
+        self.synced_at = 0.0       # Monotonic time of the last finished build / sync
+        self._full_synced_at = 0.0
+        self.stats = {"hit": 0, "miss": 0, "reject": 0, "probe_found": 0, "probe_missing": 0}
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+    def lookup(self, lotno: str) -> LotLocation | None:
+        """O(1) lookup of lot location"""
+        location = self._locations.get(lotno)
+        self.stats["hit" if location else "miss"] += 1
+        return location
+
+    def is_fresh(self, max_age: float = LOT_INDEX_SYNC_INTERVAL) -> bool:
+        """Index built & synced within <max_age> seconds: a miss is final"""
+        return self.ready and time.monotonic() - self.synced_at <= max_age
+
+    def is_missing(self, lotno: str) -> bool:
+        """Known unknown lot (fresh index or negative cache): reject without probing"""
+        if self.is_fresh():
+            return True
+        expires_at = self._missing.get(lotno)
+        if expires_at is None:
+            return False
+        if time.monotonic() >= expires_at:
+            self._missing.pop(lotno, None)
+            return False
+        return True
+
+    def add(self, lotno: str, table_name: str, product: str | None):
+        """Add lot location found by probing (persisted at next sync)"""
+        location = LotLocation(table_name, product)
+        self._locations.setdefault(lotno, location)
+        self._pending[lotno] = location
+        self.stats["probe_found"] += 1
+
+    def add_missing(self, lotno: str, ttl: float = LOT_INDEX_NEGATIVE_TTL):
+        """Remember a lot no table holds, bounded to LOT_INDEX_NEGATIVE_MAX lots"""
+        self._missing[lotno] = time.monotonic() + ttl
+        self._missing.move_to_end(lotno)
+        while len(self._missing) > LOT_INDEX_NEGATIVE_MAX:
+            self._missing.popitem(last=False)
+        self.stats["probe_missing"] += 1
+
+    # ----- Build & Sync -----
+
+    def build(self):
+        """Bulk build index at startup"""
+        with self._lock:
+            started = time.monotonic()
+            lot_tables = get_catalog().lot_tables
+
+            with get_pg_session() as pg_session:
+                self._incremental_tables = self._find_incremental_tables(pg_session, lot_tables)
+
+                if self._persist:
+                    self._load_side_table(pg_session)
+
+                # Persisted table only need its newest rows, others are read in bulk
+                for table_name in lot_tables:
+                    if table_name in self._incremental_tables or table_name not in self._watermarks:
+                        self._sync_table(pg_session, table_name)
+
+                self._flush(pg_session)
+
+            self.ready = True
+            self.synced_at = self._full_synced_at = time.monotonic()
+            logger.info(f"Lot index built: {len(self._locations)} lots in {len(lot_tables)} tables ({time.monotonic() - started:.2f}s)")
+
+    def sync(self):
+        """Incremental sync: newest rows of each table since last watermark (all rows each LOT_INDEX_FULL_SYNC_INTERVAL)"""
+        with self._lock:
+            lot_tables = get_catalog().lot_tables
+            full = time.monotonic() - self._full_synced_at >= LOT_INDEX_FULL_SYNC_INTERVAL
+
+            with get_pg_session() as pg_session:
+                # New LOT_INFO table in catalog -> check watermark column again
+                if set(lot_tables) - set(self._watermarks) - self._incremental_tables:
+                    self._incremental_tables = self._find_incremental_tables(pg_session, lot_tables)
+
+                for table_name in lot_tables:
+                    if full or table_name in self._incremental_tables or table_name not in self._watermarks:
+                        self._sync_table(pg_session, table_name, full)
+
+                self._flush(pg_session)
+
+            self.synced_at = time.monotonic()
+            if full:
+                self._full_synced_at = self.synced_at
+
+    def _find_incremental_tables(self, pg_session, lot_tables) -> set:
+        """LOT_INFO table that has LOT_INDEX_WATERMARK_COLUMN"""
+        rows = pg_session.execute(text("""
+            SELECT DISTINCT UPPER(TABLE_NAME) AS TABLE_NAME
+            FROM INFORMATION_SCHEMA.COLUMNS
+            WHERE LOWER(COLUMN_NAME) = LOWER(:column_name)
+            AND UPPER(TABLE_NAME) = ANY(:tables)
+        """), {"column_name": LOT_INDEX_WATERMARK_COLUMN, "tables": list(lot_tables)}).fetchall()
+
+        return {row.table_name for row in rows}
+
+    def _sync_table(self, pg_session, table_name: str, full: bool = False):
+        """Read lots of <table_name> newer than its watermark (all lots on first sync or when <full>)"""
+        incremental = table_name in self._incremental_tables
+        watermark = self._watermarks.get(table_name)
+        since = None if full else watermark
+
+        watermark_column = quote_name(LOT_INDEX_WATERMARK_COLUMN)
+        if incremental:
+            sync_qry = text(f"""
+                SELECT LOTNO, MAX(PRODUCT) AS PRODUCT, MAX({watermark_column}) AS WATERMARK
+                FROM {quote_name(table_name)}
+                {"WHERE " + watermark_column + " >= :watermark" if since is not None else ""}
+                GROUP BY LOTNO
+            """)
+        else:
+            sync_qry = text(f"""
+                SELECT LOTNO, MAX(PRODUCT) AS PRODUCT, NULL AS WATERMARK
+                FROM {quote_name(table_name)}
+                GROUP BY LOTNO
+            """)
+
+        rows = pg_session.execute(sync_qry, {"watermark": since}).fetchall()
+
+        for row in rows:
+            if row.lotno not in self._locations:
+                location = LotLocation(table_name, row.product)
+                self._locations[row.lotno] = location
+                self._pending[row.lotno] = location
+                self._missing.pop(row.lotno, None)
+            if row.watermark is not None and (watermark is None or row.watermark > watermark):
+                watermark = row.watermark
+
+        self._watermarks[table_name] = watermark
+
+    # ----- Side Table -----
+
+    def _load_side_table(self, pg_session):
+        """Create side table if not exist, then load persisted lots & watermarks"""
+        try:
+            pg_session.execute(text(f"""
+                CREATE TABLE IF NOT EXISTS {quote_name(LOT_INDEX_TABLE)} (
+                    LOTNO TEXT NOT NULL,
+                    TABLE_NAME TEXT NOT NULL,
+                    PRODUCT TEXT,
+                    PRIMARY KEY (LOTNO, TABLE_NAME)
+                )
+            """))
+            pg_session.execute(text(f"""
+                CREATE TABLE IF NOT EXISTS {quote_name(LOT_INDEX_STATE_TABLE)} (
+                    TABLE_NAME TEXT PRIMARY KEY,
+                    WATERMARK TIMESTAMP,
+                    SYNCED_AT TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """))
+            pg_session.commit()
+        except Exception as e:
+            pg_session.rollback()
+            logger.warning(f"Lot index side table not available, keep index in memory only: {e}")
+            self._persist = False
+            return
+
+        lot_tables = set(get_catalog().lot_tables)
+
+        # Persisted state only valid for table still in catalog
+        for row in pg_session.execute(text(f"SELECT TABLE_NAME, WATERMARK FROM {quote_name(LOT_INDEX_STATE_TABLE)}")):
+            if row.table_name in lot_tables:
+                self._watermarks[row.table_name] = row.watermark
+
+        for row in pg_session.execute(text(f"SELECT LOTNO, TABLE_NAME, PRODUCT FROM {quote_name(LOT_INDEX_TABLE)} ORDER BY TABLE_NAME")):
+            if row.table_name in self._watermarks:
+                self._locations.setdefault(row.lotno, LotLocation(row.table_name, row.product))
+
+    def _flush(self, pg_session):
+        """Persist new lots & watermarks to side table"""
+        pending, self._pending = self._pending, {}
+        if not self._persist:
+            return
+
+        try:
+            if pending:
+                pg_session.execute(text(f"""
+                    INSERT INTO {quote_name(LOT_INDEX_TABLE)} (LOTNO, TABLE_NAME, PRODUCT)
+                    VALUES (:lotno, :table_name, :product)
+                    ON CONFLICT (LOTNO, TABLE_NAME) DO NOTHING
+                """), [{"lotno": lotno, "table_name": location.table_name, "product": location.product}
+                       for lotno, location in pending.items()])
+
+            pg_session.execute(text(f"""
+                INSERT INTO {quote_name(LOT_INDEX_STATE_TABLE)} (TABLE_NAME, WATERMARK, SYNCED_AT)
+                VALUES (:table_name, :watermark, CURRENT_TIMESTAMP)
+                ON CONFLICT (TABLE_NAME) DO UPDATE SET WATERMARK = EXCLUDED.WATERMARK, SYNCED_AT = EXCLUDED.SYNCED_AT
+            """), [{"table_name": table_name, "watermark": watermark} for table_name, watermark in self._watermarks.items()])
+
+            pg_session.commit()
+        except Exception as e:
+            pg_session.rollback()
+            logger.error(f"Error persisting lot index side table: {e}")
+
+
+lot_index = LotLocationIndex()
+
+
+async def run_lot_index_sync(index: LotLocationIndex = lot_index, interval: int = LOT_INDEX_SYNC_INTERVAL):
+    """Background task: bulk build index, then follow newest rows of each LOT_INFO table"""
+    while True:
+        try:
+            if not index.ready:
+                await asyncio.to_thread(index.build)
+            else:
+                await asyncio.to_thread(index.sync)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error syncing lot index: {e}")
+
+        await asyncio.sleep(interval)
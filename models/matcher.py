@@ -0,0 +1,131 @@
+from collections import deque
+from typing import Iterable, Iterator, Sequence
+import string
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Match only whole tokens, "PAC" should not match inside lot "25XPACB062".
+# ASCII only, so Thai text next to a code still counts as boundary.
+_TOKEN_CHARS = frozenset(string.ascii_lowercase + string.digits)
+
+# Specificity of each matched field, higher bit wins over any combination of lower bits
+FIELD_WEIGHT = {
+    "table_name": 8,
+    "process_name": 4,
+    "process_code": 2,
+    "product_code": 1,
+}
+
+
+#################################################################################
+########################    Aho-Corasick Section     ############################
+#################################################################################
+
+class AhoCorasick:
+    """
+        Multi-pattern automaton: find every occurrence of every pattern in one pass over the text.
+        Patterns are lowercased, search is case-insensitive.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[int]] = [[]]
+        self.patterns: list[str] = []
+
+        for pattern in patterns:
+            self._add(pattern.lower())
+        self._build()
+
+    def _add(self, pattern: str):
+        node = 0
+        for char in pattern:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = next_node
+
+        self._out[node].append(len(self.patterns))
+        self.patterns.append(pattern)
+
+    def _build(self):
+        # BFS, fail link of each node = longest proper suffix that is also a prefix in the trie
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+
+                # Output of child include all output of its fail (suffix) node
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def iter_matches(self, text: str) -> Iterator[tuple[int, int]]:
+        """Yield (start, pattern_id) of every match in <text> (text must already be lowercase)"""
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+
+            for pattern_id in self._out[node]:
+                yield index - len(self.patterns[pattern_id]) + 1, pattern_id
+
+
+#################################################################################
+########################     Info Matcher Section    ############################
+#################################################################################
+
+class InfoMatcher:
+    """
+        Precompiled matcher over info_mapping rows (table_name, process_name, process_code, product_code).
+        Rank candidate rows by most specific matched fields, then by longest match, then by catalog order.
+    """
+
+    def __init__(self, info_rows: Sequence):
+        self.info_rows = tuple(info_rows)
+
+        # pattern -> list of (row_index, field_weight)
+        pattern_values: dict[str, list[tuple[int, int]]] = {}
+        for row_index, row in enumerate(self.info_rows):
+            for field, weight in FIELD_WEIGHT.items():
+                value = getattr(row, field)
+                if value:
+                    pattern_values.setdefault(str(value).lower(), []).append((row_index, weight))
+
+        self._automaton = AhoCorasick(pattern_values)
+        self._values = [pattern_values[pattern] for pattern in self._automaton.patterns]
+
+    def candidates(self, chatInput: str) -> list[tuple[tuple[int, int], object]]:
+        """All matched rows with their score (field_weight_sum, longest_match), best first"""
+        text = chatInput.lower()
+
+        matched_weight: dict[int, int] = {}
+        longest_match: dict[int, int] = {}
+        for start, pattern_id in self._automaton.iter_matches(text):
+            end = start + len(self._automaton.patterns[pattern_id])
+
+            # Whole token only
+            if (start > 0 and text[start - 1] in _TOKEN_CHARS) or (end < len(text) and text[end] in _TOKEN_CHARS):
+                continue
+
+            for row_index, weight in self._values[pattern_id]:
+                matched_weight[row_index] = matched_weight.get(row_index, 0) | weight
+                longest_match[row_index] = max(longest_match.get(row_index, 0), end - start)
+
+        ranked = sorted(matched_weight, key=lambda row_index: (-matched_weight[row_index], -longest_match[row_index], row_index))
+        return [((matched_weight[row_index], longest_match[row_index]), self.info_rows[row_index]) for row_index in ranked]
+
+    def best_match(self, chatInput: str):
+        """Best matched row, or None"""
+        candidates = self.candidates(chatInput)
+        return candidates[0][1] if candidates else None
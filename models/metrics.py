@@ -0,0 +1,135 @@
+from contextvars import ContextVar, Token
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest, disable_created_metrics
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+import os
+import logging
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+## 📈 Metrics settings (override through environment)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+METRICS_LATENCY_BUCKETS = tuple(float(bucket) for bucket in
+    os.getenv("METRICS_LATENCY_BUCKETS", "0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10,30,60").split(","))  # Seconds
+METRICS_QUERY_BUCKETS = tuple(float(bucket) for bucket in
+    os.getenv("METRICS_QUERY_BUCKETS", "0,1,2,5,10,20,50,100,200").split(","))  # DB queries per request
+
+# Own registry: only the application metrics & the scrape-time collectors of routers/metrics_router.py
+registry = CollectorRegistry()
+PROMETHEUS_CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+# No <name>_created sample per counter / histogram label set
+disable_created_metrics()
+
+
+def render_metrics() -> bytes:
+    """Exposition text of every metric & collector of the registry"""
+    return generate_latest(registry)
+
+
+def metric_value(name: str, **labels) -> float:
+    """Current value of one sample (0 if never recorded), e.g. metric_value("dwh_db_queries_total", operation="...")"""
+    return registry.get_sample_value(name, labels) or 0.0
+
+
+# ----- Request metrics (recorded by the metrics middleware in main.py) -----
+REQUESTS = Counter("dwh_requests_total", "HTTP requests by operation, method & status code", ("operation", "method", "status"), registry=registry)
+REQUEST_ERRORS = Counter("dwh_request_errors_total", "Requests that raised, answered >= 400 or returned success false", ("operation",), registry=registry)
+REQUEST_LATENCY = Histogram("dwh_request_duration_seconds", "Request latency until the last body chunk is sent", ("operation",),
+                            buckets=METRICS_LATENCY_BUCKETS, registry=registry)
+REQUESTS_IN_PROGRESS = Gauge("dwh_requests_in_progress", "Requests being processed (all operations, route is not matched yet at start)", registry=registry)
+RESPONSE_BYTES = Counter("dwh_response_bytes_total", "Response body bytes sent", ("operation",), registry=registry)
+DB_ROWS = Counter("dwh_db_rows_total", "Rows returned by the warehouse to the request's queries", ("operation",), registry=registry)
+DB_QUERIES = Counter("dwh_db_queries_total", "Queries executed on the warehouse by requests", ("operation",), registry=registry)
+DB_QUERIES_PER_REQUEST = Histogram("dwh_db_queries_per_request", "Queries executed on the warehouse by one request", ("operation",),
+                                   buckets=METRICS_QUERY_BUCKETS, registry=registry)
+
+# ----- Connection pool metrics (recorded by the pool classes of database.py) -----
+POOL_WAIT = Histogram("dwh_pool_checkout_wait_seconds", "Time to get a connection from the pool (queue wait + new connection)", ("engine",),
+                      buckets=METRICS_LATENCY_BUCKETS, registry=registry)
+POOL_TIMEOUTS = Counter("dwh_pool_checkout_timeouts_total", "Checkouts that gave up after pool_timeout", ("engine",), registry=registry)
+
+
+#################################################################################
+########################    Request Context Section   ###########################
+#################################################################################
+
+# Counters of the current request, shared by the tasks / threads it spawns (context copy keep the same dict)
+request_stats: ContextVar[dict | None] = ContextVar("request_stats", default=None)
+
+
+def new_request_stats(scope: dict | None = None) -> dict:
+    """
+        Per-request counters.
+        statements: statement shape -> counters of the request, filled by the query log
+    """
+    return {"scope": scope, "db_queries": 0, "db_rows": 0, "failed": False, "statements": {}}
+
+
+def start_request(scope: dict | None = None) -> tuple[dict, Token]:
+    """New per-request counters, set for the current context (reset with the token: MCP tool calls are nested requests)"""
+    stats = new_request_stats(scope)
+    return stats, request_stats.set(stats)
+
+
+def merge_request_stats(target: dict, source: dict):
+    """Add DB queries, rows & statement shapes of <source> (e.g. a shared single-flight execution) to <target>"""
+    target["db_queries"] += source["db_queries"]
+    target["db_rows"] += source["db_rows"]
+    for shape, entry in source["statements"].items():
+        merged = target["statements"].get(shape)
+        if merged is None:
+            target["statements"][shape] = {**entry, "variants": dict(entry["variants"])}
+        else:
+            merged["count"] += entry["count"]
+            merged["seconds"] += entry["seconds"]
+            merged["rows"] += entry["rows"]
+            for variant, count in entry["variants"].items():
+                merged["variants"][variant] = merged["variants"].get(variant, 0) + count
+
+
+def end_request(token: Token):
+    request_stats.reset(token)
+
+
+# Tool routes answer errors as 200 {"success": false, ...}: orjson keeps key order, the flag opens the body
+FAILED_PAYLOAD_PREFIX = b'{"success":false'
+
+
+def is_failed_payload(first_chunk: bytes) -> bool:
+    """First body chunk of a tool response that answered success false"""
+    return first_chunk.startswith(FAILED_PAYLOAD_PREFIX)
+
+
+def record_request(operation: str, method: str, status: int, duration: float, body_bytes: int, stats: dict, error: bool):
+    """Record one finished request"""
+    REQUESTS.labels(operation=operation, method=method, status=status).inc()
+    REQUEST_LATENCY.labels(operation=operation).observe(duration)
+    RESPONSE_BYTES.labels(operation=operation).inc(body_bytes)
+    DB_QUERIES.labels(operation=operation).inc(stats["db_queries"])
+    DB_ROWS.labels(operation=operation).inc(stats["db_rows"])
+    DB_QUERIES_PER_REQUEST.labels(operation=operation).observe(stats["db_queries"])
+    if error or status >= 400 or stats["failed"]:
+        REQUEST_ERRORS.labels(operation=operation).inc()
+
+
+def route_operation(scope: dict | None) -> str:
+    """Label of the matched route: operation_id of API routes, route name otherwise (bounded label values)"""
+    if scope is None:
+        return "background"
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"
+    return getattr(route, "operation_id", None) or getattr(route, "name", None) or "other"
+
+
+def snapshot_metric(family: type[CounterMetricFamily] | type[GaugeMetricFamily], name: str, documentation: str,
+                    values: dict, labelname: str) -> CounterMetricFamily | GaugeMetricFamily:
+    """Counter / Gauge family built at scrape time (custom collector) from a snapshot() dict: one sample per numeric item"""
+    metric = family(name, documentation, labels=(labelname,))
+    for key, value in values.items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            metric.add_metric((key,), value)
+    return metric
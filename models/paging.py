@@ -0,0 +1,227 @@
+from sqlalchemy.sql.elements import TextClause
+from datetime import date, datetime, time as dt_time
+from decimal import Decimal
+from uuid import UUID
+import os
+import hmac
+import json
+import time
+import base64
+import asyncio
+import hashlib
+import logging
+import secrets
+from dotenv import load_dotenv
+
+# get async cursor engine from database module
+from models.database import get_pg_cursor_engine, PG_CURSOR_POOL_SIZE
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+## 📄 Paging settings of main_execute_sql (override through environment)
+EXECUTE_SQL_PAGE_SIZE = int(os.getenv("EXECUTE_SQL_PAGE_SIZE", "100"))
+EXECUTE_SQL_MAX_PAGE_SIZE = int(os.getenv("EXECUTE_SQL_MAX_PAGE_SIZE", "1000"))
+PAGING_CURSOR_TTL = int(os.getenv("PAGING_CURSOR_TTL", "120"))  # Idle seconds before server-side cursor is closed
+PAGING_MAX_CURSORS = int(os.getenv("PAGING_MAX_CURSORS", str(PG_CURSOR_POOL_SIZE)))  # Open server-side cursors (one cursor pool connection each)
+# Sign continuation token, set the same secret on every worker/instance (random per process if not set)
+PAGING_TOKEN_SECRET = os.getenv("PAGING_TOKEN_SECRET", "").encode() or secrets.token_bytes(32)
+
+
+def page_size_of(value) -> int:
+    """Requested page size, default EXECUTE_SQL_PAGE_SIZE and at most EXECUTE_SQL_MAX_PAGE_SIZE"""
+    try:
+        page_size = int(value) if value else EXECUTE_SQL_PAGE_SIZE
+    except (TypeError, ValueError):
+        page_size = EXECUTE_SQL_PAGE_SIZE
+    return max(1, min(page_size, EXECUTE_SQL_MAX_PAGE_SIZE))
+
+
+#################################################################################
+########################   Continuation Token Section  ##########################
+#################################################################################
+
+# Key value types that JSON can not carry, tagged so keyset values are bound with their own type again
+_TOKEN_TYPES = {
+    "datetime": (datetime, datetime.fromisoformat),
+    "date": (date, date.fromisoformat),
+    "time": (dt_time, dt_time.fromisoformat),
+    "decimal": (Decimal, Decimal),
+    "uuid": (UUID, UUID),
+}
+
+def _encode_token_value(value):
+    for tag, (value_type, _) in _TOKEN_TYPES.items():
+        if isinstance(value, value_type):
+            return {"$type": tag, "value": value.isoformat() if hasattr(value, "isoformat") else str(value)}
+    return str(value)
+
+def _decode_token_value(obj: dict):
+    if "$type" in obj and obj["$type"] in _TOKEN_TYPES:
+        return _TOKEN_TYPES[obj["$type"]][1](obj["value"])
+    return obj
+
+def encode_page_token(state: dict) -> str:
+    """Opaque continuation token: base64url(JSON state) + "." + HMAC, client can not forge table/key/cursor"""
+    payload = base64.urlsafe_b64encode(json.dumps(state, separators=(",", ":"), default=_encode_token_value).encode()).rstrip(b"=")
+    signature = hmac.new(PAGING_TOKEN_SECRET, payload, hashlib.sha256).digest()[:16]
+    return payload.decode() + "." + base64.urlsafe_b64encode(signature).rstrip(b"=").decode()
+
+def decode_page_token(token: str) -> dict:
+    """State of continuation token, raise ValueError if token is malformed or not signed by this server"""
+    try:
+        payload, signature = token.encode().split(b".")
+        expected = hmac.new(PAGING_TOKEN_SECRET, payload, hashlib.sha256).digest()[:16]
+        if not hmac.compare_digest(base64.urlsafe_b64decode(signature + b"=" * (-len(signature) % 4)), expected):
+            raise ValueError("signature mismatch")
+        return json.loads(base64.urlsafe_b64decode(payload + b"=" * (-len(payload) % 4)), object_hook=_decode_token_value)
+    except Exception as e:
+        raise ValueError(f"Invalid continuation_token: {e}") from None
+
+
+#################################################################################
+########################  Server-side Cursor Section   ##########################
+#################################################################################
+
+class ServerCursor:
+    """Open named cursor: its connection, streamed result, look-ahead row, access lock & last page served"""
+
+    def __init__(self, connection, result):
+        self.connection = connection
+        self.result = result
+        self.pending: list = []
+        self.lock = asyncio.Lock()
+        self.seq = 0                    # Sequence number of the next page, signed into the continuation token
+        self.last_page: tuple[list, bool] = ([], False)  # (rows, has next page) of page seq - 1, replayed on retry
+
+    @property
+    def is_open(self) -> bool:
+        return self.connection is not None
+
+
+class ServerCursorRegistry:
+    """
+        Server-side (named) cursors kept open between page requests, for table without key to page on.
+        Each page continue from where the previous one stopped, never re-scan from offset 0.
+        Pages are numbered: a retried request of the last page served gets the same rows again (replay),
+        an older page number is rejected, never silently skipping rows.
+        Connections come from the cursor pool (PG_CURSOR_POOL_SIZE), not from the tool pool.
+        Cursor idle longer than <ttl> seconds, or oldest open cursor when <max_cursors> are open, is closed.
+        A finished cursor releases its connection at once but is kept <ttl> seconds to replay its last page.
+    """
+
+    def __init__(self, ttl: int = PAGING_CURSOR_TTL, max_cursors: int = PAGING_MAX_CURSORS):
+        self.ttl = ttl
+        self.max_cursors = max_cursors
+        self._cursors: dict[str, ServerCursor] = {}
+        self._expires_at: dict[str, float] = {}
+        self.stats = {"opened": 0, "closed": 0, "expired": 0, "replayed": 0, "stale": 0}
+
+    def __len__(self) -> int:
+        """Open cursors (each holding a connection)"""
+        return sum(cursor.is_open for cursor in self._cursors.values())
+
+    async def open(self, statement: TextClause, page_size: int) -> tuple[str | None, int | None, list]:
+        """Open named cursor of <statement> and fetch first page. Return (cursor_id, next page seq) or None if no more rows, rows"""
+        await self.sweep()
+        while len(self) >= self.max_cursors:
+            oldest = min((cursor_id for cursor_id, cursor in self._cursors.items() if cursor.is_open), key=self._expires_at.get)
+            await self.close(oldest, expired=True)
+
+        connection = await get_pg_cursor_engine().connect()
+        try:
+            result = await connection.stream(statement)
+        except Exception:
+            await connection.close()
+            raise
+
+        cursor_id = secrets.token_urlsafe(16)
+        self._cursors[cursor_id] = ServerCursor(connection, result)
+        self._expires_at[cursor_id] = time.monotonic() + self.ttl
+        self.stats["opened"] += 1
+
+        next_seq, rows = await self.fetch(cursor_id, 0, page_size)
+        if next_seq is None:
+            # Single page: a retry of the first request opens a new cursor, nothing to replay
+            await self.close(cursor_id)
+            return None, None, rows
+        return cursor_id, next_seq, rows
+
+    async def fetch(self, cursor_id: str, seq: int, page_size: int) -> tuple[int | None, list]:
+        """Page <seq> of cursor (next one, or last one again on retry). Return (next page seq or None if no more rows, rows)"""
+        cursor = self._cursors.get(cursor_id)
+        if cursor is None:
+            raise ValueError("Invalid continuation_token: cursor expired or closed, start again without continuation_token")
+
+        async with cursor.lock:
+            if seq == cursor.seq - 1 >= 0:
+                # Retry of the last page served (response lost): same rows, same next token
+                self.stats["replayed"] += 1
+                rows, has_next = cursor.last_page
+            elif seq != cursor.seq or not cursor.is_open:
+                self.stats["stale"] += 1
+                raise ValueError("Invalid continuation_token: page already read, continue with the latest continuation_token")
+            else:
+                # One look-ahead row tells if there is a next page
+                rows = cursor.pending + list(await cursor.result.fetchmany(page_size + 1 - len(cursor.pending)))
+                cursor.pending[:] = rows[page_size:]
+                rows = rows[:page_size]
+                has_next = bool(cursor.pending)
+                cursor.last_page = (rows, has_next)
+                cursor.seq += 1
+                if not has_next:
+                    await self._release(cursor)
+                    self.stats["closed"] += 1
+
+        self._expires_at[cursor_id] = time.monotonic() + self.ttl
+        return (cursor.seq if has_next else None), rows
+
+    @staticmethod
+    async def _release(cursor: ServerCursor):
+        """Close result & return the connection to the cursor pool"""
+        connection, result = cursor.connection, cursor.result
+        cursor.connection = cursor.result = None
+        try:
+            await result.close()
+        finally:
+            await connection.close()
+
+    async def close(self, cursor_id: str, expired: bool = False):
+        """Forget cursor, close it & return its connection to the pool if still open"""
+        cursor = self._cursors.pop(cursor_id, None)
+        self._expires_at.pop(cursor_id, None)
+        if cursor is None or not cursor.is_open:
+            return
+
+        self.stats["expired" if expired else "closed"] += 1
+        await self._release(cursor)
+
+    async def sweep(self):
+        """Close cursors idle longer than ttl (and forget finished ones)"""
+        now = time.monotonic()
+        for cursor_id in [cursor_id for cursor_id, expires_at in self._expires_at.items() if expires_at <= now]:
+            await self.close(cursor_id, expired=True)
+
+    async def close_all(self):
+        """Close every open cursor (application shutdown)"""
+        for cursor_id in list(self._cursors):
+            try:
+                await self.close(cursor_id)
+            except Exception as e:
+                logger.error(f"Error closing server-side cursor: {e}")
+
+cursor_registry = ServerCursorRegistry()
+
+
+async def run_cursor_sweep(registry: ServerCursorRegistry = cursor_registry):
+    """Background task: close abandoned cursors, so their connections go back to the pool"""
+    try:
+        while True:
+            await asyncio.sleep(max(1, registry.ttl // 2))
+            try:
+                await registry.sweep()
+            except Exception as e:
+                logger.error(f"Error sweeping server-side cursors: {e}")
+    finally:
+        await registry.close_all()
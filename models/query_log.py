@@ -0,0 +1,210 @@
+from collections import deque
+from functools import lru_cache
+import os
+import re
+import time
+import logging
+import threading
+from sqlalchemy import event
+from prometheus_client import Counter, Histogram
+from dotenv import load_dotenv
+
+from models.metrics import registry, request_stats, route_operation, METRICS_LATENCY_BUCKETS
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+## 🐢 Query log settings (override through environment)
+QUERY_LOG_ENABLED = os.getenv("QUERY_LOG_ENABLED", "1") == "1"
+SLOW_QUERY_SECONDS = float(os.getenv("SLOW_QUERY_SECONDS", "1.0"))  # Statement slower than this is logged as slow query
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))  # Same statement shape this many times in one request -> probable N+1
+QUERY_LOG_MAX_SHAPES = int(os.getenv("QUERY_LOG_MAX_SHAPES", "200"))  # Distinct shapes tracked per request, others are grouped
+QUERY_LOG_RECENT = int(os.getenv("QUERY_LOG_RECENT", "50"))  # Slow queries & N+1 reports kept for the stats route
+
+QUERY_DURATION = Histogram("dwh_db_query_duration_seconds", "Warehouse statement duration", ("operation",),
+                           buckets=METRICS_LATENCY_BUCKETS, registry=registry)
+SLOW_QUERIES = Counter("dwh_slow_queries_total", "Statements slower than SLOW_QUERY_SECONDS", ("operation",), registry=registry)
+N_PLUS_ONE = Counter("dwh_n_plus_one_requests_total", "Requests that repeated one statement shape N_PLUS_ONE_THRESHOLD times or more", ("operation",),
+                     registry=registry)
+
+OTHER_SHAPE = "<other statements>"
+
+
+#################################################################################
+########################    Normalization Section     ###########################
+#################################################################################
+
+# One pass over the statement: quoted identifier | string literal | bind placeholder | number
+_TOKEN = re.compile(
+    r'(?P<identifier>"(?:[^"]|"")*")'
+    r"|(?P<string>'(?:[^']|'')*')"
+    r"|(?P<placeholder>%\(\w+\)s|%s|\$\d+)"
+    r"|(?P<number>(?<![\w.])\d+(?:\.\d+)?(?![\w.]))"
+)
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def normalize_statement(statement: str, mask_identifiers: bool = False) -> str:
+    """
+        Statement text without its values: literals & bind placeholders -> ?, IN lists -> (?...), whitespace collapsed.
+        mask_identifiers: quoted table / column names -> "?" too, so the same query run on each table has one shape
+    """
+    def replace(match: re.Match) -> str:
+        if match.lastgroup == "identifier":
+            return '"?"' if mask_identifiers else match.group()
+        return "?"
+
+    normalized = _TOKEN.sub(replace, statement)
+    normalized = _IN_LIST.sub("(?...)", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+
+def statement_shape(statement: str) -> str:
+    """Shape of a statement for N+1 detection: values & quoted identifiers masked"""
+    return normalize_statement(statement, mask_identifiers=True)
+
+
+#################################################################################
+########################       Query Log Section      ###########################
+#################################################################################
+
+class QueryLog:
+    """
+        Record every statement of the sync & async engines: normalized text, duration and row count,
+        attributed to the current request (operation_id of the route, "background" outside requests).
+
+        - statement slower than <slow_seconds> is logged & kept in the recent slow queries
+        - at the end of a request, a shape whose identical statement ran <n_plus_one_threshold> times or more is reported
+          as probable N+1; the same shape run once per distinct table (summary fan-out, lot probe) is not
+        Disabled: only the per-request query & row counters of the metrics are kept
+    """
+
+    def __init__(self, slow_seconds: float = SLOW_QUERY_SECONDS, n_plus_one_threshold: int = N_PLUS_ONE_THRESHOLD,
+                 max_shapes: int = QUERY_LOG_MAX_SHAPES, recent: int = QUERY_LOG_RECENT, enabled: bool = QUERY_LOG_ENABLED):
+        self.slow_seconds = slow_seconds
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.max_shapes = max_shapes
+        self.enabled = enabled
+        self.slow_queries: deque = deque(maxlen=recent)
+        self.n_plus_one_reports: deque = deque(maxlen=recent)
+        self._lock = threading.Lock()
+        self.stats = {"statements": 0, "errors": 0, "slow": 0, "requests": 0, "n_plus_one": 0}
+
+    def attach(self, engine):
+        """Time statements of <engine> (sync engine of AsyncEngine too)"""
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        event.listen(engine, "handle_error", self._handle_error)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    def _handle_error(self, exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_start_time"):
+            connection.info["query_start_time"].pop()
+        with self._lock:
+            self.stats["errors"] += 1
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - conn.info["query_start_time"].pop()
+        # rowcount of SELECT is the row count of the result (-1 for server-side cursor)
+        rowcount = getattr(cursor, "rowcount", -1)
+        self.record(statement, duration, rowcount if rowcount and rowcount > 0 else 0)
+
+    def record(self, statement: str, duration: float, rows: int):
+        """Record one statement: metrics, request counters & shapes, slow query log (also for statements run on the raw driver connection)"""
+        stats = request_stats.get()
+        operation = route_operation(stats["scope"]) if stats is not None else "background"
+        QUERY_DURATION.labels(operation=operation).observe(duration)
+        with self._lock:
+            self.stats["statements"] += 1
+
+        if stats is not None:
+            stats["db_queries"] += 1
+            stats["db_rows"] += rows
+            if self.enabled:
+                self._record_shape(stats["statements"], statement, duration, rows)
+
+        if self.enabled and duration >= self.slow_seconds:
+            self._record_slow(operation, statement, duration, rows)
+
+    def _record_shape(self, statements: dict, statement: str, duration: float, rows: int):
+        shape = statement_shape(statement)
+        if shape not in statements and len(statements) >= self.max_shapes:
+            shape = OTHER_SHAPE
+        entry = statements.get(shape)
+        if entry is None:
+            entry = statements[shape] = {"count": 0, "seconds": 0.0, "rows": 0, "variants": {}}
+        entry["count"] += 1
+        entry["seconds"] += duration
+        entry["rows"] += rows
+        # Executions of each distinct statement behind the shape (e.g. one per table), bounded
+        variant = normalize_statement(statement)
+        if variant in entry["variants"] or len(entry["variants"]) < self.n_plus_one_threshold * 4:
+            entry["variants"][variant] = entry["variants"].get(variant, 0) + 1
+
+    def _record_slow(self, operation: str, statement: str, duration: float, rows: int):
+        normalized = normalize_statement(statement)
+        SLOW_QUERIES.labels(operation=operation).inc()
+        with self._lock:
+            self.stats["slow"] += 1
+            self.slow_queries.append({"at": time.time(), "operation": operation, "seconds": round(duration, 4),
+                                      "rows": rows, "statement": normalized})
+        logger.warning(f"Slow query {duration:.3f}s ({operation}, {rows} rows): {normalized[:500]}")
+
+    def finish_request(self, operation: str, stats: dict) -> dict:
+        """
+            Per-request report: statements by shape, most expensive first, repeated statements flagged as probable N+1.
+            variants: distinct statements behind the shape (e.g. tables), identical: most executions of one of them
+            Return {"operation", "queries", "rows", "seconds", "shapes", "n_plus_one"}
+        """
+        shapes = sorted(
+            ({"shape": shape, "count": entry["count"], "seconds": round(entry["seconds"], 4), "rows": entry["rows"],
+              "variants": len(entry["variants"]), "identical": max(entry["variants"].values(), default=0)}
+             for shape, entry in stats["statements"].items()),
+            key=lambda item: item["seconds"], reverse=True,
+        )
+        # Same statement again & again (only values differ), a shape repeated once per distinct table is the intended fan-out
+        repeated = [item for item in shapes if item["identical"] >= self.n_plus_one_threshold and item["shape"] != OTHER_SHAPE]
+        report = {
+            "operation": operation,
+            "queries": stats["db_queries"],
+            "rows": stats["db_rows"],
+            "seconds": round(sum(item["seconds"] for item in shapes), 4),
+            "shapes": shapes,
+            "n_plus_one": repeated,
+        }
+
+        with self._lock:
+            self.stats["requests"] += 1
+            if repeated:
+                self.stats["n_plus_one"] += 1
+                self.n_plus_one_reports.append({"at": time.time(), **report})
+
+        if repeated:
+            N_PLUS_ONE.labels(operation=operation).inc()
+            for item in repeated:
+                logger.warning(f"Probable N+1 in {operation}: {item['identical']} x identical statement ({item['count']} x shape, "
+                               f"{item['variants']} variants, {item['seconds']:.3f}s) {item['shape'][:300]}")
+        elif shapes:
+            logger.debug(f"Queries of {operation}: {report['queries']} statements, {report['seconds']:.3f}s")
+
+        return report
+
+    def snapshot(self) -> dict:
+        """Counters, recent slow queries & recent N+1 reports, for monitoring"""
+        with self._lock:
+            return {
+                **self.stats,
+                "slow_seconds": self.slow_seconds,
+                "n_plus_one_threshold": self.n_plus_one_threshold,
+                "slow_queries": list(self.slow_queries),
+                "n_plus_one_reports": list(self.n_plus_one_reports),
+            }
+
+
+query_log = QueryLog()
@@ -0,0 +1,127 @@
+from collections import OrderedDict
+from typing import Hashable
+import os
+import sys
+import time
+import logging
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+## 🧊 Per-lot result cache settings (override through environment)
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "1") == "1"
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))  # Byte budget of all entries
+RESULT_CACHE_MAX_ENTRY_BYTES = int(os.getenv("RESULT_CACHE_MAX_ENTRY_BYTES", str(RESULT_CACHE_MAX_BYTES // 16)))  # Larger result is not cached
+RESULT_CACHE_TTL = int(os.getenv("RESULT_CACHE_TTL", "300"))  # Seconds, newest rows of a lot show up after at most TTL
+
+
+def estimate_size(value) -> int:
+    """Approximate memory of a result (list / dict of plain values), fast enough to run on every store"""
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(key) + estimate_size(item) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+#################################################################################
+########################     Result Cache Section    ############################
+#################################################################################
+
+class ResultCache:
+    """
+        LRU + TTL cache of per-table lot results, bounded by total bytes.
+        Key is (table_name, lotno, section, catalog_version): a new catalog version never serves old column mapping.
+        Used by the async controller on the event loop, guarded by a lock so worker threads can use it too.
+    """
+
+    def __init__(self, max_bytes: int = RESULT_CACHE_MAX_BYTES, ttl: int = RESULT_CACHE_TTL,
+                 max_entry_bytes: int = RESULT_CACHE_MAX_ENTRY_BYTES, enabled: bool = RESULT_CACHE_ENABLED):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.max_entry_bytes = min(max_entry_bytes, max_bytes)
+        self.enabled = enabled
+        self._entries: OrderedDict[Hashable, tuple] = OrderedDict()  # key -> (value, size, expires_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {"hit": 0, "miss": 0, "bypass": 0, "store": 0, "evict": 0, "expire": 0, "too_large": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def bytes(self) -> int:
+        return self._bytes
+
+    def get(self, key: Hashable, bypass: bool = False):
+        """Cached value of <key>, None on miss / expired / bypass"""
+        if not self.enabled:
+            return None
+        if bypass:
+            self.stats["bypass"] += 1
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["miss"] += 1
+                return None
+
+            value, size, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.stats["expire"] += 1
+                self.stats["miss"] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.stats["hit"] += 1
+            return value
+
+    def put(self, key: Hashable, value):
+        """Store <value>, evict least recently used entries until the byte budget fits"""
+        if not self.enabled:
+            return
+
+        size = estimate_size(value)
+        if size > self.max_entry_bytes:
+            self.stats["too_large"] += 1
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            while self._entries and self._bytes + size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.stats["evict"] += 1
+
+            self._entries[key] = (value, size, time.monotonic() + self.ttl)
+            self._bytes += size
+            self.stats["store"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key: Hashable):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def snapshot(self) -> dict:
+        """Counters & usage, for monitoring"""
+        lookups = self.stats["hit"] + self.stats["miss"]
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hit_rate": round(self.stats["hit"] / lookups, 4) if lookups else None,
+        }
+
+
+result_cache = ResultCache()
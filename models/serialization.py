@@ -0,0 +1,44 @@
+from fastapi.responses import JSONResponse
+from datetime import timedelta
+from decimal import Decimal
+from typing import Any
+import orjson
+
+
+## 🚀 JSON output of the routes: controllers return plain dict / list, serialized once by orjson (no jsonable_encoder walk)
+# datetime / date / time / UUID are native in orjson, non str keys (e.g. int) are converted like json.dumps
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def _default(value):
+    """Types orjson does not serialize natively, encoded the same way as FastAPI jsonable_encoder"""
+    if isinstance(value, Decimal):
+        # NUMERIC column: integral value as int, else float
+        exponent = value.as_tuple().exponent
+        return int(value) if isinstance(exponent, int) and exponent >= 0 else float(value)
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, (bytes, memoryview)):
+        return bytes(value).decode(errors="replace")
+    if hasattr(value, "_mapping"):
+        # SQLAlchemy Row left in content
+        return dict(value._mapping)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """UTF-8 JSON of <content>"""
+    return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+
+class DWHJSONResponse(JSONResponse):
+    """
+        JSON response rendered by orjson.
+        Return it from the route (not a dict) so FastAPI skip jsonable_encoder & response validation of the payload
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
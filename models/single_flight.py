@@ -0,0 +1,124 @@
+from typing import Awaitable, Callable, Hashable
+import os
+import asyncio
+import logging
+import functools
+import orjson
+from dotenv import load_dotenv
+
+from models.metrics import request_stats, new_request_stats, merge_request_stats
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+## 🛫 Single-flight settings (override through environment)
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "1") == "1"
+
+
+def canonical_key(value) -> bytes:
+    """Normalized key of tool arguments: same content -> same key whatever the dict order"""
+    return orjson.dumps(value, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS, default=str)
+
+
+def tool_call_key(chatInput: str | None = None, arguments: dict | None = None) -> tuple:
+    """
+        Key of a [MAIN] / [Helper] tool call that only use chatInput as a switch:
+        agents asking the same lot / table_list / flags in different words share one execution
+    """
+    return bool(chatInput), canonical_key(arguments)
+
+
+#################################################################################
+########################     Single Flight Section    ###########################
+#################################################################################
+
+class SingleFlight:
+    """
+        Coalesce identical concurrent calls: the first call of a key runs, later calls of the same key
+        wait for that in-flight execution and get the same result (or the same exception).
+        Nothing is kept after the execution finish, that is the job of the result cache.
+
+        The execution counts its DB queries / rows / statement shapes in its own request stats, added to every
+        caller (first one & coalesced ones) when it finishes: each request reports the queries its answer cost.
+    """
+
+    def __init__(self, enabled: bool = SINGLE_FLIGHT_ENABLED):
+        self.enabled = enabled
+        self._in_flight: dict[Hashable, tuple[asyncio.Task, dict]] = {}
+        self.stats = {"calls": 0, "executions": 0, "coalesced": 0}
+        self.operation_stats: dict[str, dict] = {}
+
+    def __len__(self) -> int:
+        return len(self._in_flight)
+
+    async def run(self, key: Hashable, func: Callable[[], Awaitable], operation: str | None = None):
+        """Result of func() for <key>, shared with every concurrent call of the same key"""
+        if not self.enabled:
+            return await func()
+
+        operation_stats = self.operation_stats.setdefault(operation or "-", {"calls": 0, "executions": 0, "coalesced": 0})
+        self.stats["calls"] += 1
+        operation_stats["calls"] += 1
+
+        caller_stats = request_stats.get()
+        in_flight = self._in_flight.get(key)
+        if in_flight is None:
+            self.stats["executions"] += 1
+            operation_stats["executions"] += 1
+            execution_stats = new_request_stats(caller_stats["scope"] if caller_stats is not None else None)
+            task = asyncio.ensure_future(self._execute(func, execution_stats))
+            self._in_flight[key] = (task, execution_stats)
+            task.add_done_callback(functools.partial(self._done, key))
+        else:
+            task, execution_stats = in_flight
+            self.stats["coalesced"] += 1
+            operation_stats["coalesced"] += 1
+
+        try:
+            # One caller gone (client disconnect) must not cancel the execution of the others
+            return await asyncio.shield(task)
+        finally:
+            if caller_stats is not None and task.done():
+                merge_request_stats(caller_stats, execution_stats)
+
+    @staticmethod
+    async def _execute(func: Callable[[], Awaitable], execution_stats: dict):
+        # Task runs in a copy of the first caller's context: count its queries apart from that caller
+        request_stats.set(execution_stats)
+        return await func()
+
+    def _done(self, key: Hashable, task: asyncio.Task):
+        self._in_flight.pop(key, None)
+        # Exception is raised to the callers, mark it retrieved when every caller is already gone
+        if not task.cancelled():
+            task.exception()
+
+    def snapshot(self) -> dict:
+        """Counters per operation & load reduction, for monitoring"""
+        return {
+            **self.stats,
+            "in_flight": len(self._in_flight),
+            "coalesced_rate": round(self.stats["coalesced"] / self.stats["calls"], 4) if self.stats["calls"] else None,
+            "operations": self.operation_stats,
+        }
+
+
+single_flight = SingleFlight()
+
+
+def coalesce(operation: str, key_func: Callable[..., Hashable] = tool_call_key):
+    """
+        Decorator of async controller function: identical concurrent calls share one execution.
+        key_func(*args, **kwargs): normalized key of the call (tool_call_key for tool functions),
+        None when the call must not be shared (stateful call, e.g. paging a server-side cursor)
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            call_key = key_func(*args, **kwargs)
+            if call_key is None:
+                return await func(*args, **kwargs)
+            return await single_flight.run((operation, call_key), lambda: func(*args, **kwargs), operation=operation)
+        return wrapper
+    return decorator
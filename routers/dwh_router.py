@@ -1,18 +1,28 @@
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import StreamingResponse
 from typing import Optional, Any, List
 
-# Import the controller layer functions
-from controllers.dwh_controller import helper_mapping_info_func, helper_process_mapper_func, \
-    main_execute_sql_func, main_summary_each_process_data_func, main_summary_each_process_data_def_func
+# Import the controller layer functions (async version, keep the event loop free while waiting on DWH)
+from controllers.dwh_async_controller import helper_mapping_info_func, helper_process_mapper_func, \
+    main_execute_sql_func, main_summary_each_process_data_func, main_summary_each_process_data_def_func, \
+    main_summary_each_process_data_combined_func, main_summary_stream_func, main_export_data_func, \
+    main_defect_pareto_func
 # , common_lot_info_func, lot_in_process_func, lot_defective_func, summary_lot_func
+from models.result_cache import result_cache
+from models.database import plan_cache, sample_prepared_statements
+from models.single_flight import single_flight
+from models.query_log import query_log
+from models.admission import admission_control
+from models.serialization import DWHJSONResponse, dumps
 import logging
-import json
 
+# Routes return DWHJSONResponse: controller content is already plain dict / list, serialized once by orjson
 router = APIRouter(
     prefix="/dwh_agent",
     tags=["DWH Agent - SQL with AI"],
+    default_response_class=DWHJSONResponse,
 )
 
 oauth2_scheme = HTTPBearer()
@@ -79,6 +89,42 @@ class MappingResponse(BaseModel):
 #     content: List[List[Any]]
     
     
+#################################################################################
+########################      Streaming Section      ############################
+#################################################################################
+
+# Accept header -> stream format of the summary routes (MCP clients keep the plain JSON response)
+STREAM_MEDIA_TYPES = {
+    "application/x-ndjson": "ndjson",
+    "text/event-stream": "sse",
+}
+
+def stream_format(http_request: Request) -> str | None:
+    """
+        Stream format requested by client through Accept header, None for plain JSON response
+    """
+    accept = http_request.headers.get("accept", "")
+    for media_type, stream_fmt in STREAM_MEDIA_TYPES.items():
+        if media_type in accept:
+            return stream_fmt
+    return None
+
+def stream_summary_response(events, stream_fmt: str) -> StreamingResponse:
+    """
+        Stream summary events (dict) as NDJSON lines or SSE messages ("table" events, then one "done" event)
+    """
+    async def encode():
+        async for event in events:
+            data = dumps(event)
+            if stream_fmt == "sse":
+                yield b"event: " + (b"done" if event.get("done") else b"table") + b"\ndata: " + data + b"\n\n"
+            else:
+                yield data + b"\n"
+
+    media_type = "text/event-stream" if stream_fmt == "sse" else "application/x-ndjson"
+    return StreamingResponse(encode(), media_type=media_type, headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
 #################################################################################
 ########################        Router Section       ############################
 #################################################################################
@@ -105,7 +151,7 @@ async def helper_mapping_info(
         
 
         # Call the Main controller function
-        result = helper_mapping_info_func(request.chatInput)
+        result = await helper_mapping_info_func(request.chatInput)
 
         # Handle validation errors from controller
         if not result["success"] and "error" in result:
@@ -115,10 +161,7 @@ async def helper_mapping_info(
                 # raise HTTPException(status_code=400, detail=error_msg)
                 return
             
-        # Convert Row objects to list of dicts
-        content = result["content"]
-
-        return {"success": result["success"], "content": content}
+        return DWHJSONResponse({"success": result["success"], "content": result["content"]})
 
     except HTTPException:
         # raise
@@ -149,7 +192,7 @@ async def helper_process_mapper(
         
 
         # Call the Main controller function
-        result = helper_process_mapper_func(request.chatInput, request.arguments)
+        result = await helper_process_mapper_func(request.chatInput, request.arguments)
 
         # Handle validation errors from controller
         if not result["success"] and "error" in result:
@@ -159,13 +202,7 @@ async def helper_process_mapper(
                 # raise HTTPException(status_code=400, detail=error_msg)
                 return
             
-        # Convert Row objects to list of dicts
-        if result["content"] and isinstance(result["content"], list):
-            content = [dict(row._mapping) if hasattr(row, '_mapping') else row for row in result["content"]]
-        else:
-            content = result["content"]
-
-        return {"success": result["success"], "content": content}
+        return DWHJSONResponse({"success": result["success"], "content": result["content"]})
 
     except HTTPException:
         # raise
@@ -197,7 +234,7 @@ async def main_execute_sql(
         
 
         # Call the Main controller function
-        result = main_execute_sql_func(request.chatInput, request.arguments)
+        result = await main_execute_sql_func(request.chatInput, request.arguments)
 
         # Handle validation errors from controller
         if not result["success"] and "error" in result:
@@ -207,10 +244,16 @@ async def main_execute_sql(
                 return
                 # raise HTTPException(status_code=400, detail=error_msg)
 
-        # Convert Row objects to list of dicts
-        content = [dict(row._mapping) for row in result["content"]] if result["content"] else []
-        
-        return {"success": result["success"], "content": content}
+        # Content is already list of dicts
+        response = {"success": result["success"], "content": result["content"] or []}
+
+        # Paging mode: token of next page (None on last page), or why the token was rejected
+        if "continuation_token" in result:
+            response["continuation_token"] = result["continuation_token"]
+        if "error" in result:
+            response["error"] = result["error"]
+
+        return DWHJSONResponse(response)
 
     except HTTPException:
         # raise
@@ -229,6 +272,7 @@ async def main_execute_sql(
 )
 async def main_summary_each_process_data(
     request: SQLcommonRequest,
+    http_request: Request,
     token: HTTPAuthorizationCredentials = Depends(oauth2_scheme)
 ):
     """
@@ -245,8 +289,13 @@ async def main_summary_each_process_data(
         print(f"🔒 User requested to summary lot data (each process) from DWH")
         
 
+        # Stream each table as soon as it is ready (Accept: application/x-ndjson or text/event-stream)
+        stream_fmt = stream_format(http_request)
+        if stream_fmt:
+            return stream_summary_response(main_summary_stream_func(request.chatInput, request.arguments, section="process"), stream_fmt)
+
         # Call the Main controller function
-        result = main_summary_each_process_data_func(request.chatInput, request.arguments)
+        result = await main_summary_each_process_data_func(request.chatInput, request.arguments)
 
         # Handle validation errors from controller
         if not result["success"] and "error" in result:
@@ -256,26 +305,8 @@ async def main_summary_each_process_data(
                 return
                 # raise HTTPException(status_code=400, detail=error_msg)
 
-        # Convert Row objects to list of dicts
-        if result["content"] and isinstance(result["content"], list):
-            content = []
-            for item in result["content"]:
-                if isinstance(item, list):  # Handle nested lists of Row objects
-                    converted_list = []
-                    for row in item:
-                        if hasattr(row, '_mapping'):
-                            converted_list.append(dict(row._mapping))
-                        else:
-                            converted_list.append(row)
-                    content.append(converted_list)
-                elif hasattr(item, '_mapping'):
-                    content.append(dict(item._mapping))
-                else:
-                    content.append(item)
-        else:
-            content = result["content"]
-        
-        return {"success": result["success"], "content": content}
+        # Content is already list (per table) of dicts
+        return DWHJSONResponse({"success": result["success"], "content": result["content"]})
 
     except HTTPException:
         # raise
@@ -293,6 +324,7 @@ async def main_summary_each_process_data(
 )
 async def main_summary_each_process_data_defective(
     request: SQLcommonRequest,
+    http_request: Request,
     token: HTTPAuthorizationCredentials = Depends(oauth2_scheme)
 ):
     """
@@ -309,8 +341,13 @@ async def main_summary_each_process_data_defective(
         print(f"🔒 User requested to summary lot data (each process) from DWH")
         
 
+        # Stream each table as soon as it is ready (Accept: application/x-ndjson or text/event-stream)
+        stream_fmt = stream_format(http_request)
+        if stream_fmt:
+            return stream_summary_response(main_summary_stream_func(request.chatInput, request.arguments, section="defective"), stream_fmt)
+
         # Call the Main controller function
-        result = main_summary_each_process_data_def_func(request.chatInput, request.arguments)
+        result = await main_summary_each_process_data_def_func(request.chatInput, request.arguments)
 
         # Handle validation errors from controller
         if not result["success"] and "error" in result:
@@ -320,26 +357,8 @@ async def main_summary_each_process_data_defective(
                 return
                 # raise HTTPException(status_code=400, detail=error_msg)
 
-        # Convert Row objects to list of dicts
-        if result["content"] and isinstance(result["content"], list):
-            content = []
-            for item in result["content"]:
-                if isinstance(item, list):  # Handle nested lists of Row objects
-                    converted_list = []
-                    for row in item:
-                        if hasattr(row, '_mapping'):
-                            converted_list.append(dict(row._mapping))
-                        else:
-                            converted_list.append(row)
-                    content.append(converted_list)
-                elif hasattr(item, '_mapping'):
-                    content.append(dict(item._mapping))
-                else:
-                    content.append(item)
-        else:
-            content = result["content"]
-        
-        return {"success": result["success"], "content": content}
+        # Content is already list (per table) of dicts
+        return DWHJSONResponse({"success": result["success"], "content": result["content"]})
 
     except HTTPException:
         # raise
@@ -348,8 +367,199 @@ async def main_summary_each_process_data_defective(
     except Exception as e:
         logger.error(f"Failed to summary process lot data defective from DWH: {str(e)}")
         return {"success": False, "content": []}
+
+# Route Summary Each Process Data Combined (process & defective)
+@router.post(
+    "/main_summary_each_process_data_combined",
+    operation_id="main_summary_each_process_data_combined",
+    name="DWH Summary Each Process Data Combined Tool"
+)
+async def main_summary_each_process_data_combined(
+    request: SQLcommonRequest,
+    http_request: Request,
+    token: HTTPAuthorizationCredentials = Depends(oauth2_scheme)
+):
+    """
+        Retrieves data from Data Warehouse based on target table.
+        Input: User's request full report (process & defective data) of lot
+        Example: 'Full report of lot 25XPB0062' -> read each table once
+        Output: 'Data of each table split into "process" & "defective" section as JSON format'
+
+        Remark: Use instead of calling both summary tools for the same lot
+    """
+    try:
+        session_token = token.credentials
+        logger.info(f"Received Session Token: {session_token[:5]}...")
+        print(f"🔒 User requested to summary lot data combined (each process) from DWH")
+
+
+        # Stream each table as soon as it is ready (Accept: application/x-ndjson or text/event-stream)
+        stream_fmt = stream_format(http_request)
+        if stream_fmt:
+            return stream_summary_response(main_summary_stream_func(request.chatInput, request.arguments, section="combined"), stream_fmt)
+
+        # Call the Main controller function
+        result = await main_summary_each_process_data_combined_func(request.chatInput, request.arguments)
+
+        # Content is already list of dicts {"table_name", "process", "defective"}
+        return DWHJSONResponse({"success": result["success"], "content": result["content"]})
+
+    except HTTPException:
+        # raise
+        return {"success": False, "content": []}
+
+    except Exception as e:
+        logger.error(f"Failed to summary process lot data combined from DWH: {str(e)}")
+        return {"success": False, "content": []}
    
 
+# Route Defect Pareto
+@router.post(
+    "/main_defect_pareto",
+    operation_id="main_defect_pareto",
+    name="DWH Defect Pareto Tool"
+)
+async def main_defect_pareto(
+    request: SQLcommonRequest,
+    token: HTTPAuthorizationCredentials = Depends(oauth2_scheme)
+):
+    """
+        Ranks the defects of a lot across all its processes.
+        Input: User's request for the main defect / NG / reject of lot with <table_list> of process mapper
+        Example: 'Which defects dominate lot 25XPB0062' -> one call for all tables
+        Output: 'Pareto (quantity, percent, cumulative percent) of each process and overall as JSON format'
+
+        Remark: Use instead of reading defective data of each table to find the main defect
+    """
+    try:
+        session_token = token.credentials
+        logger.info(f"Received Session Token: {session_token[:5]}...")
+        print(f"🔒 User requested defect pareto of lot from DWH")
+
+        # Call the Main controller function
+        result = await main_defect_pareto_func(request.chatInput, request.arguments)
+
+        return DWHJSONResponse({"success": result["success"], "content": result["content"]})
+
+    except HTTPException:
+        # raise
+        return {"success": False, "content": []}
+
+    except Exception as e:
+        logger.error(f"Failed to get defect pareto of lot from DWH: {str(e)}")
+        return {"success": False, "content": []}
+
+
+# Route Export Data (file download for analysts, not exposed as MCP tool)
+@router.post(
+    "/main_export_data",
+    operation_id="main_export_data",
+    name="DWH Export Data"
+)
+async def main_export_data(
+    request: SQLcommonRequest,
+    token: HTTPAuthorizationCredentials = Depends(oauth2_scheme)
+):
+    """
+        Export all data of a table by lot and / or date range.
+        Input: arguments {"mapping_data": {"table_name", "lotno"}, "format": "csv" | "parquet", "date_from", "date_to", "date_column"}
+        Output: CSV (COPY stream) or Parquet file, streamed chunk by chunk
+    """
+    try:
+        session_token = token.credentials
+        logger.info(f"Received Session Token: {session_token[:5]}...")
+        print(f"🔒 User requested to export data from DWH")
+
+        # Call the Main controller function
+        result = await main_export_data_func(request.chatInput, request.arguments)
+
+        if not result["success"]:
+            return DWHJSONResponse({"success": False, "content": [], "error": result.get("error")}, status_code=400)
+
+        return StreamingResponse(result["content"], media_type=result["media_type"],
+                                 headers={"Content-Disposition": f'attachment; filename="{result["filename"]}"'})
+
+    except Exception as e:
+        logger.error(f"Failed to export data from DWH: {str(e)}")
+        return DWHJSONResponse({"success": False, "content": [], "error": f"{type(e).__name__}: {e}"}, status_code=500)
+
+
+
+# Route Result Cache Stats (monitoring, not exposed as MCP tool)
+@router.get(
+    "/result_cache/stats",
+    operation_id="result_cache_stats",
+    name="DWH Result Cache Stats"
+)
+async def result_cache_stats(
+    token: HTTPAuthorizationCredentials = Depends(oauth2_scheme)
+):
+    """
+        Hit / miss / eviction counters and byte usage of the per-lot result cache
+    """
+    return DWHJSONResponse({"success": True, "content": result_cache.snapshot()})
+
+
+# Route Plan Cache Stats (monitoring, not exposed as MCP tool)
+@router.get(
+    "/plan_cache/stats",
+    operation_id="plan_cache_stats",
+    name="DWH Plan Cache Stats"
+)
+async def plan_cache_stats(
+    token: HTTPAuthorizationCredentials = Depends(oauth2_scheme)
+):
+    """
+        Executions & estimated server-side prepared statement hits of the async engine (client-side replay of psycopg's rule),
+        with the prepared statements the server really holds on one pooled connection ("server")
+    """
+    return DWHJSONResponse({"success": True, "content": {**plan_cache.snapshot(), "server": await sample_prepared_statements()}})
+
+
+# Route Single Flight Stats (monitoring, not exposed as MCP tool)
+@router.get(
+    "/single_flight/stats",
+    operation_id="single_flight_stats",
+    name="DWH Single Flight Stats"
+)
+async def single_flight_stats(
+    token: HTTPAuthorizationCredentials = Depends(oauth2_scheme)
+):
+    """
+        Calls, executions & coalesced calls (shared in-flight execution) of each tool
+    """
+    return DWHJSONResponse({"success": True, "content": single_flight.snapshot()})
+
+
+# Route Query Log Stats (monitoring, not exposed as MCP tool)
+@router.get(
+    "/query_log/stats",
+    operation_id="query_log_stats",
+    name="DWH Query Log Stats"
+)
+async def query_log_stats(
+    token: HTTPAuthorizationCredentials = Depends(oauth2_scheme)
+):
+    """
+        Statement counters, recent slow queries & recent requests flagged as probable N+1 (repeated statement shape)
+    """
+    return DWHJSONResponse({"success": True, "content": query_log.snapshot()})
+
+
+# Route Admission Control Stats (monitoring, not exposed as MCP tool)
+@router.get(
+    "/admission/stats",
+    operation_id="admission_stats",
+    name="DWH Admission Control Stats"
+)
+async def admission_stats(
+    token: HTTPAuthorizationCredentials = Depends(oauth2_scheme)
+):
+    """
+        Active & queued requests, admitted / rejected counters and Retry-After hint of each concurrency limiter
+    """
+    return DWHJSONResponse({"success": True, "content": admission_control.snapshot()})
+
 
 # # Route Generate SQL Query String
 # @router.post(
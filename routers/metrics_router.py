@@ -0,0 +1,95 @@
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi import APIRouter, Depends
+from fastapi.responses import Response
+
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+from models.metrics import registry, render_metrics, snapshot_metric, PROMETHEUS_CONTENT_TYPE
+from models.database import engine_pool_status, plan_cache
+from models.result_cache import result_cache
+from models.single_flight import single_flight
+import logging
+
+# Monitoring routes, not exposed as MCP tool
+router = APIRouter(tags=["Monitoring"])
+
+oauth2_scheme = HTTPBearer()
+
+logger = logging.getLogger(__name__)
+
+#################################################################################
+########################      Collector Section       ###########################
+#################################################################################
+
+class PoolCollector(Collector):
+    """Pool gauges of each created engine, read at scrape time"""
+
+    FAMILIES = {
+        "size": ("dwh_pool_size", "Configured pool size (persistent connections)"),
+        "checked_out": ("dwh_pool_checked_out", "Connections checked out of the pool"),
+        "checked_in": ("dwh_pool_checked_in", "Idle connections in the pool"),
+        "overflow": ("dwh_pool_overflow", "Overflow connections open above pool size"),
+        "max_overflow": ("dwh_pool_max_overflow", "Configured max overflow connections"),
+    }
+
+    def collect(self):
+        families = {key: GaugeMetricFamily(name, documentation, labels=("engine",)) for key, (name, documentation) in self.FAMILIES.items()}
+        for engine, status in engine_pool_status().items():
+            for key, gauge in families.items():
+                gauge.add_metric((engine,), status[key])
+        yield from families.values()
+
+
+class CacheCollector(Collector):
+    """Result cache & plan cache counters from their snapshot()"""
+
+    def collect(self):
+        result_stats = result_cache.snapshot()
+        plan_stats = plan_cache.snapshot()
+        yield snapshot_metric(CounterMetricFamily, "dwh_result_cache_events_total", "Result cache hit / miss / store / evict ... events",
+                              {key: result_stats[key] for key in result_cache.stats}, "event")
+        yield snapshot_metric(GaugeMetricFamily, "dwh_result_cache_usage", "Result cache entries & bytes",
+                              {key: result_stats[key] for key in ("entries", "bytes", "max_bytes")}, "kind")
+        yield snapshot_metric(CounterMetricFamily, "dwh_plan_cache_events_total", "Async engine executions & estimated server-side prepared statement use (client-side replay, not read from the server)",
+                              {key: plan_stats[key] for key in plan_cache.stats}, "event")
+
+
+class SingleFlightCollector(Collector):
+    """Single-flight in-flight gauge & executed / coalesced calls per operation"""
+
+    def collect(self):
+        flight_stats = single_flight.snapshot()
+        yield GaugeMetricFamily("dwh_single_flight_in_flight", "Tool executions in flight, shared by concurrent identical calls",
+                                value=flight_stats["in_flight"])
+
+        calls = CounterMetricFamily("dwh_single_flight_calls_total", "Tool calls by operation, executed or coalesced", labels=("operation", "result"))
+        for operation, stats in flight_stats["operations"].items():
+            calls.add_metric((operation, "executed"), stats["executions"])
+            calls.add_metric((operation, "coalesced"), stats["coalesced"])
+        yield calls
+
+
+for collector in (PoolCollector(), CacheCollector(), SingleFlightCollector()):
+    registry.register(collector)
+
+
+#################################################################################
+########################          Route Section       ###########################
+#################################################################################
+
+# Route Metrics (Prometheus scrape, bearer token in scrape config)
+@router.get(
+    "/metrics",
+    operation_id="metrics",
+    name="DWH Metrics",
+    response_class=Response,
+)
+async def metrics(
+    token: HTTPAuthorizationCredentials = Depends(oauth2_scheme)
+):
+    """
+        Request counts, latency histograms, errors, rows / bytes / DB queries per operation,
+        connection pool gauges and cache counters in Prometheus text format
+    """
+    return Response(content=render_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
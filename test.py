@@ -7,7 +7,7 @@ import psycopg2
 from psycopg2.extras import Json
 
 # get postgres engine from database module
-from models.database import get_pg_engine
+from models.database import get_pg_session
 
 from typing import List
 import json
@@ -35,15 +35,9 @@ def info_mapping():
                    where target_table_name is not null
                 """)
         
-        pg_engine = get_pg_engine()
-        pg_session = sessionmaker(bind=pg_engine)
-
-        with pg_session() as pg_session:
+        with get_pg_session() as pg_session:
             lot_info = pg_session.execute(lot_info_query).fetchall()
 
-        pg_session.close()
-        pg_engine.dispose()
-        
         if lot_info.__len__() > 0:
             return lot_info
         else:
@@ -71,15 +65,9 @@ def process_mapper(
                     AND DEPARTMENT = '{department}'
                 """)
 
-        pg_engine = get_pg_engine()
-        pg_session = sessionmaker(bind=pg_engine)
-
-        with pg_session() as pg_session:
+        with get_pg_session() as pg_session:
             table_list = pg_session.execute(process_mapper_qry).fetchall()
 
-        pg_session.close()
-        pg_engine.dispose()
-
         return table_list
 
     else:
@@ -105,15 +93,9 @@ def process_retrieving_data(
                     WHERE LOTNO = '{lotno}'
                 """)
 
-        pg_engine = get_pg_engine()
-        pg_session = sessionmaker(bind=pg_engine)
-
-        with pg_session() as pg_session:
+        with get_pg_session() as pg_session:
             process_data = pg_session.execute(lot_info_qry).fetchall()
 
-        pg_session.close()
-        pg_engine.dispose()
-
         return process_data
 
     else:
@@ -0,0 +1,174 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import main
+from main import AdmissionMiddleware
+from models.admission import AdmissionControl, AdmissionRejected, Limiter, parse_limits
+from models.metrics import metric_value
+
+
+def test_free_slot_is_admitted_at_once():
+    async def scenario():
+        limiter = Limiter("test", concurrency=2, queue_size=0, queue_timeout=1)
+        assert await limiter.acquire() == 0.0
+        assert await limiter.acquire() == 0.0
+        assert limiter.active == 2
+        limiter.release()
+        limiter.release()
+        return limiter.snapshot()
+
+    snapshot = asyncio.run(scenario())
+    assert snapshot["active"] == 0 and snapshot["admitted"] == 2 and snapshot["queued"] == 0
+
+
+def test_full_queue_rejects_with_429():
+    async def scenario():
+        limiter = Limiter("test", concurrency=1, queue_size=1, queue_timeout=5)
+        await limiter.acquire()
+        waiting = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            await limiter.acquire()
+
+        limiter.release()
+        await waiting
+        limiter.release()
+        return limiter, rejected.value
+
+    limiter, rejected = asyncio.run(scenario())
+    assert rejected.status_code == 429 and rejected.reason == "queue full" and rejected.limiter == "test"
+    assert rejected.retry_after >= 1
+    assert limiter.stats["rejected_queue_full"] == 1 and limiter.stats["admitted"] == 2
+    assert limiter.active == 0 and limiter.queued == 0
+
+
+def test_queue_wait_timeout_rejects_with_503_and_retry_after():
+    async def scenario():
+        limiter = Limiter("test", concurrency=1, queue_size=5, queue_timeout=0.05)
+        limiter.hold_seconds = 4.0
+        await limiter.acquire()
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            await limiter.acquire()
+
+        # Timed out waiter left the queue, the slot is still held by the first request only
+        assert limiter.queued == 0 and limiter.active == 1
+        limiter.release()
+        assert limiter.active == 0
+        return limiter, rejected.value
+
+    limiter, rejected = asyncio.run(scenario())
+    assert rejected.status_code == 503 and rejected.reason == "queue wait timeout"
+    # Nobody left waiting: one hold time of the single slot
+    assert rejected.retry_after == 4
+    assert limiter.stats["rejected_timeout"] == 1
+
+
+def test_released_slot_is_handed_over_in_fifo_order():
+    async def scenario():
+        limiter = Limiter("test", concurrency=1, queue_size=10, queue_timeout=5)
+        await limiter.acquire()
+        admitted = []
+
+        async def request(name: str):
+            await limiter.acquire()
+            admitted.append(name)
+
+        tasks = []
+        for name in ("first", "second", "third"):
+            tasks.append(asyncio.create_task(request(name)))
+            await asyncio.sleep(0)
+        assert limiter.queued == 3
+
+        for _ in tasks:
+            limiter.release()
+            await asyncio.sleep(0)
+            # Handed over, not freed: a newcomer can not jump the queue
+            assert limiter.active == 1
+        await asyncio.gather(*tasks)
+        limiter.release()
+        return limiter, admitted
+
+    limiter, admitted = asyncio.run(scenario())
+    assert admitted == ["first", "second", "third"]
+    assert limiter.active == 0 and limiter.stats["max_queued"] == 3
+
+
+def test_cancelled_waiter_is_skipped_on_handover():
+    async def scenario():
+        limiter = Limiter("test", concurrency=1, queue_size=10, queue_timeout=5)
+        await limiter.acquire()
+        cancelled = asyncio.create_task(limiter.acquire())
+        waiting = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        limiter.release()
+        await waiting
+        assert limiter.active == 1 and limiter.queued == 0
+        limiter.release()
+        return limiter
+
+    limiter = asyncio.run(scenario())
+    assert limiter.active == 0
+
+
+def test_retry_after_follows_queue_and_hold_time():
+    async def scenario():
+        limiter = Limiter("test", concurrency=2, queue_size=10, queue_timeout=5)
+        limiter.hold_seconds = 3.0
+        await limiter.acquire()
+        assert limiter.retry_after() == 2  # ceil(3 * (0 waiting + 1) / 2 slots)
+
+        await limiter.acquire()
+        waiting = [asyncio.create_task(limiter.acquire()) for _ in range(3)]
+        await asyncio.sleep(0)
+        assert limiter.retry_after() == 6  # ceil(3 * (3 + 1) / 2)
+
+        limiter.release(held_seconds=8.0)  # moving average 0.8 * 3 + 0.2 * 8
+        assert limiter.hold_seconds == pytest.approx(4.0)
+        for _ in range(4):
+            limiter.release()
+        await asyncio.gather(*waiting)
+        return limiter
+
+    limiter = asyncio.run(scenario())
+    assert limiter.active == 0 and limiter.queued == 0
+
+
+def test_parse_limits_skips_malformed_items():
+    assert parse_limits("main_execute_sql=2:5, main_defect_pareto=1,bad=x:1,") == {
+        "main_execute_sql": (2, 5), "main_defect_pareto": (1, 0)}
+
+
+def test_middleware_answers_rejection_with_retry_after(monkeypatch):
+    control = AdmissionControl(enabled=True, overrides="main_execute_sql=1:0")
+    monkeypatch.setattr(main, "admission_control", control)
+    api = SimpleNamespace(openapi=lambda: {"paths": {"/main_execute_sql": {"post": {"operationId": "main_execute_sql"}}}})
+
+    async def tool(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    async def scenario():
+        scope = {"type": "http", "method": "POST", "path": "/main_execute_sql", "headers": []}
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        held = await control.acquire("main_execute_sql")
+        await AdmissionMiddleware(tool, api=api)(scope, None, send)
+        held.release()
+        return sent
+
+    rejected_before = metric_value("dwh_admission_rejected_total", operation="main_execute_sql", reason="queue_full")
+    start, body = asyncio.run(scenario())
+    assert start["status"] == 429
+    assert (b"retry-after", b"1") in start["headers"]
+    assert body["body"].startswith(b'{"success":false')
+    assert metric_value("dwh_admission_rejected_total", operation="main_execute_sql", reason="queue_full") == rejected_before + 1
@@ -0,0 +1,36 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import models.catalog as catalog_module
+from models.catalog import WarehouseCatalogCache
+
+
+def test_stale_catalog_is_served_while_one_background_reload_runs(monkeypatch):
+    release = threading.Event()
+    loads = []
+
+    def load_warehouse_catalog(version: int = 1):
+        loads.append(version)
+        if len(loads) > 1:
+            release.wait(5)  # Slow reload
+        return SimpleNamespace(version=version, fingerprint=version, loaded_at=0.0, tables={})
+
+    monkeypatch.setattr(catalog_module, "load_warehouse_catalog", load_warehouse_catalog)
+    cache = WarehouseCatalogCache(ttl=60)
+
+    async def main():
+        first = await cache.get_async()
+        cache.invalidate()
+
+        # Concurrent requests on a stale catalog get the old snapshot without waiting for the reload
+        served = await asyncio.wait_for(asyncio.gather(*(cache.get_async() for _ in range(5))), timeout=1)
+        assert all(catalog is first for catalog in served)
+
+        release.set()
+        await cache._refresh_task
+        return await cache.get_async()
+
+    refreshed = asyncio.run(main())
+    assert loads == [1, 2]
+    assert refreshed.version == 2
@@ -0,0 +1,140 @@
+from datetime import datetime, date
+from decimal import Decimal
+
+from controllers.dwh_queries import describe_rows, build_defect_pareto, to_columnar, format_output
+from models.serialization import dumps
+
+
+def test_describe_rows_datetime_column_is_serializable():
+    rows = [
+        {"LOTNO": "25XPB0062", "UPDATE_DATE": datetime(2026, 1, 1, 8, 30), "QTY": 3},
+        {"LOTNO": "25XPB0062", "UPDATE_DATE": datetime(2026, 1, 2, 9, 0), "QTY": 5},
+        {"LOTNO": "25XPB0062", "UPDATE_DATE": None, "QTY": 4},
+    ]
+
+    statistics = describe_rows("PAC_1000", rows)
+    update_date = next(column for column in statistics["columns"] if column["column"] == "UPDATE_DATE")
+
+    assert update_date["kind"] == "datetime"
+    assert update_date["min"] == datetime(2026, 1, 1, 8, 30)
+    assert update_date["max"] == datetime(2026, 1, 2, 9, 0)
+    assert type(update_date["min"]) is datetime
+    assert b'"min":"2026-01-01T08:30:00"' in dumps(statistics)
+
+
+def test_describe_rows_date_column_is_serializable():
+    rows = [{"SHIP_DATE": date(2026, 3, 1)}, {"SHIP_DATE": date(2026, 2, 1)}]
+
+    statistics = describe_rows("PAC_1000", rows)
+
+    assert statistics["columns"][0]["kind"] == "datetime"
+    assert b'"min":"2026-02-01"' in dumps(statistics)
+
+
+def test_build_defect_pareto_ranks_processes_and_overall():
+    table_totals = [
+        {"table_name": "PAC_1000", "process_code": "1000", "totals": {"Crack": 6.0, "Void": 2.0, "Chip": 0.0}},
+        {"table_name": "PAC_1020", "process_code": "1020", "totals": {"Void": 2.0}},
+    ]
+
+    pareto = build_defect_pareto("25XPB0062", table_totals)
+
+    assert pareto["total_defects"] == 10
+    assert [row["defect"] for row in pareto["overall"]] == ["Crack", "Void"]
+    assert pareto["overall"][-1]["cumulative_percent"] == 100
+    assert pareto["processes"][0]["pareto"][0] == {"defect": "Crack", "quantity": 6, "percent": 75.0, "cumulative_percent": 75.0}
+    assert pareto["errors"] == []
+
+
+def test_build_defect_pareto_without_totals_keeps_errors():
+    error = {"table_name": "PAC_1080", "error": "relation does not exist"}
+    table_totals = [
+        {"table_name": "PAC_1000", "process_code": "1000", "totals": {}},
+        error,
+    ]
+
+    pareto = build_defect_pareto("25XPB0062", table_totals)
+
+    assert pareto["total_defects"] == 0
+    assert pareto["overall"] == []
+    assert pareto["processes"] == [{"table_name": "PAC_1000", "process_code": "1000", "total_defects": 0, "pareto": []}]
+    assert pareto["errors"] == [error]
+    assert build_defect_pareto("25XPB0062", [])["overall"] == []
+
+
+def test_build_defect_pareto_decimal_totals():
+    # SUM() of a NUMERIC column comes back as Decimal
+    table_totals = [{"table_name": "PAC_1000", "process_code": "1000", "totals": {"Crack": Decimal("3"), "Void": Decimal("1.5")}}]
+
+    pareto = build_defect_pareto("25XPB0062", table_totals)
+
+    assert pareto["total_defects"] == 4.5
+    assert [row["cumulative_percent"] for row in pareto["overall"]] == [66.67, 100.0]
+
+
+def decode_columnar(output: dict) -> list:
+    """Rows back from columnar output, as a client would decode it"""
+    dictionary = output.get("dictionary", {})
+    decoded = []
+    for values in output["rows"]:
+        row = {}
+        for column, value in zip(output["columns"], values):
+            if column in dictionary and value is not None:
+                value = dictionary[column][value]
+            row[column] = value
+        decoded.append(row)
+    return decoded
+
+
+COLUMNAR_ROWS = [
+    {"LOTNO": "25XPB0062", "MACHINE": "WB-01", "SERIAL": "A1", "QTY": 3, "REMARK": None},
+    {"LOTNO": "25XPB0062", "MACHINE": "WB-02", "SERIAL": "A2", "QTY": 5, "REMARK": "retest"},
+    {"LOTNO": "25XPB0062", "MACHINE": None, "SERIAL": "A3", "QTY": None, "REMARK": "retest"},
+    {"LOTNO": "25XPB0062", "MACHINE": "WB-01", "SERIAL": "A4", "QTY": 4, "REMARK": None},
+]
+
+
+def test_to_columnar_round_trips_to_row_output():
+    for dictionary_encode in (False, True):
+        output = to_columnar([dict(row) for row in COLUMNAR_ROWS], dictionary_encode)
+        assert output["columns"] == ["LOTNO", "MACHINE", "SERIAL", "QTY", "REMARK"]
+        assert decode_columnar(output) == COLUMNAR_ROWS
+
+
+def test_to_columnar_dictionary_encodes_repeated_strings_only():
+    output = to_columnar(COLUMNAR_ROWS, dictionary_encode=True)
+
+    # 4 values / 1 distinct and 2 non-null values / 1 distinct pay for a dictionary
+    assert output["dictionary"] == {"LOTNO": ["25XPB0062"], "REMARK": ["retest"]}
+    assert [row[0] for row in output["rows"]] == [0, 0, 0, 0]
+    # Null stays null, not an index
+    assert [row[4] for row in output["rows"]] == [None, 0, 0, None]
+    # 3 non-null values / 2 distinct and unique strings do not, numbers are never encoded
+    assert [row[1] for row in output["rows"]] == ["WB-01", "WB-02", None, "WB-01"]
+    assert [row[2] for row in output["rows"]] == ["A1", "A2", "A3", "A4"]
+    assert [row[3] for row in output["rows"]] == [3, 5, None, 4]
+
+
+def test_to_columnar_without_repeats_has_no_dictionary():
+    rows = [{"SERIAL": "A1", "REMARK": None}, {"SERIAL": "A2", "REMARK": None}]
+    output = to_columnar(rows, dictionary_encode=True)
+    assert "dictionary" not in output
+    assert output["rows"] == [["A1", None], ["A2", None]]
+    assert to_columnar([], dictionary_encode=True) == {"columns": [], "rows": []}
+
+
+def test_to_columnar_missing_column_is_null():
+    output = to_columnar([{"LOTNO": "25XPB0062"}, {"LOTNO": "25XPB0062", "QTY": 2}])
+    assert output == {"columns": ["LOTNO", "QTY"], "rows": [["25XPB0062", None], ["25XPB0062", 2]]}
+
+
+def test_format_output_columnar_combined_and_error_entries():
+    combined = {"table_name": "PAC_1000", "process": COLUMNAR_ROWS[:2], "defective": []}
+    output = format_output(combined, "columnar")
+    assert output["table_name"] == "PAC_1000"
+    assert decode_columnar(output["process"]) == COLUMNAR_ROWS[:2]
+    assert output["defective"] == {"columns": [], "rows": []}
+
+    error = {"table_name": "PAC_1080", "error": "relation does not exist"}
+    assert format_output(error, "columnar") is error
+    assert format_output(COLUMNAR_ROWS) is COLUMNAR_ROWS
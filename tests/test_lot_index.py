@@ -0,0 +1,75 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import controllers.dwh_async_controller as controller
+from models.lot_index import LotLocation, LotLocationIndex
+
+
+def make_index(monkeypatch) -> LotLocationIndex:
+    index = LotLocationIndex()
+    monkeypatch.setattr(controller, "lot_index", index)
+    monkeypatch.setattr(controller, "get_catalog_async",
+                        lambda: asyncio.sleep(0, SimpleNamespace(lot_tables=("LOT_A", "LOT_B"), product_mapping=lambda product: None)))
+    return index
+
+
+def test_unknown_lot_probed_once_then_rejected_from_negative_cache(monkeypatch):
+    index = make_index(monkeypatch)
+    probes = []
+
+    async def lot_prober(table_list, lotno):
+        probes.append(lotno)
+        return None
+
+    monkeypatch.setattr(controller, "lot_prober", lot_prober)
+
+    async def main():
+        return [await controller.lot_mapper("GARBAGE") for _ in range(3)]
+
+    results = asyncio.run(main())
+    assert probes == ["GARBAGE"]
+    assert all(result["table_name"] == "" for result in results)
+    assert index.stats["probe_missing"] == 1 and index.stats["reject"] == 2
+
+
+def test_miss_on_fresh_index_is_final(monkeypatch):
+    index = make_index(monkeypatch)
+    index.ready, index.synced_at = True, time.monotonic()
+
+    async def lot_prober(table_list, lotno):
+        raise AssertionError("fresh index miss must not query the warehouse")
+
+    monkeypatch.setattr(controller, "lot_prober", lot_prober)
+
+    result = asyncio.run(controller.lot_mapper("GARBAGE"))
+    assert result["table_name"] == ""
+    assert index.stats["reject"] == 1
+
+
+def test_stale_index_probes_and_adds_hit(monkeypatch):
+    index = make_index(monkeypatch)
+    index.ready, index.synced_at = True, time.monotonic() - 3600
+
+    async def lot_prober(table_list, lotno):
+        return LotLocation("LOT_B", "P1")
+
+    monkeypatch.setattr(controller, "lot_prober", lot_prober)
+
+    result = asyncio.run(controller.lot_mapper("25XPB0062"))
+    assert result["table_name"] == "LOT_B"
+    assert index.lookup("25XPB0062") == LotLocation("LOT_B", "P1")
+
+
+def test_negative_cache_expires_and_is_bounded(monkeypatch):
+    import models.lot_index as lot_index_module
+    monkeypatch.setattr(lot_index_module, "LOT_INDEX_NEGATIVE_MAX", 2)
+    index = LotLocationIndex()
+
+    index.add_missing("EXPIRED", ttl=0)
+    assert not index.is_missing("EXPIRED")
+
+    for lotno in ("A", "B", "C"):
+        index.add_missing(lotno)
+    assert not index.is_missing("A")
+    assert index.is_missing("B") and index.is_missing("C")
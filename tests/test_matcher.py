@@ -0,0 +1,54 @@
+from types import SimpleNamespace
+
+from models.matcher import AhoCorasick, InfoMatcher
+
+
+def info_row(table_name: str, process_name: str = None, process_code: str = None, product_code: str = None):
+    return SimpleNamespace(table_name=table_name, process_name=process_name, process_code=process_code, product_code=product_code)
+
+
+def test_automaton_reports_overlapping_patterns():
+    automaton = AhoCorasick(["he", "she", "his", "hers"])
+    matches = sorted((start, automaton.patterns[pattern_id]) for start, pattern_id in automaton.iter_matches("ushers"))
+    assert matches == [(1, "she"), (2, "he"), (2, "hers")]
+
+
+def test_automaton_is_case_insensitive_on_patterns():
+    automaton = AhoCorasick(["PAC_1000"])
+    assert [start for start, _ in automaton.iter_matches("lot pac_1000")] == [4]
+
+
+def test_match_needs_whole_token():
+    matcher = InfoMatcher([info_row("PAC_1000"), info_row("PAC_1000x")])
+    assert matcher.best_match("data of PAC_1000x please").table_name == "PAC_1000x"
+    assert matcher.best_match("data of PAC_1000 please").table_name == "PAC_1000"
+    assert [row.table_name for _, row in matcher.candidates("data of PAC_1000x")] == ["PAC_1000x"]
+    assert matcher.best_match("lot 25XPAC_1000062") is None
+
+
+def test_thai_next_to_code_is_a_boundary():
+    matcher = InfoMatcher([info_row("PAC_1000", process_code="WB")])
+    (score, row), = matcher.candidates("ขอข้อมูลPAC_1000ของล็อตนี้")
+    assert row.table_name == "PAC_1000" and score == (8, 8)
+    assert matcher.candidates("ขอข้อมูลWBด้วย")[0][0] == (2, 2)
+
+
+def test_rank_by_field_weight_then_longest_match():
+    rows = [
+        info_row("PAC_1000", process_name="Wire Bond", product_code="BGA"),
+        info_row("PAC_2000", process_name="Die Attach", process_code="DA"),
+        info_row("PAC_3000", process_name="Wire Bond", process_code="WB"),
+    ]
+    matcher = InfoMatcher(rows)
+
+    # Table name outweighs process name + code together
+    assert [row.table_name for _, row in matcher.candidates("PAC_2000 wire bond WB")] == ["PAC_2000", "PAC_3000", "PAC_1000"]
+
+    # Same process name matched in both rows, the extra process code wins
+    assert [score for score, _ in matcher.candidates("wire bond WB")] == [(6, 9), (4, 9)]
+
+
+def test_rank_ties_keep_catalog_order():
+    rows = [info_row("PAC_1000", process_name="Mold"), info_row("PAC_2000", process_name="Mold")]
+    assert [row.table_name for _, row in InfoMatcher(rows).candidates("mold")] == ["PAC_1000", "PAC_2000"]
+    assert [row.table_name for _, row in InfoMatcher(rows[::-1]).candidates("mold")] == ["PAC_2000", "PAC_1000"]
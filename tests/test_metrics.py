@@ -0,0 +1,74 @@
+import asyncio
+from types import SimpleNamespace
+
+from prometheus_client.parser import text_string_to_metric_families
+
+from main import MetricsMiddleware
+from models.metrics import new_request_stats, record_request, render_metrics, metric_value
+from models.serialization import DWHJSONResponse
+from models.single_flight import single_flight
+import routers.metrics_router  # noqa: F401  (registers the pool, cache & single-flight collectors)
+
+
+def scrape() -> dict:
+    """Parsed /metrics body: {family name: {(sample name, sorted labels): value}}"""
+    families = text_string_to_metric_families(render_metrics().decode())
+    return {
+        family.name: {(sample.name, tuple(sorted(sample.labels.items()))): sample.value for sample in family.samples}
+        for family in families
+    }
+
+
+def test_exposition_parses_with_request_samples():
+    stats = new_request_stats()
+    stats["db_queries"], stats["db_rows"] = 3, 42
+    record_request("test_tool", "POST", 200, 0.02, 1024, stats, error=False)
+    record_request("test_tool", "POST", 500, 0.5, 10, new_request_stats(), error=True)
+
+    metrics = scrape()
+    operation = (("operation", "test_tool"),)
+    assert metrics["dwh_requests"][("dwh_requests_total", (("method", "POST"), ("operation", "test_tool"), ("status", "200")))] == 1
+    assert metrics["dwh_request_errors"][("dwh_request_errors_total", operation)] == 1
+    assert metrics["dwh_db_queries"][("dwh_db_queries_total", operation)] == 3
+    assert metrics["dwh_db_rows"][("dwh_db_rows_total", operation)] == 42
+    assert metrics["dwh_response_bytes"][("dwh_response_bytes_total", operation)] == 1034
+
+    latency = metrics["dwh_request_duration_seconds"]
+    assert latency[("dwh_request_duration_seconds_count", operation)] == 2
+    assert latency[("dwh_request_duration_seconds_bucket", (("le", "+Inf"),) + operation)] == 2
+    assert latency[("dwh_request_duration_seconds_bucket", (("le", "0.025"),) + operation)] == 1
+
+
+def test_exposition_includes_collector_families():
+    metrics = scrape()
+    assert {"dwh_pool_size", "dwh_pool_checked_out", "dwh_result_cache_events", "dwh_result_cache_usage",
+            "dwh_plan_cache_events", "dwh_single_flight_in_flight", "dwh_single_flight_calls"} <= metrics.keys()
+    assert metrics["dwh_single_flight_in_flight"][("dwh_single_flight_in_flight", ())] == single_flight.snapshot()["in_flight"]
+    assert ("dwh_result_cache_events_total", (("event", "hit"),)) in metrics["dwh_result_cache_events"]
+
+
+def test_middleware_counts_success_false_payload_as_error():
+    async def tool(scope, receive, send):
+        scope["route"] = SimpleNamespace(operation_id=scope["path"].strip("/"))
+        success = scope["path"] == "/ok_tool"
+        await DWHJSONResponse({"success": success, "content": []})(scope, receive, send)
+
+    async def call(path: str):
+        scope = {"type": "http", "method": "POST", "path": path, "raw_path": path.encode(), "root_path": "",
+                 "scheme": "http", "server": ("test", 80), "query_string": b"", "headers": []}
+        sent = []
+
+        async def receive():
+            return {"type": "http.request", "body": b""}
+
+        async def send(message):
+            sent.append(message)
+
+        await MetricsMiddleware(tool)(scope, receive, send)
+        return sent
+
+    asyncio.run(call("/failed_tool"))
+    asyncio.run(call("/ok_tool"))
+    assert metric_value("dwh_request_errors_total", operation="failed_tool") == 1
+    assert metric_value("dwh_request_errors_total", operation="ok_tool") == 0
+    assert metric_value("dwh_requests_total", operation="ok_tool", method="POST", status="200") == 1
@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+import models.paging as paging
+from models.paging import ServerCursorRegistry, encode_page_token, decode_page_token
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = list(rows)
+
+    async def fetchmany(self, size):
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+    async def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, engine):
+        self.engine = engine
+
+    async def stream(self, statement):
+        return FakeResult(range(statement))
+
+    async def close(self):
+        self.engine.open -= 1
+
+
+class FakeEngine:
+    def __init__(self):
+        self.open = 0
+
+    async def connect(self):
+        self.open += 1
+        return FakeConnection(self)
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = FakeEngine()
+    monkeypatch.setattr(paging, "get_pg_cursor_engine", lambda: engine)
+    return engine
+
+
+def test_pages_are_sequenced_replayed_and_stale_rejected(engine):
+    registry = ServerCursorRegistry(ttl=60, max_cursors=2)
+
+    async def main():
+        cursor_id, seq, first = await registry.open(7, 3)   # 7 rows, 3 per page
+        assert (seq, first) == (1, [0, 1, 2])
+
+        assert await registry.fetch(cursor_id, 1, 3) == (2, [3, 4, 5])
+        # Retry of the same page (response lost): same rows, same next page, cursor not advanced
+        assert await registry.fetch(cursor_id, 1, 3) == (2, [3, 4, 5])
+        with pytest.raises(ValueError):
+            await registry.fetch(cursor_id, 0, 3)
+
+        # Last page releases the connection but can still be replayed
+        assert await registry.fetch(cursor_id, 2, 3) == (None, [6])
+        assert engine.open == 0
+        assert await registry.fetch(cursor_id, 2, 3) == (None, [6])
+        with pytest.raises(ValueError):
+            await registry.fetch(cursor_id, 3, 3)
+
+    asyncio.run(main())
+    assert registry.stats["replayed"] == 2 and registry.stats["stale"] == 2
+
+
+def test_open_cursors_are_bounded(engine):
+    registry = ServerCursorRegistry(ttl=60, max_cursors=2)
+
+    async def main():
+        cursors = [await registry.open(10, 2) for _ in range(3)]
+        assert len(registry) == 2 and engine.open == 2
+        # Oldest cursor was closed to stay within the cursor pool
+        with pytest.raises(ValueError):
+            await registry.fetch(cursors[0][0], 1, 2)
+        await registry.close_all()
+        assert engine.open == 0
+
+    asyncio.run(main())
+
+
+def test_single_page_keeps_no_cursor(engine):
+    registry = ServerCursorRegistry(ttl=60, max_cursors=2)
+    assert asyncio.run(registry.open(2, 5)) == (None, None, [0, 1])
+    assert len(registry) == 0 and engine.open == 0
+
+
+def test_page_token_is_signed():
+    token = encode_page_token({"cursor": "abc", "seq": 3})
+    assert decode_page_token(token) == {"cursor": "abc", "seq": 3}
+    with pytest.raises(ValueError):
+        decode_page_token(encode_page_token({"cursor": "abc", "seq": 4}).split(".")[0] + "." + token.split(".")[1])
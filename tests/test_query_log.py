@@ -0,0 +1,43 @@
+from models.metrics import new_request_stats, start_request, end_request
+from models.query_log import QueryLog
+
+
+def record(query_log: QueryLog, stats: dict, statements: list):
+    for statement in statements:
+        query_log._record_shape(stats["statements"], statement, 0.01, 1)
+        stats["db_queries"] += 1
+
+
+def test_fan_out_over_distinct_tables_is_not_n_plus_one():
+    query_log = QueryLog(n_plus_one_threshold=5, enabled=True)
+    stats = new_request_stats()
+    record(query_log, stats, [f'SELECT "LOTNO", "M1" FROM "PAC_{table}" WHERE "LOTNO" = %(lotno)s' for table in range(10)])
+
+    report = query_log.finish_request("main_summary_each_process_data", stats)
+    (shape,) = report["shapes"]
+    assert (shape["count"], shape["variants"], shape["identical"]) == (10, 10, 1)
+    assert report["n_plus_one"] == []
+
+
+def test_identical_statement_repeated_is_n_plus_one():
+    query_log = QueryLog(n_plus_one_threshold=5, enabled=True)
+    stats = new_request_stats()
+    record(query_log, stats, [f"SELECT \"PRODUCT\" FROM \"PAC_1000\" WHERE \"LOTNO\" = '{lot}'" for lot in range(5)])
+    record(query_log, stats, ['SELECT "PRODUCT" FROM "PAC_1020" WHERE "LOTNO" = %(lotno)s'])
+
+    report = query_log.finish_request("lot_mapper", stats)
+    (repeated,) = report["n_plus_one"]
+    assert (repeated["count"], repeated["variants"], repeated["identical"]) == (6, 2, 5)
+    assert query_log.stats["n_plus_one"] == 1
+
+
+def test_record_counts_statement_run_outside_engine_events():
+    query_log = QueryLog(enabled=True)
+    stats, token = start_request({"type": "http"})
+    try:
+        query_log.record('COPY (SELECT * FROM "PAC_1000" WHERE "LOTNO" = %(lotno)s) TO STDOUT WITH (FORMAT CSV, HEADER)', 0.2, 1234)
+    finally:
+        end_request(token)
+
+    assert (stats["db_queries"], stats["db_rows"]) == (1, 1234)
+    assert query_log.stats["statements"] == 1
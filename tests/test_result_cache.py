@@ -0,0 +1,93 @@
+import models.result_cache as result_cache_module
+from models.result_cache import ResultCache, estimate_size
+
+ROW = [{"lotno": "25XPB0062", "value": "x" * 100}]
+ROW_SIZE = estimate_size(ROW)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def new_cache(entries: int = 3, ttl: int = 60) -> ResultCache:
+    return ResultCache(max_bytes=ROW_SIZE * entries, ttl=ttl, max_entry_bytes=ROW_SIZE * entries, enabled=True)
+
+
+def test_evicts_least_recently_used_over_budget():
+    cache = new_cache(entries=3)
+    for key in ("a", "b", "c"):
+        cache.put(key, ROW)
+    assert cache.get("a") == ROW  # "a" is now most recent, "b" is the oldest
+
+    cache.put("d", ROW)
+    assert cache.get("b") is None
+    assert [key for key in ("a", "c", "d") if cache.get(key) is not None] == ["a", "c", "d"]
+
+    cache.put("e", ROW)  # "a" was touched first by the lookups above
+    assert cache.get("a") is None
+    assert len(cache) == 3 and cache.bytes == ROW_SIZE * 3
+    assert cache.stats["evict"] == 2 and cache.stats["store"] == 5
+
+
+def test_replacing_a_key_does_not_double_count_bytes():
+    cache = new_cache(entries=2)
+    cache.put("a", ROW)
+    cache.put("a", ROW)
+    cache.put("b", ROW)
+    assert len(cache) == 2 and cache.bytes == ROW_SIZE * 2
+    assert cache.stats["evict"] == 0
+
+
+def test_entry_larger_than_limit_is_not_stored():
+    cache = ResultCache(max_bytes=ROW_SIZE * 4, ttl=60, max_entry_bytes=ROW_SIZE - 1, enabled=True)
+    cache.put("a", ROW)
+    assert cache.get("a") is None
+    assert cache.stats["too_large"] == 1 and cache.stats["store"] == 0 and cache.bytes == 0
+
+
+def test_expired_entry_is_a_miss(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(result_cache_module.time, "monotonic", clock)
+    cache = new_cache(ttl=60)
+    cache.put("a", ROW)
+
+    clock.now += 59
+    assert cache.get("a") == ROW
+
+    clock.now += 1
+    assert cache.get("a") is None
+    assert len(cache) == 0 and cache.bytes == 0
+    assert cache.stats["expire"] == 1 and cache.stats["miss"] == 1 and cache.stats["hit"] == 1
+
+
+def test_bypass_skips_lookup_but_keeps_entry():
+    cache = new_cache()
+    cache.put("a", ROW)
+    assert cache.get("a", bypass=True) is None
+    assert cache.get("a") == ROW
+    assert cache.stats["bypass"] == 1 and cache.stats["hit"] == 1 and cache.stats["miss"] == 0
+
+
+def test_disabled_cache_stores_and_counts_nothing():
+    cache = ResultCache(max_bytes=ROW_SIZE * 4, ttl=60, enabled=False)
+    cache.put("a", ROW)
+    assert cache.get("a") is None and len(cache) == 0
+    assert not any(cache.stats.values())
+
+
+def test_snapshot_counters_and_hit_rate():
+    cache = new_cache()
+    assert cache.snapshot()["hit_rate"] is None
+
+    cache.put("a", ROW)
+    cache.get("a")
+    cache.get("a")
+    cache.get("b")
+    snapshot = cache.snapshot()
+    assert {key: snapshot[key] for key in ("hit", "miss", "store", "entries", "bytes")} == \
+        {"hit": 2, "miss": 1, "store": 1, "entries": 1, "bytes": ROW_SIZE}
+    assert snapshot["hit_rate"] == round(2 / 3, 4)
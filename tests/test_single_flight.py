@@ -0,0 +1,68 @@
+import asyncio
+from types import SimpleNamespace
+
+from models.metrics import request_stats, start_request, end_request
+from models.single_flight import SingleFlight
+
+
+def test_coalesced_callers_share_execution_stats():
+    single_flight = SingleFlight(enabled=True)
+    executions = 0
+
+    async def query():
+        nonlocal executions
+        executions += 1
+        await asyncio.sleep(0.01)
+        # What the query log records for one statement of the current request
+        stats = request_stats.get()
+        stats["db_queries"] += 1
+        stats["db_rows"] += 7
+        stats["statements"]["SELECT ?"] = {"count": 1, "seconds": 0.01, "rows": 7, "variants": {"SELECT ?": 1}}
+        return "result"
+
+    async def request():
+        stats, token = start_request({"type": "http"})
+        try:
+            result = await single_flight.run("key", query, operation="tool")
+        finally:
+            end_request(token)
+        return result, stats
+
+    async def main():
+        return await asyncio.gather(request(), request(), request())
+
+    results = asyncio.run(main())
+
+    assert executions == 1
+    assert single_flight.snapshot()["coalesced"] == 2
+    for result, stats in results:
+        assert result == "result"
+        assert (stats["db_queries"], stats["db_rows"]) == (1, 7)
+        assert stats["statements"]["SELECT ?"]["count"] == 1
+
+
+def test_paging_calls_are_not_coalesced(monkeypatch):
+    import controllers.dwh_async_controller as controller
+
+    pages = []
+
+    async def execute_sql_page(mapping_data, page_size=None, continuation_token=None):
+        pages.append(continuation_token)
+        page = len(pages)
+        await asyncio.sleep(0.01)
+        return {"success": True, "content": [{"page": page}], "continuation_token": None}
+
+    async def get_catalog_async():
+        return SimpleNamespace(resolve_table=lambda table_name: table_name)
+
+    monkeypatch.setattr(controller, "execute_sql_page", execute_sql_page)
+    monkeypatch.setattr(controller, "get_catalog_async", get_catalog_async)
+    arguments = {"mapping_data": {"table_name": "PAC_1000"}, "continuation_token": "token"}
+
+    async def main():
+        return await asyncio.gather(*(controller.main_execute_sql_func(chatInput="next", arguments=arguments) for _ in range(3)))
+
+    results = asyncio.run(main())
+    # Every caller advances its own page, no page is shared (and skipped) between callers
+    assert pages == ["token"] * 3
+    assert sorted(result["content"][0]["page"] for result in results) == [1, 2, 3]